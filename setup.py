@@ -3,17 +3,43 @@ Using setup.py for other things is now deprecated:
     setup.py test -> pytest
     setup.py develop -> pip install -e
 """
+import warnings
 from setuptools import setup, Extension
+from setuptools.errors import CompileError, LinkError
 import setuptools_scm  # noqa # pylint: disable=unused-import
 from Cython.Build import build_ext
 import numpy
 
 
+class build_ext_openmp(build_ext):
+    """builds the extensions with OpenMP if the compiler supports it
+    and without it otherwise, in which case the parallel loops run on a
+    single thread
+    """
+
+    def build_extension(self, ext):
+        compile_args = list(ext.extra_compile_args)
+        link_args = list(ext.extra_link_args)
+        if self.compiler.compiler_type == 'msvc':
+            ext.extra_compile_args = compile_args + ['/openmp']
+        else:
+            ext.extra_compile_args = compile_args + ['-fopenmp']
+            ext.extra_link_args = link_args + ['-fopenmp']
+        try:
+            super().build_extension(ext)
+        except (CompileError, LinkError):
+            warnings.warn(
+                f'OpenMP is not available, building {ext.name} without it.')
+            ext.extra_compile_args = compile_args
+            ext.extra_link_args = link_args
+            super().build_extension(ext)
+
+
 setup(
     ext_modules=[
         Extension(
             "rsatoolbox.cengine.similarity",
             ["src/rsatoolbox/cengine/similarity.pyx"],
             include_dirs=[numpy.get_include()])],
-    cmdclass={'build_ext': build_ext}
+    cmdclass={'build_ext': build_ext_openmp}
 )
@@ -2,8 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import cython
+from cython.parallel cimport prange, threadid
 from cython.view cimport array as cvarray
 from libc.math cimport log, sqrt, isnan, NAN
+from libc.stdlib cimport malloc, free
 from cpython.mem cimport PyMem_Malloc, PyMem_Realloc, PyMem_Free
 cimport scipy.linalg.cython_blas as blas
 cimport numpy as cnp
@@ -88,7 +90,7 @@ cpdef float_t [:] calc(
                 weights[idx] += weight / 2
             elif weighting == 0: #'equal':
                 values[idx] += sim / weight / 2
-                weights[idx] += 1 / 2
+                weights[idx] += 0.5
         for j in range(i + 1, data.shape[0]):
             if not crossval or not cv_desc[i] == cv_desc[j]:
                 #vec_i = data[i]
@@ -127,6 +129,169 @@ cpdef float_t [:] calc(
     return values
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cpdef float_t [:] calc_parallel(
+    float_t [:, :] data, int_t [:] desc,
+    int_t [:] cv_desc, int n,
+    int method_idx, float_t [:, :] noise=None,
+    float_t prior_lambda=1, float_t prior_weight=0.1,
+    int weighting=1, int crossval=0, int n_threads=1):
+    # same as calc, but the loop over rows runs on n_threads OpenMP threads
+    # without the GIL. Each thread accumulates into its own row of
+    # values and weights, which are summed at the end, and indexes the
+    # finite channels for mahalanobis in its own row of finite_t.
+    # If the extension was built without OpenMP this runs on one thread.
+    cdef:
+        float_t [:, :] values_t
+        float_t [:, :] weights_t
+        int [:, :] finite_t
+        float_t [:] weights
+        float_t [:] values
+        float_t [:, :] log_data
+        int i, j, idx
+        int n_rdm = (n * (n-1)) / 2
+        int n_dim = data.shape[1]
+        int n_obs = data.shape[0]
+        int use_noise = noise is not None
+        float_t prior_lambda_l = prior_lambda * prior_weight
+        float_t prior_weight_l = 1 + prior_weight
+    if (method_idx > 4) or (method_idx < 1):
+        raise ValueError('dissimilarity method not recognized!')
+    if n_threads < 1:
+        n_threads = 1
+    # precompute stuff for poisson KL
+    if method_idx == 4:
+        data = data.copy()
+        log_data = data.copy()
+        for i in range(n_obs):
+            for j in range(n_dim):
+                data[i, j] = (data[i, j] + prior_lambda_l) / prior_weight_l
+                log_data[i, j] = log(data[i, j])
+    else:
+        log_data = data
+    if not use_noise:
+        noise = cvarray(shape=(1, 1), itemsize=sizeof(float_t), format="d")
+    values_t = cvarray(shape=(n_threads, n_rdm + n),
+                       itemsize=sizeof(float_t), format="d")
+    weights_t = cvarray(shape=(n_threads, n_rdm + n),
+                        itemsize=sizeof(float_t), format="d")
+    finite_t = cvarray(shape=(n_threads, max(n_dim, 1)),
+                       itemsize=sizeof(int), format="i")
+    values_t[:, :] = 0
+    weights_t[:, :] = 0
+    with nogil:
+        for i in prange(n_obs, num_threads=n_threads, schedule='dynamic'):
+            _calc_row(data, log_data, desc, cv_desc, n, i, method_idx,
+                      noise, use_noise, weighting, crossval,
+                      values_t[threadid()], weights_t[threadid()],
+                      finite_t[threadid()])
+    values = cvarray(shape=(n_rdm + n,), itemsize=sizeof(float_t), format="d")
+    weights = cvarray(shape=(n_rdm + n,), itemsize=sizeof(float_t), format="d")
+    for idx in range(n_rdm + n):
+        values[idx] = 0
+        weights[idx] = 0
+        for i in range(n_threads):
+            values[idx] += values_t[i, idx]
+            weights[idx] += weights_t[i, idx]
+        if weights[idx] > 0:
+            values[idx] = values[idx] / weights[idx]
+        else:
+            values[idx] = NAN
+    return values
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+cdef void _calc_row(
+        float_t [:, :] data, float_t [:, :] log_data,
+        int_t [:] desc, int_t [:] cv_desc, int n, int i,
+        int method_idx, float_t [:, :] noise, int use_noise,
+        int weighting, int crossval,
+        float_t [:] values, float_t [:] weights,
+        int [:] finite) noexcept nogil:
+    # adds the similarities of row i to all later rows to values & weights
+    # finite is a buffer of n_dim ints for _mahalanobis_nogil
+    cdef:
+        float_t sim = 0
+        float_t weight = 0
+        int j, idx
+        int n_dim = data.shape[1]
+    if not crossval:
+        sim, weight = _similarity_nogil(
+            data[i], data[i], log_data[i], log_data[i], n_dim,
+            method_idx, noise, use_noise, finite)
+        idx = desc[i]
+        if weighting == 1: #'number':
+            values[idx] += sim / 2
+            weights[idx] += weight / 2
+        elif weighting == 0: #'equal':
+            values[idx] += sim / weight / 2
+            weights[idx] += 0.5
+    for j in range(i + 1, data.shape[0]):
+        if not crossval or not cv_desc[i] == cv_desc[j]:
+            sim, weight = _similarity_nogil(
+                data[i], data[j], log_data[i], log_data[j], n_dim,
+                method_idx, noise, use_noise, finite)
+            if weight > 0:
+                if desc[i] == desc[j]:
+                    idx = desc[i]
+                else:
+                    if desc[j] > desc[i]:
+                        idx = (n - 1) * desc[i] - (((desc[i] + 1) * desc[i]) / 2) + desc[j] - 1 + n
+                    else:
+                        idx = (n - 1) * desc[j] - (((desc[j] + 1) * desc[j]) / 2) + desc[i] - 1 + n
+                if weighting == 1: #'number':
+                    values[idx] += sim
+                    weights[idx] += weight
+                elif weighting == 0: #'equal':
+                    values[idx] += sim / weight
+                    weights[idx] += 1
+
+
+cdef (float_t, float_t) _similarity_nogil(
+        float_t [:] vec_i, float_t [:] vec_j,
+        float_t [:] log_vec_i, float_t [:] log_vec_j, int n_dim,
+        int method_idx, float_t [:, :] noise, int use_noise,
+        int [:] finite) noexcept nogil:
+    if method_idx == 1: # method == 'euclidean':
+        return euclid(vec_i, vec_j, n_dim)
+    elif method_idx == 2: # method == 'correlation':
+        return correlation(vec_i, vec_j, n_dim)
+    elif method_idx == 3: # method in ['mahalanobis', 'crossnobis']:
+        if use_noise:
+            return (_mahalanobis_nogil(vec_i, vec_j, n_dim, noise, finite),
+                    <float_t> n_dim)
+        return euclid(vec_i, vec_j, n_dim)
+    return poisson_cv(vec_i, vec_j, log_vec_i, log_vec_j, n_dim)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef float_t _mahalanobis_nogil(float_t [:] vec_i, float_t [:] vec_j,
+                                int n_dim, float_t [:, :] noise,
+                                int [:] finite) noexcept nogil:
+    # same as mahalanobis, indexing the finite channels directly
+    # finite is a preallocated buffer of at least n_dim ints
+    cdef:
+        int i, k, l
+        int n_finite = 0
+        float_t sim = 0.0
+        float_t noise_vec
+    for i in range(n_dim):
+        if not isnan(vec_i[i]) and not isnan(vec_j[i]):
+            finite[n_finite] = i
+            n_finite += 1
+    for k in range(n_finite):
+        noise_vec = 0.0
+        for l in range(n_finite):
+            noise_vec = noise_vec + noise[finite[l], finite[k]] * vec_j[finite[l]]
+        sim = sim + vec_i[finite[k]] * noise_vec
+    return sim
+
+
 @cython.boundscheck(False)
 @cython.cdivision(True)
 cpdef (float_t, float_t) calc_one(
@@ -224,7 +389,7 @@ cpdef (float_t, float_t) similarity(float_t [:] vec_i, float_t [:] vec_j, int me
 
 
 @cython.boundscheck(False)
-cdef (float_t, float_t) euclid(float_t [:] vec_i, float_t [:] vec_j, int n_dim):
+cdef (float_t, float_t) euclid(float_t [:] vec_i, float_t [:] vec_j, int n_dim) noexcept nogil:
     cdef:
         float_t sim = 0
         float_t weight = 0
@@ -240,7 +405,7 @@ cdef (float_t, float_t) euclid(float_t [:] vec_i, float_t [:] vec_j, int n_dim):
 @cython.cdivision(True)
 cdef (float_t, float_t) poisson_cv(float_t [:] vec_i, float_t [:] vec_j,
                                  float_t [:] log_vec_i, float_t [:] log_vec_j,
-                                 int n_dim):
+                                 int n_dim) noexcept nogil:
     cdef:
         float_t sim = 0
         float_t weight = 0
@@ -304,7 +469,7 @@ cdef float_t mahalanobis(float_t [:] vec_i, float_t [:] vec_j, int n_dim,
 
 @cython.boundscheck(False)
 @cython.cdivision(True)
-cdef (float_t, float_t) correlation(float_t [:] vec_i, float_t [:] vec_j, int n_dim):
+cdef (float_t, float_t) correlation(float_t [:] vec_i, float_t [:] vec_j, int n_dim) noexcept nogil:
     cdef:
         float_t si = 0.0
         float_t sj = 0.0
@@ -2,8 +2,10 @@ from .dataset import Dataset
 from .dataset import TemporalDataset
 from .dataset import load_dataset
 from .dataset import dataset_from_dict
+from .lazy import LazyMeasurements
 from .computations import average_dataset
 from .computations import average_dataset_by
+from .computations import average_by_index
 from .noise import cov_from_residuals
 from .noise import prec_from_residuals
 from .noise import cov_from_measurements
@@ -7,6 +7,7 @@ from rsatoolbox.util.descriptor_utils import parse_input_descriptor
 from rsatoolbox.io.hdf5 import write_dict_hdf5
 from rsatoolbox.io.pkl import write_dict_pkl
 from rsatoolbox.util.file_io import remove_file
+from rsatoolbox.data.lazy import LazyMeasurements, is_lazy_source
 
 
 class DatasetBase:
@@ -24,6 +25,12 @@ class DatasetBase:
         channel_descriptors (dict):   channel descriptors (all are
             array-like with shape = (n_channel,...))
 
+    measurements may also be an h5py dataset or a numpy.memmap. These are
+    read only when the measurements attribute is accessed, and subsets
+    and splits of the dataset keep them on disk until then. Each access
+    reads them anew, so the returned array is read-only. To change lazy
+    measurements, assign a new array to the measurements attribute.
+
     Returns:
         dataset object
     """
@@ -35,7 +42,7 @@ class DatasetBase:
             raise AttributeError(
                 "measurements must be in dimension n_obs x n_channel")
         self.measurements = measurements
-        self.n_obs, self.n_channel = self.measurements.shape
+        self.n_obs, self.n_channel = self._measurements.shape
         if check_dims:
             check_descriptor_length_error(obs_descriptors,
                                           "obs_descriptors",
@@ -49,6 +56,40 @@ class DatasetBase:
         self.obs_descriptors = parse_input_descriptor(obs_descriptors)
         self.channel_descriptors = parse_input_descriptor(channel_descriptors)
 
+    @property
+    def measurements(self):
+        """ the measurements, read into memory if they are stored lazily.
+        Lazy measurements are returned as a read-only array, because
+        changes to it would not be kept.
+        """
+        if isinstance(self._measurements, LazyMeasurements):
+            measurements = self._measurements.load()
+            measurements.flags.writeable = False
+            return measurements
+        return self._measurements
+
+    @measurements.setter
+    def measurements(self, measurements):
+        if is_lazy_source(measurements) \
+                and not isinstance(measurements, LazyMeasurements):
+            measurements = LazyMeasurements(measurements)
+        self._measurements = measurements
+
+    @property
+    def is_lazy(self) -> bool:
+        """ whether the measurements are only read when accessed """
+        return isinstance(self._measurements, LazyMeasurements)
+
+    def _shared_measurements(self):
+        """ the measurements for a view of this dataset: a read-only view
+        of an array or the same lazy measurements
+        """
+        if isinstance(self._measurements, LazyMeasurements):
+            return self._measurements
+        measurements = self._measurements.view()
+        measurements.flags.writeable = False
+        return measurements
+
     def __repr__(self):
         """
         defines string which is printed for the object
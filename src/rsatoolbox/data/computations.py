@@ -5,6 +5,7 @@ Dataset computations
 """
 
 import numpy as np
+import scipy.sparse
 from rsatoolbox.util.data_utils import get_unique_inverse
 
 
@@ -21,23 +22,69 @@ def average_dataset(dataset):
     return np.mean(dataset.measurements, axis=0)
 
 
-def average_dataset_by(dataset, by):
+def average_dataset_by(dataset, by, nan_mean=False):
     """
     computes the average of a dataset per value of a descriptor
 
+    The averages for all values are computed with one product of a sparse
+    indicator matrix with the measurements. For a TemporalDataset all
+    time points are averaged at once. float32 measurements are averaged
+    in float32, all others in float64.
+
     Args:
         dataset(rsatoolbox.data.Dataset): the dataset to operate on
         by(String): which obs_descriptor to split by
+        nan_mean(bool): whether nan entries are ignored, such that each
+            average is taken over the valid measurements only
 
     Returns:
         numpy.ndarray: average: average activation vector
+            (n_values x n_channel [x n_time])
+        numpy.ndarray: unique_values: the descriptor values in order
+        numpy.ndarray: n_obs: number of observations per value
     """
     unique_values, inverse = get_unique_inverse(dataset.obs_descriptors[by])
-    average = np.nan * np.empty(
-        (len(unique_values), dataset.measurements.shape[1]))
-    n_obs = np.nan * np.empty(len(unique_values))
-    for i_v, _ in enumerate(unique_values):
-        measurements = dataset.measurements[inverse == i_v, :]
-        average[i_v] = np.mean(measurements, axis=0)
-        n_obs[i_v] = measurements.shape[0]
+    average = average_by_index(
+        dataset.measurements, inverse, len(unique_values), nan_mean)
+    n_obs = np.bincount(inverse, minlength=len(unique_values)) \
+        .astype(np.float64)
     return average, unique_values, n_obs
+
+
+def average_by_index(measurements, index, n_values=None, nan_mean=False):
+    """
+    averages the rows of measurements which share an index
+
+    Args:
+        measurements(numpy.ndarray): n_obs x ... array to average
+        index(numpy.ndarray): integer in [0, n_values - 1] for each row
+        n_values(int): number of averages, defaults to max(index) + 1
+        nan_mean(bool): whether nan entries are ignored
+
+    Returns:
+        numpy.ndarray: average: n_values x ... array of averages,
+            nan where no (valid) rows were averaged
+    """
+    measurements = np.asarray(measurements)
+    index = np.asarray(index).reshape(-1)
+    if n_values is None:
+        n_values = int(index.max()) + 1 if len(index) else 0
+    if measurements.dtype == np.float32:
+        dtype = np.float32
+    else:
+        dtype = np.float64
+    flat = measurements.reshape(measurements.shape[0], -1).astype(
+        dtype, copy=False)
+    indicator = scipy.sparse.csr_matrix(
+        (np.ones(len(index), dtype=dtype), (index, np.arange(len(index)))),
+        shape=(n_values, len(index)))
+    if nan_mean:
+        valid = ~np.isnan(flat)
+        sums = indicator @ np.where(valid, flat, 0)
+        counts = indicator @ valid.astype(dtype)
+    else:
+        sums = indicator @ flat
+        counts = np.bincount(index, minlength=n_values)[:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = (sums / counts).astype(dtype, copy=False)
+    return average.reshape((n_values,) + measurements.shape[1:])
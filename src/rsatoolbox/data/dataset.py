@@ -54,13 +54,28 @@ class Dataset(DatasetBase):
             ])
         return False
 
-    def copy(self) -> Dataset:
+    def copy(self, deep: bool = True) -> Dataset:
         """Return a copy of this object, with all properties
         equal to the original's
 
+        Args:
+            deep (bool): whether the measurements and descriptor values are
+                copied. Otherwise the copy is a view, which shares them
+                with this object and only has its own descriptor
+                dictionaries. Writing into the shared, read-only
+                measurements raises an error.
+
         Returns:
             Dataset: Value copy
         """
+        if not deep:
+            return Dataset(
+                measurements=self._shared_measurements(),
+                descriptors=dict(self.descriptors),
+                obs_descriptors=dict(self.obs_descriptors),
+                channel_descriptors=dict(self.channel_descriptors),
+                check_dims=False
+            )
         return Dataset(
             measurements=self.measurements.copy(),
             descriptors=deepcopy(self.descriptors),
@@ -81,7 +96,7 @@ class Dataset(DatasetBase):
         dataset_list = []
         for i_v, _ in enumerate(unique_values):
             selection = np.where(inverse == i_v)[0]
-            measurements = self.measurements[selection, :]
+            measurements = self._measurements[selection, :]
             descriptors = self.descriptors.copy()
             descriptors[by] = unique_values[i_v]
             obs_descriptors = subset_descriptor(
@@ -108,7 +123,7 @@ class Dataset(DatasetBase):
         dataset_list = []
         for i_v, v in enumerate(unique_values):
             selection = np.where(inverse == i_v)[0]
-            measurements = self.measurements[:, selection]
+            measurements = self._measurements[:, selection]
             descriptors = self.descriptors.copy()
             descriptors[by] = v
             obs_descriptors = self.obs_descriptors
@@ -136,7 +151,7 @@ class Dataset(DatasetBase):
 
         """
         selection = num_index(self.obs_descriptors[by], value)
-        measurements = self.measurements[selection, :]
+        measurements = self._measurements[selection, :]
         descriptors = self.descriptors
         obs_descriptors = subset_descriptor(
             self.obs_descriptors, selection)
@@ -161,7 +176,7 @@ class Dataset(DatasetBase):
 
         """
         selection = num_index(self.channel_descriptors[by], value)
-        measurements = self.measurements[:, selection]
+        measurements = self._measurements[:, selection]
         descriptors = self.descriptors
         obs_descriptors = self.obs_descriptors
         channel_descriptors = subset_descriptor(
@@ -184,7 +199,7 @@ class Dataset(DatasetBase):
         """
         desc = self.obs_descriptors[by]
         order = np.argsort(desc, kind='stable')
-        self.measurements = self.measurements[order]
+        self.measurements = self._measurements[order]
         self.obs_descriptors = subset_descriptor(self.obs_descriptors, order)
 
     def get_measurements(self):
@@ -387,7 +402,7 @@ class TemporalDataset(Dataset):
                 "measurements must be in dimension n_obs x n_channel x time")
 
         self.measurements = measurements
-        self.n_obs, self.n_channel, self.n_time = self.measurements.shape
+        self.n_obs, self.n_channel, self.n_time = self._measurements.shape
 
         if time_descriptors is None:
             time_descriptors = {'time': np.arange(self.n_time)}
@@ -446,13 +461,26 @@ class TemporalDataset(Dataset):
                 f'time_descriptors: \n{string_time_desc}\n'
                 )
 
-    def copy(self) -> TemporalDataset:
+    def copy(self, deep: bool = True) -> TemporalDataset:
         """Return a copy of this object, with all properties
         equal to the original's
 
+        Args:
+            deep (bool): whether the measurements and descriptor values are
+                copied. Otherwise the copy is a view, see Dataset.copy
+
         Returns:
             Dataset: Value copy
         """
+        if not deep:
+            return TemporalDataset(
+                measurements=self._shared_measurements(),
+                descriptors=dict(self.descriptors),
+                obs_descriptors=dict(self.obs_descriptors),
+                channel_descriptors=dict(self.channel_descriptors),
+                time_descriptors=dict(self.time_descriptors),
+                check_dims=False
+            )
         return TemporalDataset(
             measurements=self.measurements.copy(),
             descriptors=deepcopy(self.descriptors),
@@ -474,7 +502,7 @@ class TemporalDataset(Dataset):
         dataset_list = []
         for i_v, _ in enumerate(unique_values):
             selection = np.where(inverse == i_v)[0]
-            measurements = self.measurements[selection, :, :]
+            measurements = self._measurements[selection, :, :]
             descriptors = self.descriptors
             obs_descriptors = subset_descriptor(
                 self.obs_descriptors, selection)
@@ -504,7 +532,7 @@ class TemporalDataset(Dataset):
         dataset_list = []
         for i_v, v in enumerate(unique_values):
             selection = np.where(inverse == i_v)[0]
-            measurements = self.measurements[:, selection, :]
+            measurements = self._measurements[:, selection, :]
             descriptors = self.descriptors.copy()
             descriptors[by] = v
             obs_descriptors = self.obs_descriptors
@@ -536,7 +564,7 @@ class TemporalDataset(Dataset):
         for v in time:
             selection = [i for i, val in enumerate(self.time_descriptors[by])
                          if val == v]
-            measurements = self.measurements[:, :, selection]
+            measurements = self._measurements[:, :, selection]
             descriptors = self.descriptors
             obs_descriptors = self.obs_descriptors
             channel_descriptors = self.channel_descriptors
@@ -611,7 +639,7 @@ class TemporalDataset(Dataset):
 
         """
         selection = num_index(self.obs_descriptors[by], value)
-        measurements = self.measurements[selection, :, :]
+        measurements = self._measurements[selection, :, :]
         descriptors = self.descriptors
         obs_descriptors = subset_descriptor(
             self.obs_descriptors, selection)
@@ -641,7 +669,7 @@ class TemporalDataset(Dataset):
 
         """
         selection = num_index(self.channel_descriptors[by], value)
-        measurements = self.measurements[:, selection]
+        measurements = self._measurements[:, selection]
         descriptors = self.descriptors
         obs_descriptors = self.obs_descriptors
         channel_descriptors = subset_descriptor(
@@ -675,7 +703,7 @@ class TemporalDataset(Dataset):
         sel_time = [t for t in time if t_from <= t <= t_to]
 
         selection = num_index(self.time_descriptors[by], sel_time)
-        measurements = self.measurements[:, :, selection]
+        measurements = self._measurements[:, :, selection]
         descriptors = self.descriptors
         obs_descriptors = self.obs_descriptors
         channel_descriptors = self.channel_descriptors
@@ -701,7 +729,7 @@ class TemporalDataset(Dataset):
         """
         desc = self.obs_descriptors[by]
         order = np.argsort(desc)
-        self.measurements = self.measurements[order]
+        self.measurements = self._measurements[order]
         self.obs_descriptors = subset_descriptor(self.obs_descriptors, order)
 
     def time_as_channels(self) -> Dataset:
@@ -812,11 +840,15 @@ class TemporalDataset(Dataset):
         return data_dict
 
 
-def load_dataset(filename, file_type=None):
+def load_dataset(filename, file_type=None, lazy=False):
     """ loads a Dataset object from disc
 
     Args:
         filename(String): path to file to load
+        lazy(Boolean): for hdf5 files, keep the measurements on disk and
+            read them only when they are needed, e.g. after selecting a
+            subset of channels. The file stays open while the dataset
+            or any of its subsets exist.
 
     """
     if file_type is None:
@@ -826,7 +858,8 @@ def load_dataset(filename, file_type=None):
             elif filename[-3:] == '.h5' or filename[-4:] == 'hdf5':
                 file_type = 'hdf5'
     if file_type == 'hdf5':
-        data_dict = read_dict_hdf5(filename)
+        data_dict = read_dict_hdf5(
+            filename, lazy_keys=('measurements',) if lazy else ())
     elif file_type == 'pkl':
         data_dict = read_dict_pkl(filename)
     else:
@@ -0,0 +1,108 @@
+"""Measurements which are only read from disk when needed
+"""
+from __future__ import annotations
+import numpy as np
+from h5py import Dataset as H5Dataset
+
+
+class LazyMeasurements:
+    """
+    Measurements stored in an h5py dataset or a numpy.memmap, which are
+    read only when they are needed.
+
+    Indexing returns another LazyMeasurements object, which reads only the
+    selected entries, such that subsets of observations or channels can
+    be formed without loading anything. np.asarray or load() read the
+    selected entries into memory.
+
+    Args:
+        source (h5py.Dataset or numpy.memmap): the stored measurements
+        index (tuple): index array into each dimension of source.
+            Defaults to all entries.
+    """
+
+    def __init__(self, source, index=None):
+        self.source = source
+        if index is None:
+            index = [np.arange(n) for n in source.shape]
+        self.index = tuple(np.asarray(idx, dtype=np.intp) for idx in index)
+
+    @property
+    def shape(self):
+        """ shape of the selected measurements """
+        return tuple(len(idx) for idx in self.index)
+
+    @property
+    def ndim(self):
+        """ number of dimensions """
+        return len(self.index)
+
+    @property
+    def dtype(self):
+        """ data type of the stored measurements """
+        return self.source.dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return (f'rsatoolbox.data.LazyMeasurements(shape={self.shape}, '
+                f'source={self.source!r})')
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError('too many indices for LazyMeasurements')
+        key = key + (slice(None),) * (self.ndim - len(key))
+        if any(k is Ellipsis or k is None or isinstance(k, (int, np.integer))
+               for k in key):
+            return self.load()[key]
+        return LazyMeasurements(
+            self.source, [idx[k] for idx, k in zip(self.index, key)])
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.load()
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+    def load(self):
+        """ reads the selected measurements into memory
+
+        Contiguous index ranges are read as slices. h5py allows only one
+        sorted index array per read, so only the first non contiguous
+        dimension is read with an index array and the others are read as
+        their enclosing range and selected in memory.
+
+        Returns:
+            numpy.ndarray: the measurements
+        """
+        if any(len(idx) == 0 for idx in self.index):
+            return np.empty(self.shape, dtype=self.dtype)
+        selection = []
+        post = []
+        fancy = False
+        for idx in self.index:
+            unique, inverse = np.unique(idx, return_inverse=True)
+            if not fancy and len(unique) < unique[-1] - unique[0] + 1:
+                selection.append(unique)
+                post.append(inverse.reshape(-1))
+                fancy = True
+            else:
+                selection.append(slice(unique[0], unique[-1] + 1))
+                post.append(idx - unique[0])
+        data = self.source[tuple(selection)]
+        if not all(np.array_equal(p, np.arange(n))
+                   for p, n in zip(post, data.shape)):
+            return np.asarray(data[np.ix_(*post)])
+        if isinstance(data, np.memmap):
+            # slices of a memmap are still mapped to the file
+            return np.array(data)
+        return np.asarray(data)
+
+
+def is_lazy_source(measurements) -> bool:
+    """ whether measurements are stored on disk and should be read lazily
+    """
+    return isinstance(measurements, (LazyMeasurements, np.memmap, H5Dataset))
@@ -1,6 +1,8 @@
 from .bootstrap import bootstrap_sample
 from .bootstrap import bootstrap_sample_rdm
 from .bootstrap import bootstrap_sample_pattern
+from .bootstrap import bootstrap_sample_indices
+from .bootstrap import BootstrapIndexer
 from .evaluate import eval_fixed
 from .evaluate import eval_bootstrap
 from .evaluate import eval_bootstrap_rdm
@@ -20,6 +22,7 @@ from .crossvalsets import sets_k_fold_rdm
 from .crossvalsets import sets_of_k_pattern
 from .noise_ceiling import cv_noise_ceiling
 from .noise_ceiling import boot_noise_ceiling
+from .noise_ceiling import boot_noise_ceiling_vectors
 from .result import load_results
 from .result import Result
 from .result import result_from_dict
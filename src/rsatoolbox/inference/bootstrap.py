@@ -7,7 +7,8 @@ import numpy as np
 from rsatoolbox.util.rdm_utils import add_pattern_index
 
 
-def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
+def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index',
+                     rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -27,6 +28,9 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.Generator): random generator to draw from
+            default: None, which uses the global numpy random state
+
     Returns:
         rsatoolbox.rdm.rdms.RDMs: rdms
             subsampled dataset with equal number of groups in both patterns
@@ -42,19 +46,17 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
     rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
     pattern_descriptor, pattern_select = \
         add_pattern_index(rdms, pattern_descriptor)
-    rdm_idx = np.random.randint(0, len(rdm_select),
-                                size=len(rdm_select))
+    rdm_idx = _randint(rng, len(rdm_select), len(rdm_select))
     rdm_idx = rdm_select[rdm_idx]
     rdms = rdms.subsample(rdm_descriptor, rdm_idx)
-    pattern_idx = np.random.randint(0, len(pattern_select),
-                                    size=len(pattern_select))
+    pattern_idx = _randint(rng, len(pattern_select), len(pattern_select))
     pattern_idx = pattern_select[pattern_idx]
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, rdm_idx, pattern_idx
 
 
-def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
+def bootstrap_sample_rdm(rdms, rdm_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -69,6 +71,9 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
             the descriptor each sample will either contain all RDMs with
             this value or none
 
+        rng(numpy.random.Generator): random generator to draw from
+            default: None, which uses the global numpy random state
+
     Returns:
         rsatoolbox.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of groups of rdms
@@ -81,14 +86,13 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
 
     """
     rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
-    rdm_sample = np.random.randint(0, len(rdm_select),
-                                   size=len(rdm_select))
+    rdm_sample = _randint(rng, len(rdm_select), len(rdm_select))
     rdm_idx = rdm_select[rdm_sample]
     rdms = rdms.subsample(rdm_descriptor, rdm_idx)
     return rdms, rdm_idx
 
 
-def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
+def bootstrap_sample_pattern(rdms, pattern_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -102,6 +106,9 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.Generator): random generator to draw from
+            default: None, which uses the global numpy random state
+
     Returns:
         rsatoolbox.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of pattern groups
@@ -111,9 +118,141 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
     """
     pattern_descriptor, pattern_select = \
         add_pattern_index(rdms, pattern_descriptor)
-    pattern_idx = np.random.randint(0, len(pattern_select),
-                                    size=len(pattern_select))
+    pattern_idx = _randint(rng, len(pattern_select), len(pattern_select))
     pattern_idx = pattern_select[pattern_idx]
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, pattern_idx
+
+
+def bootstrap_sample_indices(rdms, N, rdm_descriptor='index',
+                             pattern_descriptor='index', boot_type='both',
+                             rng=None):
+    """Draws the indices for N bootstrap samples at once.
+
+    The random numbers are drawn in the same order as by N successive calls
+    to bootstrap_sample, bootstrap_sample_rdm or bootstrap_sample_pattern,
+    such that the same samples are generated for a given random state.
+    No RDMs objects are created. Use a BootstrapIndexer to extract the
+    dissimilarities for a sample.
+
+    Args:
+        rdms(rsatoolbox.rdm.rdms.RDMs): Data to be used
+        N(int): number of bootstrap samples
+        rdm_descriptor(String): descriptor to group the rdms by
+        pattern_descriptor(String): descriptor to group the patterns by
+        boot_type(String): which dimension to bootstrap over
+            'both' (default), 'rdm' or 'pattern'. The other dimension
+            contains all unique descriptor values in every sample
+        rng(numpy.random.Generator): random generator to draw from
+            default: None, which uses the global numpy random state
+
+    Returns:
+        numpy.ndarray: rdm_idx
+            sampled rdm descriptor values (N x n_rdm_groups)
+
+        numpy.ndarray: pattern_idx
+            sampled pattern descriptor values (N x n_pattern_groups)
+
+    """
+    if boot_type not in ('both', 'rdm', 'pattern'):
+        raise ValueError('boot_type not understood')
+    rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
+    _, pattern_select = add_pattern_index(rdms, pattern_descriptor)
+    rdm_idx = np.empty((N, len(rdm_select)), dtype=rdm_select.dtype)
+    pattern_idx = np.empty((N, len(pattern_select)),
+                           dtype=pattern_select.dtype)
+    rdm_idx[:] = rdm_select
+    pattern_idx[:] = pattern_select
+    for i_sample in range(N):
+        if boot_type in ('both', 'rdm'):
+            rdm_idx[i_sample] = rdm_select[_randint(
+                rng, len(rdm_select), len(rdm_select))]
+        if boot_type in ('both', 'pattern'):
+            pattern_idx[i_sample] = pattern_select[_randint(
+                rng, len(pattern_select), len(pattern_select))]
+    return rdm_idx, pattern_idx
+
+
+class BootstrapIndexer:
+    """Gathers bootstrap samples from the vectors of an RDMs object
+
+    The positions of each descriptor value and a map from pairs of
+    patterns to entries of the RDM vectors are computed once, such that
+    a sample can be extracted by fancy indexing. The result equals
+    the vectors of rdms.subsample(...).subsample_pattern(...), including
+    the NaNs for pairs of a pattern with its own copy.
+
+    Args:
+        rdms(rsatoolbox.rdm.rdms.RDMs): RDMs to sample from
+        rdm_descriptor(String): descriptor the rdm samples refer to
+        pattern_descriptor(String): descriptor the pattern samples refer to
+
+    """
+
+    def __init__(self, rdms, rdm_descriptor='index',
+                 pattern_descriptor='index'):
+        vectors = rdms.get_vectors()
+        self.n_dist = vectors.shape[1]
+        # append a NaN column, which the diagonal of the pair map points to
+        self.vectors = np.concatenate(
+            [vectors, np.full((vectors.shape[0], 1), np.nan)], axis=1)
+        self.pair_index = np.full((rdms.n_cond, rdms.n_cond), self.n_dist)
+        rows, cols = np.triu_indices(rdms.n_cond, 1)
+        self.pair_index[rows, cols] = np.arange(self.n_dist)
+        self.pair_index[cols, rows] = np.arange(self.n_dist)
+        self.rdm_groups = np.asarray(rdms.rdm_descriptors[rdm_descriptor])
+        self._rdm_positions = _positions(self.rdm_groups)
+        self._pattern_positions = _positions(
+            np.asarray(rdms.pattern_descriptors[pattern_descriptor]))
+
+    def rdm_selection(self, rdm_idx):
+        """ positions of the RDMs in a sample, ordered as by subsample """
+        return np.concatenate([self._rdm_positions[i] for i in rdm_idx])
+
+    def pattern_selection(self, pattern_idx):
+        """ positions of the patterns in a sample, sorted as by
+        subsample_pattern """
+        return np.sort(np.concatenate(
+            [self._pattern_positions[i] for i in pattern_idx]))
+
+    def pair_selection(self, pattern_selection):
+        """ vector entries for all pairs of the selected patterns """
+        rows, cols = np.triu_indices(len(pattern_selection), 1)
+        return self.pair_index[pattern_selection[rows],
+                               pattern_selection[cols]]
+
+    def gather(self, rdm_idx=None, pattern_idx=None):
+        """extracts the vectors for a bootstrap sample
+
+        Args:
+            rdm_idx(numpy.ndarray): sampled rdm descriptor values
+                default: all RDMs in their original order
+            pattern_idx(numpy.ndarray): sampled pattern descriptor values
+                default: all patterns
+
+        Returns:
+            numpy.ndarray: vectors of the sampled RDMs
+
+        """
+        if rdm_idx is None:
+            vectors = self.vectors
+        else:
+            vectors = self.vectors[self.rdm_selection(rdm_idx)]
+        if pattern_idx is None:
+            return vectors[:, :self.n_dist]
+        pairs = self.pair_selection(self.pattern_selection(pattern_idx))
+        return vectors[:, pairs]
+
+
+def _randint(rng, high, size):
+    """ random integers in [0, high) from rng or the global random state """
+    if rng is None:
+        return np.random.randint(0, high, size=size)
+    return rng.integers(0, high, size=size)
+
+
+def _positions(descriptor):
+    """ maps each unique value of a descriptor to its positions """
+    return {value: np.flatnonzero(descriptor == value)
+            for value in np.unique(descriptor)}
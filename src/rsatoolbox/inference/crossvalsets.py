@@ -86,7 +86,8 @@ def sets_leave_one_out_rdm(rdms, rdm_descriptor='index'):
 
 
 def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
-                pattern_descriptor='index', rdm_descriptor='index'):
+                pattern_descriptor='index', rdm_descriptor='index',
+                rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits both over rdms and over patterns
     resulting in k_rdm * k_pattern (training, test) pairs.
@@ -100,6 +101,8 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
         k_rdm(int): number of rdm groups
         k_pattern(int): number of pattern groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.Generator): random generator for the assignment
+            default: None, which uses the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -117,8 +120,8 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
         k_pattern = default_k_pattern(len(pattern_select))
     assert k_rdm <= len(rdm_select), \
         'Can make at most as many groups as rdms'
-    if random:
-        np.random.shuffle(rdm_select)
+    rdm_select, pattern_selects = _k_fold_orders(
+        rdm_select, pattern_select, k_rdm, random=random, rng=rng)
     group_size_rdm = np.floor(len(rdm_select) / k_rdm)
     additional_rdms = len(rdm_select) % k_rdm
     train_set = []
@@ -140,9 +143,9 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
                                    rdm_idx_test)
         rdms_train = rdms.subsample(rdm_descriptor,
                                     rdm_idx_train)
-        train_new, test_new, _ = sets_k_fold_pattern(
-            rdms_train, k=k_pattern,
-            pattern_descriptor=pattern_descriptor, random=random)
+        train_new, test_new = _k_fold_pattern_sets(
+            rdms_train, pattern_descriptor, pattern_selects[i_group],
+            k_pattern)
         ceil_new = deepcopy(test_new)
         for i_pattern in range(k_pattern):
             test_new[i_pattern][0] = rdms_test.subset_pattern(
@@ -154,7 +157,8 @@ def sets_k_fold(rdms, k_rdm=None, k_pattern=None, random=True,
     return train_set, test_set, ceil_set
 
 
-def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
+def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index',
+                    rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits both over rdms and over patterns
     resulting in k_rdm * k_pattern (training, test) pairs.
@@ -164,6 +168,8 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
         rdm_descriptor(String): descriptor to select rdm groups
         k_rdm(int): number of rdm groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.Generator): random generator for the assignment
+            default: None, which uses the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -177,7 +183,7 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
     assert k_rdm <= len(rdm_select), \
         'Can make at most as many groups as rdms'
     if random:
-        np.random.shuffle(rdm_select)
+        _shuffle(rng, rdm_select)
     group_size_rdm = np.floor(len(rdm_select) / k_rdm)
     additional_rdms = len(rdm_select) % k_rdm
     train_set = []
@@ -202,7 +208,7 @@ def sets_k_fold_rdm(rdms, k_rdm=None, random=True, rdm_descriptor='index'):
 
 
 def sets_k_fold_pattern(rdms, pattern_descriptor='index',
-                        k=None, random=False):
+                        k=None, random=False, rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits in the given order or
     randomizes the order. For k=1 training and test_set are whole dataset,
@@ -219,6 +225,8 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index',
         pattern_descriptor(String): descriptor to select groups
         k(int): number of groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.Generator): random generator for the assignment
+            default: None, which uses the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -230,10 +238,53 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index',
         add_pattern_index(rdms, pattern_descriptor)
     if k is None:
         k = default_k_pattern(len(pattern_select))
+    if random:
+        _shuffle(rng, pattern_select)
+    train_set, test_set = _k_fold_pattern_sets(
+        rdms, pattern_descriptor, pattern_select, k)
+    ceil_set = None
+    return train_set, test_set, ceil_set
+
+
+def _k_fold_orders(rdm_select, pattern_select, k_rdm, random=True,
+                   rng=None):
+    """ orders of the rdm and pattern values for sets_k_fold
+
+    Draws all random numbers of one k-fold assignment: the rdm values are
+    shuffled once and the pattern values once for each of the k_rdm rdm
+    folds. Evaluations which need the same draws as sets_k_fold without
+    its sets should call this directly.
+
+    Args:
+        rdm_select(numpy.ndarray): unique rdm descriptor values
+        pattern_select(numpy.ndarray): unique pattern descriptor values
+        k_rdm(int): number of rdm groups
+        random(bool): whether the assignment shall be randomized
+        rng(numpy.random.Generator): random generator for the assignment
+            default: None, which uses the global numpy random state
+
+    Returns:
+        numpy.ndarray: rdm_select, the ordered rdm values
+        list: pattern_selects, the ordered pattern values for each rdm fold
+
+    """
+    rdm_select = np.array(rdm_select)
+    if random:
+        _shuffle(rng, rdm_select)
+    pattern_selects = []
+    for _ in range(k_rdm):
+        pattern_order = np.array(pattern_select)
+        if random:
+            _shuffle(rng, pattern_order)
+        pattern_selects.append(pattern_order)
+    return rdm_select, pattern_selects
+
+
+def _k_fold_pattern_sets(rdms, pattern_descriptor, pattern_select, k):
+    """ training and test sets of sets_k_fold_pattern for pattern values
+    in a given order """
     assert k <= len(pattern_select), \
         'Can make at most as many groups as conditions'
-    if random:
-        np.random.shuffle(pattern_select)
     group_size = np.floor(len(pattern_select) / k)
     additional_patterns = len(pattern_select) % k
     train_set = []
@@ -256,8 +307,7 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index',
                                          pattern_idx_train)
         test_set.append([rdms_test, pattern_idx_test])
         train_set.append([rdms_train, pattern_idx_train])
-    ceil_set = None
-    return train_set, test_set, ceil_set
+    return train_set, test_set
 
 
 def sets_of_k_rdm(rdms, rdm_descriptor='index', k=5, random=False):
@@ -314,7 +364,8 @@ def sets_of_k_pattern(rdms, pattern_descriptor=None, k=5, random=False):
 
 
 def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
-                pattern_descriptor='index', rdm_descriptor='index'):
+                pattern_descriptor='index', rdm_descriptor='index',
+                rng=None):
     """ generates training and test set combinations by selecting random
     test sets of n_rdm RDMs and n_pattern patterns and using the rest of
     the data as the training set.
@@ -327,6 +378,8 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
         rdm_descriptor(String): descriptor to select rdm groups
         n_rdm(int): number of rdms per test set
         n_pattern(int): number of patterns per test set
+        rng(numpy.random.Generator): random generator for the assignment
+            default: None, which uses the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -349,8 +402,8 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
     ceil_set = []
     for _i_group in range(n_cv):
         # shuffle
-        np.random.shuffle(rdm_select)
-        np.random.shuffle(pattern_select)
+        _shuffle(rng, rdm_select)
+        _shuffle(rng, pattern_select)
         # choose indices based on n_rdm
         if n_rdm == 0:
             train_idx = np.arange(len(rdm_select))
@@ -384,3 +437,11 @@ def sets_random(rdms, n_rdm=None, n_pattern=None, n_cv=2,
         train_set.append([rdms_train, pattern_idx_train])
         ceil_set.append([rdms_ceil, pattern_idx_test])
     return train_set, test_set, ceil_set
+
+
+def _shuffle(rng, values):
+    """ shuffles values in place using rng or the global random state """
+    if rng is None:
+        np.random.shuffle(values)
+    else:
+        rng.shuffle(values)
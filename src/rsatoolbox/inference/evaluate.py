@@ -4,26 +4,33 @@
 evaluate model performance
 """
 
+from functools import partial
 import numpy as np
 import tqdm
+from joblib import Parallel, delayed, effective_n_jobs
 from rsatoolbox.rdm import compare
 from rsatoolbox.inference import bootstrap_sample
 from rsatoolbox.inference import bootstrap_sample_rdm
 from rsatoolbox.inference import bootstrap_sample_pattern
 from rsatoolbox.model import Model
+from rsatoolbox.model.fitter import fit_batch, fit_mock
 from rsatoolbox.util.inference_util import input_check_model
 from rsatoolbox.util.inference_util import default_k_pattern, default_k_rdm
+from rsatoolbox.util.inference_util import _pool_transform
 from .result import Result
-from .crossvalsets import sets_k_fold, sets_random
+from .crossvalsets import sets_k_fold, sets_random, _k_fold_orders
 from .noise_ceiling import boot_noise_ceiling
 from .noise_ceiling import cv_noise_ceiling
+from .noise_ceiling import boot_noise_ceiling_vectors
+from .bootstrap import bootstrap_sample_indices
+from .bootstrap import BootstrapIndexer
 
 
 def eval_dual_bootstrap(
         models, data, method='cosine', fitter=None,
         k_pattern=1, k_rdm=1, N=1000, n_cv=2,
         pattern_descriptor='index', rdm_descriptor='index',
-        use_correction=True):
+        use_correction=True, n_jobs=1, random_state=None):
     """dual bootstrap evaluation of models
     i.e. models are evaluated in a bootstrap over rdms, one over patterns
     and a bootstrap over both using the same bootstrap samples for each.
@@ -49,6 +56,13 @@ def eval_dual_bootstrap(
     in every bootstrap sample all crossvalidation folds are evaluated such
     that each RDM and each condition is in the test set n_cv times.
 
+    Without crossvalidation (k_rdm = k_pattern = 1) and for models which
+    are not fitted, the three bootstraps are computed together from the
+    vectors of the data and the model predictions: the predictions and the
+    comparisons to the full set of patterns are computed only once and
+    each sample is compared in a single call, which serves both the
+    bootstrap over both dimensions and the one over patterns.
+
     The k_[] parameters control the cross-validation per sample. They give
     the number of crossvalidation folds to be created along this dimension.
     If a k is set to 1 no crossvalidation is performed over the
@@ -82,6 +96,13 @@ def eval_dual_bootstrap(
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
@@ -102,42 +123,23 @@ def eval_dual_bootstrap(
         models = [models]
     evaluations = np.zeros((N, len(models), k_pattern * k_rdm, n_cv, 3))
     noise_ceil = np.zeros((2, N, n_cv, 3))
-    for i_sample in tqdm.trange(N):
-        sample, rdm_idx, pattern_idx = bootstrap_sample(
-            data,
-            rdm_descriptor=rdm_descriptor,
-            pattern_descriptor=pattern_descriptor)
-        sample_rdm = data.subsample(rdm_descriptor, rdm_idx)
-        sample_pattern = data.subsample_pattern(
-            pattern_descriptor, pattern_idx)
-        if len(np.unique(rdm_idx)) >= k_rdm \
-           and len(np.unique(pattern_idx)) >= 3 * k_pattern:
-            for i_rep in range(n_cv):
-                evals, cv_nc = _internal_cv(
-                    models, sample,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 0] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 0] = evals[0]
-                evals, cv_nc = _internal_cv(
-                    models, sample_rdm,
-                    pattern_descriptor, rdm_descriptor,
-                    np.unique(data.pattern_descriptors[pattern_descriptor]),
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 1] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 1] = evals[0]
-                evals, cv_nc = _internal_cv(
-                    models, sample_pattern,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep, 2] = cv_nc
-                evaluations[i_sample, :, :, i_rep, 2] = evals[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :, :, :] = np.nan
-            noise_ceil[:, i_sample, :, :] = np.nan
+    _, _, _, fitters = input_check_model(models, None, fitter)
+    if k_rdm == 1 and k_pattern == 1 \
+            and all(fit is fit_mock for fit in fitters):
+        samples = _dual_bootstrap_indexed(
+            models, data, method, N, rdm_descriptor, pattern_descriptor,
+            n_jobs=n_jobs, random_state=random_state)
+    else:
+        samples = _map_samples(
+            partial(_dual_bootstrap_sample, models=models, data=data,
+                    method=method, fitter=fitter, k_pattern=k_pattern,
+                    k_rdm=k_rdm, n_cv=n_cv,
+                    pattern_descriptor=pattern_descriptor,
+                    rdm_descriptor=rdm_descriptor),
+            _sample_rngs(N, random_state, n_jobs), n_jobs)
+    for i_sample, (evals, cv_nc) in enumerate(samples):
+        evaluations[i_sample] = evals
+        noise_ceil[:, i_sample] = cv_nc
     cv_method = 'dual_bootstrap'
     dof = min(data.n_rdm, data.n_cond) - 1
     eval_ok = ~np.isnan(evaluations[:, 0, 0, 0, 0])
@@ -218,7 +220,7 @@ def eval_fixed(models, data, theta=None, method='cosine'):
 
 def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
                    pattern_descriptor='index', rdm_descriptor='index',
-                   boot_noise_ceil=True):
+                   boot_noise_ceil=True, n_jobs=1, random_state=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
@@ -230,35 +232,22 @@ def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
         N(int): number of samples
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group rdms for bootstrap
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    models, evaluations, theta, _ = \
-        input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, _, pattern_idx = \
-            bootstrap_sample(data, rdm_descriptor=rdm_descriptor,
-                             pattern_descriptor=pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            for j, mod in enumerate(models):
-                rdm_pred = mod.predict_rdm(theta=theta[j])
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                    method))
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
+    models, _, theta, _ = input_check_model(models, theta, None, N)
+    evaluations, noise_min, noise_max = _eval_bootstrap_indexed(
+        models, data, theta, method, N, rdm_descriptor, pattern_descriptor,
+        'both', boot_noise_ceil, n_jobs, random_state)
     if boot_noise_ceil:
         eval_ok = np.isfinite(evaluations[:, 0])
         noise_ceil = np.array([noise_min, noise_max])
@@ -279,7 +268,7 @@ def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
 
 def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
                            pattern_descriptor='index', rdm_descriptor='index',
-                           boot_noise_ceil=True):
+                           boot_noise_ceil=True, n_jobs=1, random_state=None):
     """evaluates a models on data
     performs bootstrapping over patterns to get a sampling distribution
 
@@ -292,34 +281,22 @@ def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group patterns for noise
             ceiling calculation
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    models, evaluations, theta, _ = \
-        input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, pattern_idx = \
-            bootstrap_sample_pattern(data, pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            for j, mod in enumerate(models):
-                rdm_pred = mod.predict_rdm(theta=theta[j])
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                    method))
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
+    models, _, theta, _ = input_check_model(models, theta, None, N)
+    evaluations, noise_min, noise_max = _eval_bootstrap_indexed(
+        models, data, theta, method, N, rdm_descriptor, pattern_descriptor,
+        'pattern', boot_noise_ceil, n_jobs, random_state)
     if boot_noise_ceil:
         eval_ok = np.isfinite(evaluations[:, 0])
         noise_ceil = np.array([noise_min, noise_max])
@@ -340,7 +317,8 @@ def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
 
 
 def eval_bootstrap_rdm(models, data, theta=None, method='cosine', N=1000,
-                       rdm_descriptor='index', boot_noise_ceil=True):
+                       rdm_descriptor='index', boot_noise_ceil=True,
+                       n_jobs=1, random_state=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
@@ -351,25 +329,22 @@ def eval_bootstrap_rdm(models, data, theta=None, method='cosine', N=1000,
         method(string): comparison method to use
         N(int): number of samples
         rdm_descriptor(string): rdm_descriptor to group rdms for bootstrap
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    models, evaluations, theta, _ = input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, _ = bootstrap_sample_rdm(data, rdm_descriptor)
-        for j, mod in enumerate(models):
-            rdm_pred = mod.predict_rdm(theta=theta[j])
-            evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                method))
-        if boot_noise_ceil:
-            noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                sample, method=method, rdm_descriptor=rdm_descriptor)
-            noise_min.append(noise_min_sample)
-            noise_max.append(noise_max_sample)
+    models, _, theta, _ = input_check_model(models, theta, None, N)
+    evaluations, noise_min, noise_max = _eval_bootstrap_indexed(
+        models, data, theta, method, N, rdm_descriptor, 'index',
+        'rdm', boot_noise_ceil, n_jobs, random_state)
     if boot_noise_ceil:
         eval_ok = np.isfinite(evaluations[:, 0])
         noise_ceil = np.array([noise_min, noise_max])
@@ -415,21 +390,26 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             'ceil_set and test_set must have the same length'
     if isinstance(models, Model):
         models = [models]
+    models, _, _, fitter = input_check_model(models, None, fitter)
+    valid = [not (train[0].n_rdm == 0 or test[0].n_rdm == 0 or
+                  train[0].n_cond <= 2 or test[0].n_cond <= 2)
+             for train, test in zip(train_set, test_set)]
+    # fit all training sets at once, such that batched fitters can share
+    # the computations across folds
+    valid_train = [train for train, ok in zip(train_set, valid) if ok]
+    thetas = [fit_batch(fitter[j], model, valid_train, method=method,
+                        pattern_descriptor=pattern_descriptor)
+              if valid_train else [] for j, model in enumerate(models)]
     evaluations = []
     noise_ceil = []
-    for i, train in enumerate(train_set):
-        test = test_set[i]
-        if (train[0].n_rdm == 0 or test[0].n_rdm == 0 or
-                train[0].n_cond <= 2 or test[0].n_cond <= 2):
+    i_valid = 0
+    for i, test in enumerate(test_set):
+        if not valid[i]:
             evals = np.empty(len(models)) * np.nan
         else:
-            models, evals, _, fitter = \
-                input_check_model(models, None, fitter)
+            evals = np.zeros(len(models))
             for j, model in enumerate(models):
-                theta = fitter[j](model, train[0], method=method,
-                                  pattern_idx=train[1],
-                                  pattern_descriptor=pattern_descriptor)
-                pred = model.predict_rdm(theta)
+                pred = model.predict_rdm(thetas[j][i_valid])
                 pred = pred.subsample_pattern(by=pattern_descriptor,
                                               value=test[1])
                 evals[j] = np.mean(compare(pred, test[0], method))
@@ -438,6 +418,7 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
                     rdms.subsample_pattern(by=pattern_descriptor,
                                            value=test[1]),
                     method=method))
+            i_valid += 1
         evaluations.append(evals)
     evaluations = np.array(evaluations).T  # .T to switch models/set order
     evaluations = evaluations.reshape((1, len(models), len(train_set)))
@@ -457,7 +438,8 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
 def bootstrap_crossval(models, data, method='cosine', fitter=None,
                        k_pattern=None, k_rdm=None, N=1000, n_cv=2,
                        pattern_descriptor='index', rdm_descriptor='index',
-                       boot_type='both', use_correction=True):
+                       boot_type='both', use_correction=True,
+                       n_jobs=1, random_state=None):
     """evaluates a set of models by k-fold crossvalidation within a bootstrap
 
     Crossvalidation creates variance in the results for a single bootstrap
@@ -513,6 +495,13 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
@@ -531,40 +520,20 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
             k_rdm = default_k_rdm((1 - 1 / np.exp(1)) * n_rdm)
     if isinstance(models, Model):
         models = [models]
+    if boot_type not in ('both', 'pattern', 'rdm'):
+        raise ValueError('boot_type not understood')
     evaluations = np.empty((N, len(models), k_pattern * k_rdm, n_cv))
     noise_ceil = np.empty((2, N, n_cv))
-    for i_sample in tqdm.trange(N):
-        if boot_type == 'both':
-            sample, rdm_idx, pattern_idx = bootstrap_sample(
-                data,
-                rdm_descriptor=rdm_descriptor,
-                pattern_descriptor=pattern_descriptor)
-        elif boot_type == 'pattern':
-            sample, pattern_idx = bootstrap_sample_pattern(
-                data,
-                pattern_descriptor=pattern_descriptor)
-            rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
-        elif boot_type == 'rdm':
-            sample, rdm_idx = bootstrap_sample_rdm(
-                data,
-                rdm_descriptor=rdm_descriptor)
-            pattern_idx = np.unique(
-                data.pattern_descriptors[pattern_descriptor])
-        else:
-            raise ValueError('boot_type not understood')
-        if len(np.unique(rdm_idx)) >= k_rdm \
-           and len(np.unique(pattern_idx)) >= 3 * k_pattern:
-            for i_rep in range(n_cv):
-                evals, cv_nc = _internal_cv(
-                    models, sample,
-                    pattern_descriptor, rdm_descriptor, pattern_idx,
-                    k_pattern, k_rdm,
-                    method, fitter)
-                noise_ceil[:, i_sample, i_rep] = cv_nc
-                evaluations[i_sample, :, :, i_rep] = evals[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :] = np.nan
-            noise_ceil[:, i_sample] = np.nan
+    samples = _map_samples(
+        partial(_bootstrap_crossval_sample, models=models, data=data,
+                method=method, fitter=fitter, k_pattern=k_pattern,
+                k_rdm=k_rdm, n_cv=n_cv,
+                pattern_descriptor=pattern_descriptor,
+                rdm_descriptor=rdm_descriptor, boot_type=boot_type),
+        _sample_rngs(N, random_state, n_jobs), n_jobs)
+    for i_sample, (evals, cv_nc) in enumerate(samples):
+        evaluations[i_sample] = evals
+        noise_ceil[:, i_sample] = cv_nc
     if boot_type == 'both':
         cv_method = 'bootstrap_crossval'
         dof = min(data.n_rdm, data.n_cond) - 1
@@ -616,7 +585,7 @@ def eval_dual_bootstrap_random(
         models, data, method='cosine', fitter=None,
         n_pattern=None, n_rdm=None, N=1000, n_cv=2,
         pattern_descriptor='index', rdm_descriptor='index',
-        boot_type='both', use_correction=True):
+        boot_type='both', use_correction=True, n_jobs=1, random_state=None):
     """evaluates a set of models by a evaluating a few random crossvalidation
     folds per bootstrap.
 
@@ -647,6 +616,13 @@ def eval_dual_bootstrap_random(
             alternatives: 'rdm', 'pattern'
         use_correction(bool): switch for the correction for the
             variance caused by crossvalidation (default: True)
+        n_jobs(int): number of processes to distribute the bootstrap
+            samples over (default: 1, i.e. no parallelization)
+        random_state(int or numpy.random.SeedSequence): seed for the
+            bootstrap samples. Each sample draws from its own generator
+            spawned from this seed, such that the results are identical
+            for any n_jobs. default: None, which uses the global numpy
+            random state when n_jobs=1
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
@@ -664,59 +640,20 @@ def eval_dual_bootstrap_random(
         n_rdm = int(np.floor(n_rdm_all / k_rdm))
     if isinstance(models, Model):
         models = [models]
+    if boot_type not in ('both', 'pattern', 'rdm'):
+        raise ValueError('boot_type not understood')
     evaluations = np.zeros((N, len(models), n_cv))
     noise_ceil = np.zeros((2, N, n_cv))
-    for i_sample in tqdm.trange(N):
-        if boot_type == 'both':
-            sample, rdm_idx, pattern_idx = bootstrap_sample(
-                data,
-                rdm_descriptor=rdm_descriptor,
-                pattern_descriptor=pattern_descriptor)
-        elif boot_type == 'pattern':
-            sample, pattern_idx = bootstrap_sample_pattern(
-                data,
-                pattern_descriptor=pattern_descriptor)
-            rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
-        elif boot_type == 'rdm':
-            sample, rdm_idx = bootstrap_sample_rdm(
-                data,
-                rdm_descriptor=rdm_descriptor)
-            pattern_idx = np.unique(
-                data.pattern_descriptors[pattern_descriptor])
-        else:
-            raise ValueError('boot_type not understood')
-        if len(np.unique(rdm_idx)) > n_rdm \
-           and len(np.unique(pattern_idx)) >= 3 + n_pattern:
-            train_set, test_set, ceil_set = sets_random(
-                sample,
-                pattern_descriptor=pattern_descriptor,
-                rdm_descriptor=rdm_descriptor,
-                n_pattern=n_pattern, n_rdm=n_rdm, n_cv=n_cv)
-            if n_rdm > 0 or n_pattern > 0:
-                nc = cv_noise_ceiling(
-                    sample, ceil_set, test_set,
-                    method=method,
-                    pattern_descriptor=pattern_descriptor)
-            else:
-                nc = boot_noise_ceiling(
-                    sample,
-                    method=method,
-                    rdm_descriptor=rdm_descriptor)
-            noise_ceil[:, i_sample] = nc
-            for test_s in test_set:
-                test_s[1] = _concat_sampling(pattern_idx, test_s[1])
-            for train_s in train_set:
-                train_s[1] = _concat_sampling(pattern_idx, train_s[1])
-            cv_result = crossval(
-                models, sample,
-                train_set, test_set,
-                method=method, fitter=fitter,
+    samples = _map_samples(
+        partial(_dual_bootstrap_random_sample, models=models, data=data,
+                method=method, fitter=fitter, n_pattern=n_pattern,
+                n_rdm=n_rdm, n_cv=n_cv,
                 pattern_descriptor=pattern_descriptor,
-                calc_noise_ceil=False)
-            evaluations[i_sample, :, :] = cv_result.evaluations[0]
-        else:  # sample does not allow desired crossvalidation
-            evaluations[i_sample, :, :] = np.nan
-            noise_ceil[:, i_sample] = np.nan
+                rdm_descriptor=rdm_descriptor, boot_type=boot_type),
+        _sample_rngs(N, random_state, n_jobs), n_jobs)
+    for i_sample, (evals, nc) in enumerate(samples):
+        evaluations[i_sample] = evals
+        noise_ceil[:, i_sample] = nc
     if boot_type == 'both':
         cv_method = 'bootstrap_crossval'
         dof = min(data.n_rdm, data.n_cond) - 1
@@ -758,6 +695,342 @@ def eval_dual_bootstrap_random(
     return result
 
 
+def _eval_bootstrap_indexed(models, data, theta, method, N,
+                            rdm_descriptor, pattern_descriptor, boot_type,
+                            boot_noise_ceil, n_jobs=1, random_state=None):
+    """ evaluates fixed models on N bootstrap samples of the data
+
+    All sample indices are drawn up front and the dissimilarities of each
+    sample are gathered from the vectors of the data and of the model
+    predictions, which are computed only once. All models are compared to
+    a sample in a single call.
+    Samples with fewer than 3 distinct patterns are set to NaN unless only
+    rdms are resampled.
+
+    Returns:
+        evaluations (N x n_model), noise_min (N), noise_max (N)
+    """
+    rngs = _sample_rngs(N, random_state, n_jobs)
+    if rngs[0] is None:
+        rdm_idx, pattern_idx = bootstrap_sample_indices(
+            data, N, rdm_descriptor=rdm_descriptor,
+            pattern_descriptor=pattern_descriptor, boot_type=boot_type)
+    else:
+        indices = [bootstrap_sample_indices(
+            data, 1, rdm_descriptor=rdm_descriptor,
+            pattern_descriptor=pattern_descriptor, boot_type=boot_type,
+            rng=rng) for rng in rngs]
+        rdm_idx = np.concatenate([idx[0] for idx in indices])
+        pattern_idx = np.concatenate([idx[1] for idx in indices])
+    data_indexer = BootstrapIndexer(data, rdm_descriptor, pattern_descriptor)
+    preds = [BootstrapIndexer(mod.predict_rdm(theta=theta[j]),
+                              pattern_descriptor=pattern_descriptor)
+             for j, mod in enumerate(models)]
+    samples = _map_samples(
+        partial(_eval_indexed_sample, data_indexer=data_indexer,
+                preds=preds, method=method, boot_type=boot_type,
+                boot_noise_ceil=boot_noise_ceil),
+        list(zip(rdm_idx, pattern_idx)), n_jobs)
+    evaluations = np.array([sample[0] for sample in samples])
+    noise_min = np.array([sample[1] for sample in samples])
+    noise_max = np.array([sample[2] for sample in samples])
+    return evaluations, noise_min, noise_max
+
+
+def _eval_indexed_sample(sample_idx, data_indexer, preds, method,
+                         boot_type, boot_noise_ceil):
+    """ evaluates the models on one sample for _eval_bootstrap_indexed """
+    rdm_idx, pattern_idx = sample_idx
+    evaluations = np.full(len(preds), np.nan)
+    if boot_type == 'rdm':
+        pattern_idx = None
+    elif len(np.unique(pattern_idx)) < 3:
+        return evaluations, np.nan, np.nan
+    if boot_type == 'pattern':
+        sample = data_indexer.gather(None, pattern_idx)
+        rdm_groups = data_indexer.rdm_groups
+    else:
+        sample = data_indexer.gather(rdm_idx, pattern_idx)
+        rdm_groups = data_indexer.rdm_groups[
+            data_indexer.rdm_selection(rdm_idx)]
+    rdm_pred = np.concatenate([pred.gather(None, pattern_idx)
+                               for pred in preds])
+    sim = compare(rdm_pred, sample, method)
+    start = 0
+    for j, pred in enumerate(preds):
+        end = start + pred.vectors.shape[0]
+        evaluations[j] = np.mean(sim[start:end])
+        start = end
+    if boot_noise_ceil:
+        return (evaluations,) + tuple(boot_noise_ceiling_vectors(
+            sample, rdm_groups, method=method))
+    return evaluations, np.nan, np.nan
+
+
+def _dual_bootstrap_indexed(models, data, method, N,
+                            rdm_descriptor, pattern_descriptor,
+                            n_jobs=1, random_state=None):
+    """ evaluates unfitted models on N dual bootstrap samples without
+    crossvalidation
+
+    The three bootstrap variants of a sample are index views of the same
+    vectors: the data and the model predictions are gathered with
+    BootstrapIndexers, the similarities of all data RDMs to the
+    predictions for all patterns are computed once, and the pooled RDMs
+    for the noise ceilings are normalized once per sample and shared
+    between the variants.
+
+    Returns:
+        list: (evaluations (n_model x 1 x 1 x 3), noise_ceil (2 x 1 x 3))
+            for each sample
+    """
+    data_indexer = BootstrapIndexer(data, rdm_descriptor, pattern_descriptor)
+    preds = [BootstrapIndexer(
+        mod.predict_rdm(theta=fit_mock(mod, data)),
+        pattern_descriptor=pattern_descriptor) for mod in models]
+    vectors = data_indexer.gather()
+    sim = compare(np.concatenate([pred.gather() for pred in preds]),
+                  vectors, method)
+    return _map_samples(
+        partial(_dual_bootstrap_indexed_sample, data=data,
+                data_indexer=data_indexer, preds=preds, sim=sim,
+                transformed=_pool_transform(vectors, method),
+                method=method, rdm_descriptor=rdm_descriptor,
+                pattern_descriptor=pattern_descriptor),
+        _sample_rngs(N, random_state, n_jobs), n_jobs)
+
+
+def _dual_bootstrap_indexed_sample(rng, data, data_indexer, preds, sim,
+                                   transformed, method,
+                                   rdm_descriptor, pattern_descriptor):
+    """ evaluates one sample for _dual_bootstrap_indexed
+
+    The last axis of the results contains the bootstrap over both
+    dimensions, the one over rdms and the one over patterns.
+    """
+    evaluations = np.full((len(preds), 1, 1, 3), np.nan)
+    noise_ceil = np.full((2, 1, 3), np.nan)
+    rdm_idx, pattern_idx = bootstrap_sample_indices(
+        data, 1, rdm_descriptor=rdm_descriptor,
+        pattern_descriptor=pattern_descriptor, rng=rng)
+    rdm_idx = rdm_idx[0]
+    pattern_idx = pattern_idx[0]
+    rdm_values = np.unique(rdm_idx)
+    pattern_values = np.unique(pattern_idx)
+    if len(pattern_values) < 3:
+        return evaluations, noise_ceil
+    # _dual_bootstrap_sample assigns crossvalidation folds for each
+    # variant, which draws random numbers even for k=1. The same
+    # assignments are drawn here, such that the samples drawn from the
+    # global random state do not change.
+    rdm_all = np.unique(data.rdm_descriptors[rdm_descriptor])
+    pattern_all = np.unique(data.pattern_descriptors[pattern_descriptor])
+    for rdm_select, pattern_select in [(rdm_values, pattern_values),
+                                       (rdm_values, pattern_all),
+                                       (rdm_all, pattern_values)]:
+        _k_fold_orders(rdm_select, pattern_select, 1, rng=rng)
+    rdm_sel = data_indexer.rdm_selection(rdm_idx)
+    rdm_groups = data_indexer.rdm_groups
+    sample = data_indexer.gather(None, pattern_idx)
+    sim_pattern = compare(
+        np.concatenate([pred.gather(None, pattern_idx) for pred in preds]),
+        sample, method)
+    start = 0
+    for j, pred in enumerate(preds):
+        end = start + pred.vectors.shape[0]
+        evaluations[j, 0, 0, 0] = np.mean(sim_pattern[start:end, rdm_sel])
+        evaluations[j, 0, 0, 1] = np.mean(sim[start:end, rdm_sel])
+        evaluations[j, 0, 0, 2] = np.mean(sim_pattern[start:end])
+        start = end
+    transformed_pattern = _pool_transform(sample, method)
+    noise_ceil[:, 0, 0] = boot_noise_ceiling_vectors(
+        sample[rdm_sel], rdm_groups[rdm_sel], method=method,
+        transformed=transformed_pattern[rdm_sel])
+    noise_ceil[:, 0, 1] = boot_noise_ceiling_vectors(
+        data_indexer.gather()[rdm_sel], rdm_groups[rdm_sel], method=method,
+        transformed=transformed[rdm_sel])
+    noise_ceil[:, 0, 2] = boot_noise_ceiling_vectors(
+        sample, rdm_groups, method=method, transformed=transformed_pattern)
+    return evaluations, noise_ceil
+
+
+def _sample_rngs(N, random_state=None, n_jobs=1):
+    """ random generators for N bootstrap samples
+
+    If no random_state is given and the samples are evaluated serially
+    this returns N times None, i.e. the samples are drawn from the global
+    numpy random state. Otherwise each sample gets its own generator
+    spawned from a SeedSequence, such that the samples do not depend on
+    how they are distributed over processes.
+    """
+    if random_state is None and n_jobs == 1:
+        return [None] * N
+    if not isinstance(random_state, np.random.SeedSequence):
+        random_state = np.random.SeedSequence(random_state)
+    return [np.random.default_rng(seed) for seed in random_state.spawn(N)]
+
+
+def _map_samples(sample_fun, args, n_jobs=1):
+    """ applies sample_fun to each element of args, serially with a
+    progress bar or in chunks on a pool of n_jobs processes """
+    if n_jobs == 1:
+        return [sample_fun(arg) for arg in tqdm.tqdm(args)]
+    chunks = np.array_split(np.arange(len(args)),
+                            4 * effective_n_jobs(n_jobs))
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_map_chunk)(sample_fun, [args[i] for i in chunk])
+        for chunk in chunks if len(chunk) > 0)
+    return [result for chunk in results for result in chunk]
+
+
+def _map_chunk(sample_fun, args):
+    """ applies sample_fun to a chunk of args in a worker process """
+    return [sample_fun(arg) for arg in args]
+
+
+def _dual_bootstrap_sample(rng, models, data, method, fitter,
+                           k_pattern, k_rdm, n_cv,
+                           pattern_descriptor, rdm_descriptor):
+    """ evaluates one bootstrap sample for eval_dual_bootstrap """
+    evaluations = np.zeros((len(models), k_pattern * k_rdm, n_cv, 3))
+    noise_ceil = np.zeros((2, n_cv, 3))
+    rdm_idx, pattern_idx = bootstrap_sample_indices(
+        data, 1, rdm_descriptor=rdm_descriptor,
+        pattern_descriptor=pattern_descriptor, rng=rng)
+    rdm_idx = rdm_idx[0]
+    pattern_idx = pattern_idx[0]
+    # the sample over both dimensions is the rdm sample subsampled further
+    sample_rdm = data.subsample(rdm_descriptor, rdm_idx)
+    sample = sample_rdm.subsample_pattern(pattern_descriptor, pattern_idx)
+    sample_pattern = data.subsample_pattern(
+        pattern_descriptor, pattern_idx)
+    if len(np.unique(rdm_idx)) >= k_rdm \
+       and len(np.unique(pattern_idx)) >= 3 * k_pattern:
+        for i_rep in range(n_cv):
+            evals, cv_nc = _internal_cv(
+                models, sample,
+                pattern_descriptor, rdm_descriptor, pattern_idx,
+                k_pattern, k_rdm,
+                method, fitter, rng=rng)
+            noise_ceil[:, i_rep, 0] = cv_nc
+            evaluations[:, :, i_rep, 0] = evals[0]
+            evals, cv_nc = _internal_cv(
+                models, sample_rdm,
+                pattern_descriptor, rdm_descriptor,
+                np.unique(data.pattern_descriptors[pattern_descriptor]),
+                k_pattern, k_rdm,
+                method, fitter, rng=rng)
+            noise_ceil[:, i_rep, 1] = cv_nc
+            evaluations[:, :, i_rep, 1] = evals[0]
+            evals, cv_nc = _internal_cv(
+                models, sample_pattern,
+                pattern_descriptor, rdm_descriptor, pattern_idx,
+                k_pattern, k_rdm,
+                method, fitter, rng=rng)
+            noise_ceil[:, i_rep, 2] = cv_nc
+            evaluations[:, :, i_rep, 2] = evals[0]
+    else:  # sample does not allow desired crossvalidation
+        evaluations[:] = np.nan
+        noise_ceil[:] = np.nan
+    return evaluations, noise_ceil
+
+
+def _draw_sample(data, rdm_descriptor, pattern_descriptor, boot_type, rng):
+    """ draws one bootstrap sample along the dimensions given by boot_type
+    """
+    if boot_type == 'both':
+        sample, rdm_idx, pattern_idx = bootstrap_sample(
+            data,
+            rdm_descriptor=rdm_descriptor,
+            pattern_descriptor=pattern_descriptor,
+            rng=rng)
+    elif boot_type == 'pattern':
+        sample, pattern_idx = bootstrap_sample_pattern(
+            data,
+            pattern_descriptor=pattern_descriptor,
+            rng=rng)
+        rdm_idx = np.unique(data.rdm_descriptors[rdm_descriptor])
+    elif boot_type == 'rdm':
+        sample, rdm_idx = bootstrap_sample_rdm(
+            data,
+            rdm_descriptor=rdm_descriptor,
+            rng=rng)
+        pattern_idx = np.unique(
+            data.pattern_descriptors[pattern_descriptor])
+    else:
+        raise ValueError('boot_type not understood')
+    return sample, rdm_idx, pattern_idx
+
+
+def _bootstrap_crossval_sample(rng, models, data, method, fitter,
+                               k_pattern, k_rdm, n_cv,
+                               pattern_descriptor, rdm_descriptor,
+                               boot_type):
+    """ evaluates one bootstrap sample for bootstrap_crossval """
+    evaluations = np.empty((len(models), k_pattern * k_rdm, n_cv))
+    noise_ceil = np.empty((2, n_cv))
+    sample, rdm_idx, pattern_idx = _draw_sample(
+        data, rdm_descriptor, pattern_descriptor, boot_type, rng)
+    if len(np.unique(rdm_idx)) >= k_rdm \
+       and len(np.unique(pattern_idx)) >= 3 * k_pattern:
+        for i_rep in range(n_cv):
+            evals, cv_nc = _internal_cv(
+                models, sample,
+                pattern_descriptor, rdm_descriptor, pattern_idx,
+                k_pattern, k_rdm,
+                method, fitter, rng=rng)
+            noise_ceil[:, i_rep] = cv_nc
+            evaluations[:, :, i_rep] = evals[0]
+    else:  # sample does not allow desired crossvalidation
+        evaluations[:] = np.nan
+        noise_ceil[:] = np.nan
+    return evaluations, noise_ceil
+
+
+def _dual_bootstrap_random_sample(rng, models, data, method, fitter,
+                                  n_pattern, n_rdm, n_cv,
+                                  pattern_descriptor, rdm_descriptor,
+                                  boot_type):
+    """ evaluates one bootstrap sample for eval_dual_bootstrap_random """
+    evaluations = np.zeros((len(models), n_cv))
+    noise_ceil = np.zeros((2, n_cv))
+    sample, rdm_idx, pattern_idx = _draw_sample(
+        data, rdm_descriptor, pattern_descriptor, boot_type, rng)
+    if len(np.unique(rdm_idx)) > n_rdm \
+       and len(np.unique(pattern_idx)) >= 3 + n_pattern:
+        train_set, test_set, ceil_set = sets_random(
+            sample,
+            pattern_descriptor=pattern_descriptor,
+            rdm_descriptor=rdm_descriptor,
+            n_pattern=n_pattern, n_rdm=n_rdm, n_cv=n_cv, rng=rng)
+        if n_rdm > 0 or n_pattern > 0:
+            nc = cv_noise_ceiling(
+                sample, ceil_set, test_set,
+                method=method,
+                pattern_descriptor=pattern_descriptor)
+        else:
+            nc = boot_noise_ceiling(
+                sample,
+                method=method,
+                rdm_descriptor=rdm_descriptor)
+        noise_ceil[:] = nc
+        for test_s in test_set:
+            test_s[1] = _concat_sampling(pattern_idx, test_s[1])
+        for train_s in train_set:
+            train_s[1] = _concat_sampling(pattern_idx, train_s[1])
+        cv_result = crossval(
+            models, sample,
+            train_set, test_set,
+            method=method, fitter=fitter,
+            pattern_descriptor=pattern_descriptor,
+            calc_noise_ceil=False)
+        evaluations[:] = cv_result.evaluations[0]
+    else:  # sample does not allow desired crossvalidation
+        evaluations[:] = np.nan
+        noise_ceil[:] = np.nan
+    return evaluations, noise_ceil
+
+
 def _concat_sampling(sample1, sample2):
     """ computes an index vector for the sequential sampling with sample1
     and sample2
@@ -770,13 +1043,13 @@ def _concat_sampling(sample1, sample2):
 def _internal_cv(models, sample,
                  pattern_descriptor, rdm_descriptor, pattern_idx,
                  k_pattern, k_rdm,
-                 method, fitter):
+                 method, fitter, rng=None):
     """ runs a crossvalidation for use in bootstrap"""
     train_set, test_set, ceil_set = sets_k_fold(
         sample,
         pattern_descriptor=pattern_descriptor,
         rdm_descriptor=rdm_descriptor,
-        k_pattern=k_pattern, k_rdm=k_rdm, random=True)
+        k_pattern=k_pattern, k_rdm=k_rdm, random=True, rng=rng)
     if k_rdm > 1 or k_pattern > 1:
         nc = cv_noise_ceiling(
             sample, ceil_set, test_set,
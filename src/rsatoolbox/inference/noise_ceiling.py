@@ -6,8 +6,9 @@ calculation of noise ceilings
 
 import numpy as np
 from rsatoolbox.util.inference_util import pool_rdm
+from rsatoolbox.util.inference_util import _pool_rdm_vectors
+from rsatoolbox.util.inference_util import _pool_transform
 from rsatoolbox.rdm import compare
-from .crossvalsets import sets_leave_one_out_rdm
 
 
 def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
@@ -35,15 +36,15 @@ def cv_noise_ceiling(rdms, ceil_set, test_set, method='cosine',
         'train_set and test_set must have the same length'
     noise_min = []
     noise_max = []
+    pred_all = pool_rdm(rdms, method=method)
     for i in range(len(ceil_set)):
         train = ceil_set[i]
         test = test_set[i]
         pred_train = pool_rdm(train[0], method=method)
         pred_train = pred_train.subsample_pattern(by=pattern_descriptor,
                                                   value=test[1])
-        pred_test = pool_rdm(rdms, method=method)
-        pred_test = pred_test.subsample_pattern(by=pattern_descriptor,
-                                                value=test[1])
+        pred_test = pred_all.subsample_pattern(by=pattern_descriptor,
+                                               value=test[1])
         noise_min.append(np.mean(compare(pred_train, test[0], method)))
         noise_max.append(np.mean(compare(pred_test, test[0], method)))
     noise_min = np.mean(np.array(noise_min))
@@ -63,16 +64,122 @@ def boot_noise_ceiling(rdms, method='cosine', rdm_descriptor='index'):
         list: [lower nc-bound, upper nc-bound]
 
     """
-    _, test_set, ceil_set = sets_leave_one_out_rdm(rdms, rdm_descriptor)
-    pred_test = pool_rdm(rdms, method=method)
+    return boot_noise_ceiling_vectors(
+        rdms.get_vectors(), rdms.rdm_descriptors[rdm_descriptor],
+        method=method)
+
+
+def boot_noise_ceiling_vectors(rdm_vectors, rdm_groups, method='cosine',
+                               transformed=None):
+    """ calculates the leave one out noise ceiling directly on RDM vectors
+
+    This computes the same values as boot_noise_ceiling for an RDMs object
+    with these vectors and rdm_descriptor values, without constructing
+    RDMs objects for the training and test sets. The left out predictions
+    are obtained from the sum over all normalized RDMs minus the sum over
+    the left out group, such that all bounds are computed in one pass over
+    the vectors. For 'cosine' and 'corr' the comparisons are vectorized as
+    well.
+
+    Args:
+        rdm_vectors(numpy.ndarray): RDM vectors (n_rdm x n_dist)
+        rdm_groups(numpy.ndarray): rdm_descriptor value for each RDM
+        method(string): comparison method to use
+        transformed(numpy.ndarray): optional, the rdm_vectors normalized
+            by the pooling transform for method, if these are already
+            available, e.g. from a larger set of RDMs
+
+    Returns:
+        list: [lower nc-bound, upper nc-bound]
+
+    """
+    rdm_vectors = np.asarray(rdm_vectors)
+    rdm_groups = np.asarray(rdm_groups)
+    groups, group_idx = np.unique(rdm_groups, return_inverse=True)
+    valid = ~np.isnan(rdm_vectors[0])
+    if np.any(np.isnan(rdm_vectors[:, valid])):
+        # differing nan patterns are pooled based on the first RDM
+        # which the leave one out sums cannot reproduce
+        return _boot_noise_ceiling_pooled(rdm_vectors, rdm_groups, method)
+    if transformed is None:
+        vectors = _pool_transform(rdm_vectors[:, valid], method)
+    else:
+        vectors = transformed[:, valid]
+    n_group = len(groups)
+    if n_group > 1:
+        indicator = np.zeros((n_group, rdm_vectors.shape[0]))
+        indicator[group_idx, np.arange(rdm_vectors.shape[0])] = 1
+        group_n = indicator.sum(axis=1, keepdims=True)
+        group_sum = indicator @ vectors
+        total = group_sum.sum(axis=0, keepdims=True)
+        pred_train = (total - group_sum) / (len(vectors) - group_n)
+        pred_test = total / len(vectors)
+    else:
+        pred_train = pred_test = np.mean(vectors, axis=0, keepdims=True)
+    if method in ('corr', 'corr_cov'):
+        pred_train = pred_train - np.min(pred_train, axis=1, keepdims=True)
+        pred_test = pred_test - np.min(pred_test)
+    if method in ('cosine', 'corr'):
+        # each RDM is compared only to the prediction of its own fold
+        sim_min = _rowwise_similarity(pred_train[group_idx], vectors, method)
+        sim_max = _rowwise_similarity(pred_test, vectors, method)
+        group_n = np.bincount(group_idx)
+        noise_min = np.bincount(group_idx, sim_min) / group_n
+        noise_max = np.bincount(group_idx, sim_max) / group_n
+    else:
+        # comparisons need the nan entries to identify the conditions
+        pred_train = _fill_nan(pred_train, valid)
+        pred_test = _fill_nan(pred_test, valid)
+        noise_min = np.empty(n_group)
+        noise_max = np.empty(n_group)
+        for i_group in range(n_group):
+            test = rdm_vectors[group_idx == i_group]
+            noise_min[i_group] = np.mean(
+                compare(pred_train[i_group], test, method))
+            noise_max[i_group] = np.mean(compare(pred_test, test, method))
+    return np.mean(noise_min), np.mean(noise_max)
+
+
+def _boot_noise_ceiling_pooled(rdm_vectors, rdm_groups, method='cosine'):
+    """ boot_noise_ceiling_vectors by pooling each training set separately,
+    which is required if the RDMs have different nan entries
+    """
+    groups = np.unique(rdm_groups)
+    pred_test = _pool_rdm_vectors(rdm_vectors, method=method)
+    if len(groups) > 1:
+        sets = [rdm_groups == group for group in groups]
+        sets = [(rdm_vectors[~test], rdm_vectors[test]) for test in sets]
+    else:
+        sets = [(rdm_vectors, rdm_vectors)]
     noise_min = []
     noise_max = []
-    for i in range(len(ceil_set)):
-        train = ceil_set[i]
-        test = test_set[i]
-        pred_train = pool_rdm(train[0], method=method)
-        noise_min.append(np.mean(compare(pred_train, test[0], method)))
-        noise_max.append(np.mean(compare(pred_test, test[0], method)))
+    for train, test in sets:
+        pred_train = _pool_rdm_vectors(train, method=method)
+        noise_min.append(np.mean(compare(pred_train, test, method)))
+        noise_max.append(np.mean(compare(pred_test, test, method)))
     noise_min = np.mean(np.array(noise_min))
     noise_max = np.mean(np.array(noise_max))
     return noise_min, noise_max
+
+
+def _fill_nan(vectors, valid):
+    """ places vectors into the valid columns of an array of nans """
+    filled = np.full((vectors.shape[0], len(valid)), np.nan)
+    filled[:, valid] = vectors
+    return filled
+
+
+def _rowwise_similarity(pred, vectors, method='cosine'):
+    """ cosine or correlation of each row of vectors with the matching row
+    of pred, which is broadcast if it has a single row
+    """
+    if method == 'corr':
+        pred = pred - np.mean(pred, axis=1, keepdims=True)
+        vectors = vectors - np.mean(vectors, axis=1, keepdims=True)
+    norm = np.sqrt(np.einsum('ij,ij->i', pred, pred)) \
+        * np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+    inner = np.einsum('ij,ij->i', np.broadcast_to(pred, vectors.shape),
+                      vectors)
+    sim = np.zeros(len(vectors))
+    np.divide(inner, norm, out=sim, where=norm > 0)
+    return sim
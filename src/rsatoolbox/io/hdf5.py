@@ -18,14 +18,17 @@ def write_dict_hdf5(fhandle: Union[str, IO], dictionary: Dict) -> None:
     a hdf5 file
 
     Args:
-        file: a filename or opened writable file
+        file: a filename, an opened writable file or an h5py group
         dictionary(dict): the dict to be saved
 
     """
-    if isinstance(fhandle, str):
-        if os.path.exists(fhandle):
-            raise ValueError('File already exists!')
-    file = File(fhandle, 'a')
+    if isinstance(fhandle, Group):
+        file = fhandle
+    else:
+        if isinstance(fhandle, str):
+            if os.path.exists(fhandle):
+                raise ValueError('File already exists!')
+        file = File(fhandle, 'a')
     file.attrs['rsatoolbox_version'] = version('rsatoolbox')
     _write_to_group(file, dictionary)
 
@@ -82,28 +85,33 @@ def _write_list(group: Group, key: str, value: List) -> None:
             l_group[str(i)] = v
 
 
-def read_dict_hdf5(fhandle: Union[str, IO]) -> Dict:
+def read_dict_hdf5(fhandle: Union[str, IO], lazy_keys=()) -> Dict:
     """ writes a nested dictionary containing strings & arrays as data into
     a hdf5 file
 
     Args:
         file: a filename or opened readable file
+        lazy_keys: top level keys whose arrays are returned as h5py
+            datasets, which are read only when needed. The file stays open
+            as long as these are referenced.
 
     Returns:
         dictionary(dict): the loaded dict
 
     """
     file = File(fhandle, 'r')
-    return _read_group(file)
+    return _read_group(file, lazy_keys)
 
 
-def _read_group(group: Group) -> Dict:
+def _read_group(group: Group, lazy_keys=()) -> Dict:
     """ reads a group from a hdf5 file into a dict, which allows recursion"""
     dictionary = {}
     for key in group.keys():
         sub_val = group[key]
         if isinstance(sub_val, Group):
             dictionary[key] = _read_group(sub_val)
+        elif key in lazy_keys:
+            dictionary[key] = sub_val
         elif sub_val.shape is None:
             dictionary[key] = None
         else:
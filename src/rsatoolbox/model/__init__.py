@@ -8,3 +8,6 @@ from .model import model_from_dict
 from .model_family import ModelFamily
 from .fitter import fit_mock, fit_optimize, fit_select, fit_interpolate
 from .fitter import fit_regress, fit_regress_nn
+from .fitter import fit_optimize_analytic, fit_optimize_positive_analytic
+from .fitter import fit_interpolate_analytic
+from .fitter import Fitter, fit_batch
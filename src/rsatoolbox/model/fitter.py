@@ -6,9 +6,9 @@ Parameter fitting methods for models
 
 import numpy as np
 import scipy.optimize as opt
-import scipy.sparse
+import scipy.sparse.linalg
 from rsatoolbox.rdm import compare
-from rsatoolbox.util.matrix import get_v
+from rsatoolbox.util.matrix import get_cov_operator
 from rsatoolbox.util.pooling import pool_rdm
 from rsatoolbox.util.rdm_utils import _parse_nan_vectors
 
@@ -270,6 +270,182 @@ def fit_interpolate(model, data, method='cosine', pattern_idx=None,
     return theta
 
 
+def fit_optimize_analytic(
+        model, data, method='cosine', pattern_idx=None,
+        pattern_descriptor=None, sigma_k=None, ridge_weight=0,
+        normalize=True):
+    """
+    fitting theta using optimization with analytic gradients
+    allowed for ModelWeighted and ModelInterpolate
+
+    Minimizes the same loss as fit_optimize, but computes the loss and its
+    gradient from the inner products between the model RDMs and the
+    data RDMs, which are computed only once. This avoids constructing
+    and comparing a predicted RDMs object for each evaluation and
+    the finite difference approximation of the gradient.
+    Works for the methods 'cosine', 'corr', 'cosine_cov' and 'corr_cov'.
+
+    Args:
+        model(Model): the model to be fit
+        data(rsatoolbox.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        sigma_k(matrix): pattern-covariance matrix
+            used only for whitened distances (ending in _cov)
+            to compute the covariance matrix for rdms
+        ridge_weight(float): weight for a ridge regularisation
+        normalize(bool): whether to normalize the theta vector
+            default = True
+            If true, theta is normalized to norm 1.
+            This is sensible for many models where the norm
+            of theta does not vary the loss.
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+
+    """
+    loss = _ProjectedLoss(model, data, method=method,
+                          pattern_idx=pattern_idx,
+                          pattern_descriptor=pattern_descriptor,
+                          sigma_k=sigma_k, ridge_weight=ridge_weight)
+    thetas = []
+    losses = []
+    for _ in range(2 * model.n_param):
+        theta0 = np.random.rand(model.n_param)
+        theta = opt.minimize(
+            loss,
+            theta0,
+            method='BFGS',
+            jac=True,
+            tol=0.000001
+        )
+        thetas.append(theta.x)
+        losses.append(theta.fun)
+    theta = thetas[np.argmin(losses)]
+    return _normalize_theta(theta, normalize)
+
+
+def fit_optimize_positive_analytic(
+        model, data, method='cosine', pattern_idx=None,
+        pattern_descriptor=None, sigma_k=None, ridge_weight=0,
+        normalize=True):
+    """
+    fitting theta using optimization with analytic gradients enforcing
+    positive weights
+    allowed for ModelWeighted and ModelInterpolate
+
+    Analytic gradient version of fit_optimize_positive, see
+    fit_optimize_analytic.
+
+    Args:
+        model(Model): the model to be fit
+        data(rsatoolbox.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        sigma_k(matrix): pattern-covariance matrix
+            used only for whitened distances (ending in _cov)
+            to compute the covariance matrix for rdms
+        ridge_weight(float): weight for a ridge regularisation
+        normalize(bool): whether to normalize the theta vector
+            default = True
+            If true, theta is normalized to norm 1.
+            This is sensible for many models where the norm
+            of theta does not vary the loss.
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+
+    """
+    loss = _ProjectedLoss(model, data, method=method,
+                          pattern_idx=pattern_idx,
+                          pattern_descriptor=pattern_descriptor,
+                          sigma_k=sigma_k, ridge_weight=ridge_weight)
+
+    def _loss_opt(theta):
+        value, grad = loss(theta ** 2)
+        return value, 2 * theta * grad
+    theta0s = [np.random.rand(model.n_param)]
+    for i in range(model.n_param):
+        theta0 = np.ones(model.n_param) * 0.001
+        theta0[i] = 1
+        theta0s.append(theta0)
+    thetas = [np.zeros(model.n_param)]
+    losses = [loss(thetas[0])[0]]
+    for theta0 in theta0s:
+        theta = opt.minimize(
+            fun=_loss_opt,
+            x0=theta0,
+            method='BFGS',
+            jac=True,
+            tol=0.000001
+        )
+        thetas.append(theta.x)
+        losses.append(theta.fun)
+    theta = thetas[np.argmin(losses)] ** 2
+    return _normalize_theta(theta, normalize)
+
+
+def fit_interpolate_analytic(model, data, method='cosine', pattern_idx=None,
+                             pattern_descriptor=None, sigma_k=None):
+    """
+    fitting theta for interpolation models in closed form
+    allowed for ModelInterpolate only
+
+    Drop-in replacement for fit_interpolate. As the evaluation is
+    invariant to the scale of the prediction, the best interpolation
+    between two neighboring rdms is either the best non-negative
+    combination of the two, which is computed from the inner products
+    between the model and data RDMs (see fit_optimize_analytic),
+    or one of the two rdms.
+
+    Args:
+        model(Model): the model to be fit
+        data(rsatoolbox.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        sigma_k(matrix): pattern-covariance matrix
+            used only for whitened distances (ending in _cov)
+            to compute the covariance matrix for rdms
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+
+    """
+    loss = _ProjectedLoss(model, data, method=method,
+                          pattern_idx=pattern_idx,
+                          pattern_descriptor=pattern_descriptor,
+                          sigma_k=sigma_k)
+    best_loss = np.inf
+    theta = np.zeros(model.n_rdm)
+    for i_pair in range(model.n_rdm - 1):
+        pair = [i_pair, i_pair + 1]
+        weights = [0, 1]
+        try:
+            w = np.linalg.solve(loss.gram[np.ix_(pair, pair)],
+                                loss.projection[pair])
+        except np.linalg.LinAlgError:
+            w = np.zeros(2)
+        if np.all(w >= 0) and np.sum(w) > 0:
+            weights.append(w[0] / np.sum(w))
+        for w in weights:
+            theta_pair = np.zeros(model.n_rdm)
+            theta_pair[pair] = [w, 1 - w]
+            loss_pair = loss(theta_pair)[0]
+            if loss_pair < best_loss:
+                best_loss = loss_pair
+                theta = theta_pair
+    return theta
+
+
 def fit_regress(model, data, method='cosine', pattern_idx=None,
                 pattern_descriptor=None, ridge_weight=0, sigma_k=None,
                 normalize=True):
@@ -307,46 +483,11 @@ def fit_regress(model, data, method='cosine', pattern_idx=None,
         numpy.ndarray: theta, parameter vector for the model
 
     """
-    if not (pattern_idx is None or pattern_descriptor is None):
-        pred = model.rdm_obj.subsample_pattern(pattern_descriptor, pattern_idx)
-    else:
-        pred = model.rdm_obj
-    vectors = pred.get_vectors()
-    data_mean = pool_rdm(data, method=method)
-    y = data_mean.get_vectors()
-    vectors, y, nan_idx = _parse_nan_vectors(vectors, y)
-    # Normalizations
-    if method == 'cosine':
-        v = None
-    elif method == 'corr':
-        vectors = vectors - np.mean(vectors, 1, keepdims=True)
-        v = None
-    elif method == 'cosine_cov':
-        v = get_v(pred.n_cond, sigma_k)
-        v = v[nan_idx[0]][:, nan_idx[0]]
-    elif method == 'corr_cov':
-        vectors = vectors - np.mean(vectors, 1, keepdims=True)
-        y = y - np.mean(y)
-        v = get_v(pred.n_cond, sigma_k)
-        v = v[nan_idx[0]][:, nan_idx[0]]
-    else:
-        raise ValueError('method argument invalid')
-    if v is None:
-        X = vectors @ vectors.T + ridge_weight * np.eye(vectors.shape[0])
-        y = vectors @ y.T
-    else:
-        v_inv_x = np.array([scipy.sparse.linalg.cg(v, vectors[i],
-                                                   atol=10 ** -9)[0]
-                            for i in range(vectors.shape[0])])
-        y = v_inv_x @ y.T
-        X = vectors @ v_inv_x.T + ridge_weight * np.eye(vectors.shape[0])
+    pred = _model_rdms(model, pattern_idx, pattern_descriptor)
+    vectors, y, v = _regress_system(pred, data, method, sigma_k)
+    X, y = _normal_equations(vectors, y, v, ridge_weight)
     theta = np.linalg.solve(X, y)
-    if not normalize:
-        return theta.flatten()
-    norm = np.sum(theta ** 2)
-    if norm == 0:
-        return theta.flatten()
-    return theta.flatten() / np.sqrt(np.sum(theta ** 2))
+    return _normalize_theta(theta, normalize)
 
 
 def fit_regress_nn(model, data, method='cosine', pattern_idx=None,
@@ -386,10 +527,156 @@ def fit_regress_nn(model, data, method='cosine', pattern_idx=None,
         numpy.ndarray: theta, parameter vector for the model
 
     """
+    pred = _model_rdms(model, pattern_idx, pattern_descriptor)
+    vectors, y, v = _regress_system(pred, data, method, sigma_k)
+    X, y = _normal_equations(vectors, y, v, ridge_weight)
+    theta = _nn_least_squares_batch(X, y.T)[0]
+    return _normalize_theta(theta, normalize)
+
+
+def fit_batch(fitter, model, train_set, method='cosine',
+              pattern_descriptor=None, sigma_k=None):
+    """ fits a model to several training sets at once
+
+    This is the batched version of the fitting functions, which is used
+    by the crossvalidation routines. For fit_regress, fit_regress_nn and
+    fit_select (also wrapped into a Fitter object) the parts of the
+    problem which depend only on the model and the sampled patterns are
+    computed once per pattern set and the resulting linear problems
+    are solved together. All other fitting functions are simply called
+    once per training set.
+
+    Args:
+        fitter(function or Fitter): the fitting function
+        model(Model): the model to be fit
+        train_set(list): training sets as 2-tuples of
+            (rsatoolbox.rdm.RDMs, pattern_idx) as generated by the
+            functions in rsatoolbox.inference.crossvalsets
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        sigma_k(matrix): pattern-covariance matrix
+            used only for whitened distances (ending in _cov)
+            to compute the covariance matrix for rdms
+
+    Returns:
+        numpy.ndarray: thetas, one parameter vector per training set
+
+    """
+    fit_fun = fitter
+    kwargs = {}
+    if isinstance(fitter, Fitter):
+        fit_fun = fitter.fit_fun
+        kwargs = fitter.kwargs
+    call_kwargs = {'method': method, 'pattern_descriptor': pattern_descriptor}
+    if sigma_k is not None:
+        call_kwargs['sigma_k'] = sigma_k
+    batch_fun = _BATCH_FITTERS.get(fit_fun)
+    if batch_fun is None:
+        return np.array([
+            fitter(model, train[0], pattern_idx=train[1], **call_kwargs)
+            for train in train_set])
+    return batch_fun(model, train_set, **call_kwargs, **kwargs)
+
+
+def _fit_regress_batch(model, train_set, method='cosine',
+                       pattern_descriptor=None, ridge_weight=0, sigma_k=None,
+                       normalize=True):
+    """ fit_regress for several training sets, see fit_batch """
+    X, y = _normal_equations_batch(model, train_set, method,
+                                   pattern_descriptor, ridge_weight, sigma_k)
+    thetas = np.linalg.solve(X, y[..., np.newaxis])[..., 0]
+    return np.array([_normalize_theta(theta, normalize) for theta in thetas])
+
+
+def _fit_regress_nn_batch(model, train_set, method='cosine',
+                          pattern_descriptor=None, ridge_weight=0,
+                          sigma_k=None, normalize=True):
+    """ fit_regress_nn for several training sets, see fit_batch """
+    X, y = _normal_equations_batch(model, train_set, method,
+                                   pattern_descriptor, ridge_weight, sigma_k)
+    thetas = _nn_least_squares_batch(X, y)
+    return np.array([_normalize_theta(theta, normalize) for theta in thetas])
+
+
+def _normal_equations_batch(model, train_set, method='cosine',
+                            pattern_descriptor=None, ridge_weight=0,
+                            sigma_k=None):
+    """ stacked normal equations of the regressions for several training
+    sets. The left hand side and the projection of the target are
+    computed only once for each set of sampled patterns.
+
+    Returns:
+        X(numpy.ndarray): left hand sides (n_set x n_param x n_param)
+        y(numpy.ndarray): right hand sides (n_set x n_param)
+    """
+    preds = {}
+    designs = {}
+    Xs = []
+    ys = []
+    for data, pattern_idx in train_set:
+        key = _pattern_key(pattern_idx, pattern_descriptor)
+        if key not in preds:
+            preds[key] = _model_rdms(model, pattern_idx, pattern_descriptor)
+        vectors, y, v = _regress_system(preds[key], data, method, sigma_k)
+        if key not in designs:
+            designs[key] = _design_matrix(vectors, v, ridge_weight)
+        X, proj = designs[key]
+        Xs.append(X)
+        ys.append(proj @ y[0])
+    return np.array(Xs), np.array(ys)
+
+
+def _fit_select_batch(model, train_set, method='cosine',
+                      pattern_descriptor=None, sigma_k=None):
+    """ fit_select for several training sets, see fit_batch
+
+    All rdms of the model are compared to the data in one call.
+    """
+    preds = {}
+    thetas = []
+    for data, pattern_idx in train_set:
+        key = _pattern_key(pattern_idx, pattern_descriptor)
+        if key not in preds:
+            preds[key] = _model_rdms(model, pattern_idx, pattern_descriptor)
+        evaluations = np.mean(
+            compare(preds[key], data, method=method, sigma_k=sigma_k), axis=1)
+        thetas.append(np.argmax(evaluations))
+    return np.array(thetas)
+
+
+_BATCH_FITTERS = {
+    fit_regress: _fit_regress_batch,
+    fit_regress_nn: _fit_regress_nn_batch,
+    fit_select: _fit_select_batch,
+}
+
+
+def _model_rdms(model, pattern_idx=None, pattern_descriptor=None):
+    """ the rdms of the model restricted to the sampled patterns """
     if not (pattern_idx is None or pattern_descriptor is None):
-        pred = model.rdm_obj.subsample_pattern(pattern_descriptor, pattern_idx)
-    else:
-        pred = model.rdm_obj
+        return model.rdm_obj.subsample_pattern(pattern_descriptor, pattern_idx)
+    return model.rdm_obj
+
+
+def _pattern_key(pattern_idx=None, pattern_descriptor=None):
+    """ hashable identifier of the sampled patterns """
+    if pattern_idx is None or pattern_descriptor is None:
+        return None
+    return tuple(np.asarray(pattern_idx).tolist())
+
+
+def _regress_system(pred, data, method='cosine', sigma_k=None):
+    """ normalized regressors, target and rdm covariance for fit_regress
+
+    The model and pooled data rdm vectors are stripped of nan entries
+    and centered for the correlation based methods.
+
+    Returns:
+        vectors(numpy.ndarray): regressors (n_param x n_valid)
+        y(numpy.ndarray): target (1 x n_valid)
+        v(CovOperator): rdm covariance for the _cov methods, else None
+    """
     vectors = pred.get_vectors()
     data_mean = pool_rdm(data, method=method)
     y = data_mean.get_vectors()
@@ -401,22 +688,32 @@ def fit_regress_nn(model, data, method='cosine', pattern_idx=None,
         vectors = vectors - np.mean(vectors, 1, keepdims=True)
         v = None
     elif method == 'cosine_cov':
-        v = get_v(pred.n_cond, sigma_k)
-        v = v[non_nan_mask[0]][:, non_nan_mask[0]]
+        v = get_cov_operator(pred.n_cond, sigma_k, non_nan_mask[0])
     elif method == 'corr_cov':
         vectors = vectors - np.mean(vectors, 1, keepdims=True)
         y = y - np.mean(y)
-        v = get_v(pred.n_cond, sigma_k)
-        v = v[non_nan_mask[0]][:, non_nan_mask[0]]
+        v = get_cov_operator(pred.n_cond, sigma_k, non_nan_mask[0])
     else:
         raise ValueError('method argument invalid')
-    theta, _ = _nn_least_squares(vectors.T, y[0], ridge_weight=ridge_weight, V=v)
-    if not normalize:
-        return theta.flatten()
-    norm = np.sum(theta ** 2)
-    if norm == 0:
-        return theta.flatten()
-    return theta.flatten() / np.sqrt(np.sum(theta ** 2))
+    return vectors, y, v
+
+
+def _design_matrix(vectors, v=None, ridge_weight=0):
+    """ left hand side of the normal equations and the projection
+    which maps the target onto their right hand side
+    """
+    if v is None:
+        proj = vectors
+    else:
+        proj = v.solve(vectors)
+    X = vectors @ proj.T + ridge_weight * np.eye(vectors.shape[0])
+    return X, proj
+
+
+def _normal_equations(vectors, y, v=None, ridge_weight=0):
+    """ normal equations X theta = y of the (ridge) regression """
+    X, proj = _design_matrix(vectors, v, ridge_weight)
+    return X, proj @ y.T
 
 
 def _loss(theta, model, data, method='cosine', sigma_k=None,
@@ -450,6 +747,114 @@ def _loss(theta, model, data, method='cosine', sigma_k=None,
         + np.sum(theta * theta) * ridge_weight
 
 
+class _ProjectedLoss:
+    """Loss of a weighted model and its gradient computed from projections
+
+    The prediction of ModelWeighted is linear in theta, such that the
+    cosine similarity or correlation with the data RDMs only depends on
+    the inner products between the model RDMs (gram) and the mean
+    projection of the normalized data RDMs onto the model RDMs
+    (projection). These are computed once on construction and each
+    evaluation costs only O(n_param ** 2).
+    ModelInterpolate clips negative weights to 0 in its prediction. For
+    these models the loss is evaluated at the clipped theta and the
+    gradient of the similarity is 0 for negative weights.
+
+    Calling the object with theta returns the same value as `_loss`
+    together with its gradient, as expected by scipy.optimize.minimize
+    with jac=True.
+
+    Args:
+        model(Model): the model to be fit
+        data(rsatoolbox.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        sigma_k(matrix): pattern-covariance matrix
+            used only for whitened distances (ending in _cov)
+            to compute the covariance matrix for rdms
+        ridge_weight(float): weight for a ridge regularisation
+
+    """
+
+    def __init__(self, model, data, method='cosine', pattern_idx=None,
+                 pattern_descriptor=None, sigma_k=None, ridge_weight=0):
+        # imported here, because rsatoolbox.model.model imports fitters
+        from rsatoolbox.model.model import ModelInterpolate
+        self.clip = isinstance(model, ModelInterpolate)
+        if not (pattern_idx is None or pattern_descriptor is None):
+            pred = model.rdm_obj.subsample_pattern(
+                pattern_descriptor, pattern_idx)
+            vectors = pred.get_vectors()
+        else:
+            pred = model.rdm_obj
+            vectors = model.rdm
+        vectors, y, non_nan_mask = _parse_nan_vectors(
+            vectors, data.get_vectors())
+        if method in ('corr', 'corr_cov'):
+            vectors = vectors - np.mean(vectors, 1, keepdims=True)
+            y = y - np.mean(y, 1, keepdims=True)
+        if method in ('cosine_cov', 'corr_cov'):
+            cov_op = get_cov_operator(pred.n_cond, sigma_k, non_nan_mask[0])
+            if sigma_k is not None and np.ndim(sigma_k) >= 2:
+                v_inv_x = cov_op.solve(vectors)
+                v_inv_y = cov_op.solve(y)
+                gram = vectors @ v_inv_x.T
+                projection = v_inv_x @ y.T
+                y_norm = np.einsum('ij,ij->i', y, v_inv_y)
+            else:
+                vectors = cov_op.weight(vectors)
+                y = cov_op.weight(y)
+                method = 'cosine'
+        elif method not in ('cosine', 'corr'):
+            raise ValueError('method argument invalid')
+        if method in ('cosine', 'corr'):
+            gram = vectors @ vectors.T
+            projection = vectors @ y.T
+            y_norm = np.einsum('ij,ij->i', y, y)
+        y_norm = np.sqrt(np.maximum(y_norm, 0))
+        valid = y_norm > 0
+        self.gram = gram
+        self.projection = np.sum(
+            projection[:, valid] / y_norm[valid], axis=1) / len(y_norm)
+        self.ridge_weight = ridge_weight
+
+    def __call__(self, theta):
+        """ loss and gradient at theta """
+        theta = np.asarray(theta, dtype=float).reshape(-1)
+        ridge = self.ridge_weight * np.sum(theta * theta)
+        grad_ridge = 2 * self.ridge_weight * theta
+        if self.clip:
+            active = theta > 0
+            theta = np.maximum(theta, 0)
+        gram_theta = self.gram @ theta
+        norm = np.sqrt(max(theta @ gram_theta, 0))
+        if norm == 0:
+            # a zero prediction has similarity 0 to any data
+            grad = - self.projection
+        else:
+            sim = (theta @ self.projection) / norm
+            grad = - self.projection / norm + sim * gram_theta / norm ** 2
+        if self.clip:
+            grad = grad * active
+        if norm == 0:
+            return ridge, grad + grad_ridge
+        return ridge - sim, grad + grad_ridge
+
+
+def _normalize_theta(theta, normalize=True):
+    """ flattens theta and scales it to norm 1 if normalize is True """
+    theta = np.asarray(theta).flatten()
+    if not normalize:
+        return theta
+    norm = np.sum(theta ** 2)
+    if norm == 0:
+        return theta
+    return theta / np.sqrt(norm)
+
+
 def _nn_least_squares(A, y, ridge_weight=0, V=None):
     """ non-negative least squares
     essentially scipy.optimize.nnls extended to accept a ridge_regression
@@ -462,7 +867,8 @@ def _nn_least_squares(A, y, ridge_weight=0, V=None):
 
     This is an active set algorithm which is somewhat optimized by
     precomputing A^T V^-1 A and A^T V y such that during the optimization
-    only matricies of rank r need to be inverted.
+    only matricies of rank r need to be inverted. The optimization itself
+    is done by `_nn_least_squares_batch`.
 
     This is tested against the scipy solution for ridge_weight=0 and V=None.
     For other V the validation comes from fitting the same models using
@@ -470,44 +876,91 @@ def _nn_least_squares(A, y, ridge_weight=0, V=None):
     """
     assert A.shape[0] == y.shape[0]
     assert y.ndim == 1
-    x = np.zeros(A.shape[1])
-    p = np.zeros(A.shape[1], bool)
     if V is None:
         w = A.T @ y
         ATA = A.T @ A + ridge_weight * np.eye(A.shape[1])
     else:
-        V_A = np.array([scipy.sparse.linalg.cg(V, A[:, i],
-                                               atol=10 ** -9)[0]
-                        for i in range(A.shape[1])])
-        y_V_A = V_A @ y
-        w = y_V_A
-        ATA = A.T @ V_A.T + ridge_weight * np.eye(A.shape[1])
-    while np.max(w) > 100 * np.finfo(float).eps:
-        p[np.argmax(w)] = True
-        if V is None:
-            s_p = np.linalg.solve(ATA[p][:, p], A[:, p].T @ y)
-        else:
-            s_p = np.linalg.solve(ATA[p][:, p], y_V_A[p])
-        while np.any(s_p < 0):
-            alphas = x[p] / (x[p] - s_p)
-            alphas[s_p > 0] = 1
-            i_alpha = np.argmin(alphas)
-            alpha = alphas[i_alpha]
-            x[p] = x[p] + alpha * (s_p - x[p])
-            i_alpha = np.where(p)[0][i_alpha]
-            x[i_alpha] = 0
-            p[i_alpha] = False
-            if V is None:
-                s_p = np.linalg.solve(ATA[p][:, p], A[:, p].T @ y)
-            else:
-                s_p = np.linalg.solve(ATA[p][:, p], y_V_A[p])
-        x[p] = s_p
-        if V is None:
-            w = A.T @ y - ATA @ x
+        if hasattr(V, 'solve'):
+            V_A = V.solve(A.T)
+            V = V.v
+        elif scipy.sparse.issparse(V):
+            V_A = scipy.sparse.linalg.spsolve(
+                scipy.sparse.csc_matrix(V), A).reshape(A.shape).T
         else:
-            w = y_V_A - ATA @ x
+            V_A = np.linalg.solve(V, A).T
+        w = V_A @ y
+        ATA = A.T @ V_A.T + ridge_weight * np.eye(A.shape[1])
+    x = _nn_least_squares_batch(ATA, w[np.newaxis])[0]
     if V is None:
         loss = np.sum((y - A @ x) ** 2)
     else:
         loss = (y - A @ x).T @ V @ (y - A @ x)
     return x, loss
+
+
+def _nn_least_squares_batch(ATA, ATy):
+    """ non-negative least squares for many problems given by their
+    normal equations
+
+    Runs the active set algorithm of `_nn_least_squares` for all problems
+    in lockstep. The linear systems on the passive sets are solved as one
+    batch by replacing the rows and columns of the active variables by the
+    identity, such that problems with different active sets can be
+    stacked. Problems which share their design can pass a single ATA.
+
+    Args:
+        ATA(numpy.ndarray): A^T V^-1 A (+ ridge_weight * I), either one
+            (n_param x n_param) matrix or one per problem
+            (n_problem x n_param x n_param)
+        ATy(numpy.ndarray): A^T V^-1 y (n_problem x n_param)
+
+    Returns:
+        numpy.ndarray: x, the solutions (n_problem x n_param)
+
+    """
+    ATy = np.atleast_2d(ATy)
+    n_problem, n_param = ATy.shape
+    ATA = np.broadcast_to(ATA, (n_problem, n_param, n_param))
+    eye = np.eye(n_param, dtype=bool)
+    tol = 100 * np.finfo(float).eps
+
+    def _solve_passive(rows, p_rows):
+        mask = p_rows[:, :, np.newaxis] & p_rows[:, np.newaxis, :]
+        lhs = np.where(mask, ATA[rows], eye)
+        rhs = np.where(p_rows, ATy[rows], 0)
+        return np.linalg.solve(lhs, rhs[..., np.newaxis])[..., 0]
+
+    x = np.zeros((n_problem, n_param))
+    p = np.zeros((n_problem, n_param), bool)
+    w = ATy.copy()
+    running = np.arange(n_problem)
+    while len(running) > 0:
+        w_free = np.where(p[running], -np.inf, w[running])
+        running = running[np.max(w_free, axis=1) > tol]
+        if len(running) == 0:
+            break
+        w_free = np.where(p[running], -np.inf, w[running])
+        p[running, np.argmax(w_free, axis=1)] = True
+        s = _solve_passive(running, p[running])
+        negative = p[running] & (s < 0)
+        inner = np.nonzero(np.any(negative, axis=1))[0]
+        while len(inner) > 0:
+            rows = running[inner]
+            x_in = x[rows]
+            s_in = s[inner]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                alphas = np.where(negative[inner],
+                                  x_in / (x_in - s_in), np.inf)
+            i_alpha = np.argmin(alphas, axis=1)
+            alpha = alphas[np.arange(len(inner)), i_alpha]
+            x_in = x_in + alpha[:, np.newaxis] * (s_in - x_in)
+            x_in[np.arange(len(inner)), i_alpha] = 0
+            x[rows] = x_in
+            p[rows, i_alpha] = False
+            s[inner] = _solve_passive(rows, p[rows])
+            negative[inner] = p[rows] & (s[inner] < 0)
+            inner = inner[np.any(negative[inner], axis=1)]
+        x[running] = s
+        w[running] = ATy[running] - np.einsum(
+            'nij,nj->ni', ATA[running], s)
+    return x
@@ -12,11 +12,13 @@ from .transform import geotopological_transform
 from .transform import geodesic_transform
 from .calc import calc_rdm
 from .calc import calc_rdm_movie
+from .calc import calc_rdm_generalization
 from .calc import calc_rdm_euclidean
 from .calc import calc_rdm_mahalanobis
 from .calc import calc_rdm_crossnobis
 from .calc import calc_rdm_correlation
 from .calc_unbalanced import calc_rdm_unbalanced
+from .calc_stream import calc_rdm_movie_stream
 from .compare import compare
 from .compare import compare_correlation
 from .compare import compare_cosine
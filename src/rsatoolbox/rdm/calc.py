@@ -6,15 +6,23 @@ Calculation of RDMs from datasets
 """
 from __future__ import annotations
 from collections.abc import Iterable
+import os
 from copy import deepcopy
 from typing import TYPE_CHECKING, Optional, Tuple
 import numpy as np
-from rsatoolbox.rdm.rdms import concat
+from h5py import File, Group
+from rsatoolbox.rdm.rdms import RDMs, concat
 from rsatoolbox.rdm.calc_unbalanced import calc_rdm_unbalanced
-from rsatoolbox.rdm.combine import from_partials
-from rsatoolbox.data import average_dataset_by
-from rsatoolbox.util.rdm_utils import _extract_triu_
+from rsatoolbox.rdm.combine import from_partials, _merged_rdm_descriptors
+from rsatoolbox.rdm.combine import _merged_descriptor_dicts
+from rsatoolbox.data import average_dataset_by, average_by_index
+from rsatoolbox.data import TemporalDataset
+from rsatoolbox.util.data_utils import get_unique_inverse
+from rsatoolbox.util.descriptor_utils import subset_descriptor
+from rsatoolbox.util.descriptor_utils import wrap_descriptor
+from rsatoolbox.util.rdm_utils import _extract_triu_, _pair_index
 from rsatoolbox.util.build_rdm import _build_rdms
+from rsatoolbox.io.hdf5 import write_dict_hdf5
 
 if TYPE_CHECKING:
     from rsatoolbox.data.base import DatasetBase
@@ -58,6 +66,11 @@ def calc_rdm(
 
     """
     if isinstance(dataset, Iterable):
+        dataset = list(dataset)
+        rdm = _calc_rdm_batched(dataset, method, descriptor, noise,
+                                remove_mean)
+        if rdm is not None:
+            return rdm
         rdms = []
         for i_dat, ds_i in enumerate(dataset):
             if noise is None:
@@ -65,21 +78,24 @@ def calc_rdm(
                     ds_i, method=method,
                     descriptor=descriptor,
                     cv_descriptor=cv_descriptor,
-                    prior_lambda=prior_lambda, prior_weight=prior_weight))
+                    prior_lambda=prior_lambda, prior_weight=prior_weight,
+                    remove_mean=remove_mean))
             elif isinstance(noise, np.ndarray) and noise.ndim == 2:
                 rdms.append(calc_rdm(
                     ds_i, method=method,
                     descriptor=descriptor,
                     noise=noise,
                     cv_descriptor=cv_descriptor,
-                    prior_lambda=prior_lambda, prior_weight=prior_weight))
+                    prior_lambda=prior_lambda, prior_weight=prior_weight,
+                    remove_mean=remove_mean))
             elif isinstance(noise, Iterable):
                 rdms.append(calc_rdm(
                     ds_i, method=method,
                     descriptor=descriptor,
                     noise=noise[i_dat],
                     cv_descriptor=cv_descriptor,
-                    prior_lambda=prior_lambda, prior_weight=prior_weight))
+                    prior_lambda=prior_lambda, prior_weight=prior_weight,
+                    remove_mean=remove_mean))
         if descriptor is None:
             rdm = concat(rdms)
         else:
@@ -160,12 +176,16 @@ def calc_rdm_movie(
         rdm = concat(rdms)
     else:
         if bins is not None:
-            binned_data = dataset.bin_time(time_descriptor, bins)
-            splited_data = binned_data.split_time(time_descriptor)
-            time = binned_data.time_descriptors[time_descriptor]
-        else:
-            splited_data = dataset.split_time(time_descriptor)
-            time = dataset.time_descriptors[time_descriptor]
+            dataset = dataset.bin_time(time_descriptor, bins)
+        time = dataset.time_descriptors[time_descriptor]
+        if not unbalanced:
+            rdm = _calc_rdm_movie_batched(
+                dataset, method, descriptor, noise, cv_descriptor,
+                time_descriptor)
+            if rdm is not None:
+                rdm.dissimilarity_measure = method
+                return rdm
+        splited_data = dataset.split_time(time_descriptor)
 
         rdms = []
         for dat in splited_data:
@@ -191,6 +211,129 @@ def calc_rdm_movie(
     return rdm
 
 
+def calc_rdm_generalization(
+        dataset: TemporalDataset, descriptor: str,
+        noise: Optional[NDArray] = None, cv_descriptor: Optional[str] = None,
+        time_descriptor: str = 'time', filename=None,
+        chunk_size: Optional[int] = None) -> Optional[RDMs]:
+    """
+    calculates temporal generalization crossnobis RDMs for all pairs of
+    time points of a TemporalDataset
+
+    The dissimilarity for training time t1 and test time t2 is the
+    crossnobis distance between the mean over all but one fold at t1 and
+    the left out fold at t2, averaged over the left out folds.
+    For t1 == t2 this is the crossnobis RDM movie. The kernels of all
+    time pairs of a fold are computed with one matrix product per chunk
+    of training time points.
+
+    Args:
+        dataset (rsatoolbox.data.dataset.TemporalDataset):
+            The dataset the RDMs are computed from
+        descriptor (String):
+            obs_descriptor used to define the rows/columns of the RDM
+        noise (numpy.ndarray):
+            dataset.n_channel x dataset.n_channel
+            precision matrix used to calculate the RDM
+            default: identity matrix, i.e. euclidean distance
+        cv_descriptor (String):
+            obs_descriptor which determines the cross-validation folds
+        time_descriptor (String): descriptor key that points to the time
+            dimension in dataset.time_descriptors. Defaults to 'time'.
+        filename (String): if given, the RDMs are written to this new hdf5
+            file chunk by chunk instead of being returned, such that they
+            never need to fit into memory. This may also be an opened
+            writable file object or an h5py.File or h5py.Group, which
+            stays open. They can be read with rsatoolbox.rdm.load_rdm.
+        chunk_size (int): number of training time points computed at once.
+            Defaults to all time points.
+
+    Returns:
+        rsatoolbox.rdm.rdms.RDMs: RDMs object with n_time * n_time RDMs
+            for the training times time_descriptor and the test times
+            time_descriptor + '_test', or None if written to a file
+
+    """
+    noise = _check_noise(noise, dataset.n_channel)
+    if cv_descriptor is None:
+        cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
+        cv_descriptor = 'cv_desc'
+    else:
+        cv_desc = dataset.obs_descriptors[cv_descriptor]
+    folds = _crossnobis_folds(dataset.obs_descriptors[descriptor], cv_desc)
+    if folds is None:
+        raise ValueError(
+            'crossnobis requires at least two folds, which each'
+            + ' contain all conditions')
+    values, index, counts = folds
+    n_fold, n_cond = counts.shape[:2]
+    n_channel = dataset.n_channel
+    time = np.asarray(dataset.time_descriptors[time_descriptor])
+    n_time = len(time)
+    means = average_by_index(dataset.measurements, index, counts.size)
+    means = means.reshape(n_fold, n_cond, n_channel, n_time) \
+        .transpose(0, 3, 1, 2)
+    sums = counts[:, np.newaxis] * means
+    train = (sums.sum(axis=0) - sums) \
+        / (counts.sum(axis=0) - counts)[:, np.newaxis]
+    test = means if noise is None else means @ noise
+    test = test.reshape(n_fold, n_time * n_cond, n_channel) \
+        .transpose(0, 2, 1)
+    if noise is None:
+        noise = np.eye(n_channel)
+    template = _build_rdms(
+        np.zeros(n_cond * (n_cond - 1) // 2), dataset, 'crossnobis',
+        descriptor, values, noise=noise, cv=cv_descriptor)
+    descriptors = {**deepcopy(dataset.descriptors), **template.descriptors}
+    rdm_descriptors = {
+        time_descriptor: np.repeat(time, n_time),
+        time_descriptor + '_test': np.tile(time, n_time),
+        'index': np.arange(n_time * n_time)}
+    if chunk_size is None:
+        chunk_size = n_time
+    shape = (n_time * n_time, n_cond * (n_cond - 1) // 2)
+
+    def _fill(dissimilarities):
+        for t_start in range(0, n_time, chunk_size):
+            block = train[:, t_start:t_start + chunk_size]
+            n_block = block.shape[1]
+            kernel = np.matmul(block.reshape(n_fold, -1, n_channel), test)
+            kernel = kernel.reshape(
+                n_fold, n_block, n_cond, n_time, n_cond) \
+                .transpose(0, 1, 3, 2, 4)
+            vectors = np.mean(_kernel_vectors(kernel), axis=0) / n_channel
+            dissimilarities[t_start * n_time:(t_start + n_block) * n_time] \
+                = vectors.reshape(n_block * n_time, -1)
+
+    def _write(group):
+        write_dict_hdf5(group, {
+            'descriptors': descriptors,
+            'rdm_descriptors': rdm_descriptors,
+            'pattern_descriptors': template.pattern_descriptors,
+            'dissimilarity_measure': 'crossnobis'})
+        _fill(group.create_dataset('dissimilarities', shape,
+                                   dtype=np.float64))
+
+    if filename is not None:
+        if isinstance(filename, Group):
+            _write(filename)
+        else:
+            if isinstance(filename, str) and os.path.exists(filename):
+                raise ValueError('File already exists!')
+            with File(filename, 'a') as file:
+                _write(file)
+        return None
+    dissimilarities = np.empty(shape)
+    _fill(dissimilarities)
+    return RDMs(
+        dissimilarities=dissimilarities,
+        dissimilarity_measure='crossnobis',
+        descriptors=descriptors,
+        rdm_descriptors=rdm_descriptors,
+        pattern_descriptors=template.pattern_descriptors
+    )
+
+
 def calc_rdm_euclidean(
         dataset: DatasetBase,
         descriptor: Optional[str] = None,
@@ -324,12 +467,17 @@ def calc_rdm_crossnobis(dataset, descriptor, noise=None,
 
     """
     noise = _check_noise(noise, dataset.n_channel)
-    if noise is None:
-        noise = np.eye(dataset.n_channel)
     if descriptor is None:
         raise ValueError('descriptor must be a string! Crossvalidation' +
                          'requires multiple measurements to be grouped')
-    datasetCopy = deepcopy(dataset)
+    if (noise is None) or (isinstance(noise, np.ndarray) and noise.ndim == 2):
+        rdm = _calc_rdm_crossnobis_stacked(
+            dataset, descriptor, noise, cv_descriptor, remove_mean)
+        if rdm is not None:
+            return rdm
+    if noise is None:
+        noise = np.eye(dataset.n_channel)
+    datasetCopy = dataset.copy(deep=False)
     if cv_descriptor is None:
         cv_desc = _gen_default_cv_descriptor(datasetCopy, descriptor)
         datasetCopy.obs_descriptors['cv_desc'] = cv_desc
@@ -439,7 +587,7 @@ def calc_rdm_poisson_cv(dataset, descriptor=None, prior_lambda=1,
     if descriptor is None:
         raise ValueError('descriptor must be a string! Crossvalidation' +
                          'requires multiple measurements to be grouped')
-    dataset = deepcopy(dataset)
+    dataset = dataset.copy(deep=False)
     if cv_descriptor is None:
         cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
         dataset.obs_descriptors['cv_desc'] = cv_desc
@@ -466,6 +614,315 @@ def calc_rdm_poisson_cv(dataset, descriptor=None, prior_lambda=1,
     return _build_rdms(rdm, dataset, 'poisson_cv', descriptor)
 
 
+def _calc_rdm_batched(
+            datasets: list,
+            method: str,
+            descriptor: Optional[str] = None,
+            noise: Optional[NDArray] = None,
+            remove_mean: bool = False
+        ) -> Optional[RDMs]:
+    """ calc_rdm for a list of datasets which share their observations
+
+    If all datasets have the same obs_descriptors, the euclidean,
+    correlation and mahalanobis RDMs of all datasets are computed from one
+    stacked (n_set x n_obs x n_channel) array, whose channels are zero
+    padded to the largest dataset, and a single RDMs object is built.
+    Returns None if the datasets cannot be batched this way.
+    """
+    if len(datasets) < 2 \
+            or method not in ('euclidean', 'correlation', 'mahalanobis'):
+        return None
+    if method != 'mahalanobis':
+        noise = None
+    elif noise is not None and not (
+            isinstance(noise, np.ndarray) and noise.ndim == 2):
+        return None
+    first = datasets[0]
+    for ds in datasets:
+        if not (isinstance(ds.measurements, np.ndarray)
+                and ds.measurements.ndim == 2
+                and ds.n_obs == first.n_obs
+                and ds.obs_descriptors.keys() == first.obs_descriptors.keys()
+                and all(np.array_equal(np.asarray(v),
+                                       np.asarray(first.obs_descriptors[k]))
+                        for k, v in ds.obs_descriptors.items())):
+            return None
+        if noise is not None and ds.n_channel != noise.shape[0]:
+            return None
+    n_channel = np.array([ds.n_channel for ds in datasets])
+    measurements = np.zeros((len(datasets), first.n_obs, n_channel.max()))
+    for i_set, ds in enumerate(datasets):
+        measurements[i_set, :, :ds.n_channel] = ds.measurements
+    if descriptor is not None:
+        desc, cond_idx = get_unique_inverse(first.obs_descriptors[descriptor])
+        measurements = average_by_index(
+            measurements.transpose(1, 0, 2), cond_idx, len(desc)) \
+            .transpose(1, 0, 2)
+    if remove_mean or method == 'correlation':
+        valid = np.arange(measurements.shape[2]) < n_channel[:, None]
+        measurements = measurements - (
+            measurements.sum(axis=2, keepdims=True)
+            / n_channel[:, None, None])
+        measurements *= valid[:, None, :]
+    rows, cols = np.triu_indices(measurements.shape[1], 1)
+    if method == 'correlation':
+        measurements /= np.sqrt(np.einsum(
+            'sck,sck->sc', measurements, measurements))[:, :, None]
+        vectors = 1 - np.einsum(
+            'sck,sck->sc', measurements[:, rows], measurements[:, cols])
+        measure = 'correlation'
+    else:
+        if noise is None:
+            kernel = np.matmul(measurements, measurements.transpose(0, 2, 1))
+            measure = 'squared euclidean'
+        else:
+            noise = _check_noise(noise, first.n_channel)
+            kernel = np.matmul(measurements @ noise,
+                               measurements.transpose(0, 2, 1))
+            measure = 'squared mahalanobis'
+        diag = np.einsum('scc->sc', kernel)
+        vectors = (diag[:, rows] + diag[:, cols] - 2 * kernel[:, rows, cols]) \
+            / n_channel[:, None]
+    # the descriptors of each dataset are the rdm_descriptors of its RDM
+    descriptors, rdm_descriptors = _merged_descriptor_dicts(
+        [{} if noise is None else {'noise': noise}] * len(datasets),
+        [{'index': [0], **wrap_descriptor(dict(ds.descriptors))}
+         for ds in datasets],
+        [1] * len(datasets))
+    if descriptor is None:
+        pattern_descriptors = deepcopy(first.obs_descriptors)
+    else:
+        order = np.argsort(desc, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        new_rows = np.minimum(rank[rows], rank[cols])
+        new_cols = np.maximum(rank[rows], rank[cols])
+        # position of each pair in the upper triangle of the sorted RDM
+        vectors[:, _pair_index(new_rows, new_cols, len(desc))] = \
+            vectors.copy()
+        pattern_descriptors = {descriptor: list(desc[order])}
+    return RDMs(
+        dissimilarities=vectors,
+        dissimilarity_measure=measure,
+        descriptors=descriptors,
+        rdm_descriptors=rdm_descriptors,
+        pattern_descriptors=pattern_descriptors
+    )
+
+
+def _calc_rdm_movie_batched(
+            dataset: TemporalDataset,
+            method: str,
+            descriptor: Optional[str] = None,
+            noise: Optional[NDArray] = None,
+            cv_descriptor: Optional[str] = None,
+            time_descriptor: str = 'time'
+        ) -> Optional[RDMs]:
+    """ calc_rdm_movie computed for all time points at once
+
+    The condition (or fold x condition) means of all time points are
+    computed with one indicator product and the euclidean, correlation,
+    mahalanobis and crossnobis kernels of all time points are batched
+    matrix products over the time axis. The descriptors of the result are
+    taken from the RDM of the first time point, which is computed by
+    calc_rdm as usual. Returns None if the movie cannot be batched, e.g.
+    for other methods, multiple noise matrices or repeated time points.
+    """
+    if method not in ('euclidean', 'correlation', 'mahalanobis',
+                      'crossnobis'):
+        return None
+    if noise is not None and not (
+            isinstance(noise, np.ndarray) and noise.ndim == 2):
+        return None
+    time = np.asarray(dataset.time_descriptors[time_descriptor])
+    measurements = dataset.measurements
+    if len(time) < 2 or len(np.unique(time)) != len(time) \
+            or measurements.shape[2] != len(time):
+        return None
+    n_channel = measurements.shape[1]
+    if method == 'crossnobis':
+        if descriptor is None:
+            return None
+        if cv_descriptor is None:
+            cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
+        else:
+            cv_desc = dataset.obs_descriptors[cv_descriptor]
+        folds = _crossnobis_folds(dataset.obs_descriptors[descriptor],
+                                  cv_desc)
+        if folds is None:
+            return None
+        _, index, counts = folds
+        means = average_by_index(measurements, index, counts.size)
+        means = means.transpose(2, 0, 1).reshape(
+            (len(time),) + counts.shape[:2] + (n_channel,))
+        if noise is not None:
+            noise = _check_noise(noise, n_channel)
+        vectors = _crossnobis_vectors(means, counts, noise)
+    else:
+        if descriptor is not None:
+            _, cond_idx = np.unique(
+                np.asarray(dataset.obs_descriptors[descriptor]),
+                return_inverse=True)
+            cond_idx = cond_idx.reshape(-1)
+            measurements = average_by_index(measurements, cond_idx)
+        if method == 'mahalanobis' and noise is not None:
+            noise = _check_noise(noise, n_channel)
+        vectors = _movie_vectors(
+            measurements.transpose(2, 0, 1), method, noise)
+    first = TemporalDataset(
+        measurements=dataset.measurements[:, :, [0]],
+        descriptors=dataset.descriptors,
+        obs_descriptors=dataset.obs_descriptors,
+        channel_descriptors=dataset.channel_descriptors,
+        time_descriptors=subset_descriptor(dataset.time_descriptors, [0]),
+        check_dims=False)
+    template = calc_rdm(
+        first.time_as_observations(time_descriptor), method=method,
+        descriptor=descriptor, noise=noise, cv_descriptor=cv_descriptor)
+    descriptors, rdm_descriptors = _merged_rdm_descriptors(
+        [template] * len(time))
+    rdm_descriptors[time_descriptor] = dataset.time_descriptors[
+        time_descriptor]
+    return RDMs(
+        dissimilarities=vectors,
+        dissimilarity_measure=template.dissimilarity_measure,
+        descriptors=descriptors,
+        rdm_descriptors=rdm_descriptors,
+        pattern_descriptors=template.pattern_descriptors
+    )
+
+
+def _movie_vectors(means, method, noise=None) -> NDArray:
+    """ euclidean, correlation or mahalanobis RDM vectors of stacked means
+
+    Args:
+        means (numpy.ndarray): (... x n_cond x n_channel) pattern means
+        method (String): 'euclidean', 'correlation' or 'mahalanobis'
+        noise (numpy.ndarray): precision matrix used for 'mahalanobis',
+            None for the identity
+
+    Returns:
+        numpy.ndarray: (... x n_cond * (n_cond - 1) / 2) RDM vectors
+    """
+    rows, cols = np.triu_indices(means.shape[-2], 1)
+    if method == 'correlation':
+        means = means - means.mean(axis=-1, keepdims=True)
+        means /= np.sqrt(np.einsum('...k,...k->...', means, means))[..., None]
+        return 1 - np.einsum(
+            '...k,...k->...', means[..., rows, :], means[..., cols, :])
+    if method == 'mahalanobis' and noise is not None:
+        kernel = np.matmul(means @ noise, np.swapaxes(means, -1, -2))
+    else:
+        kernel = np.matmul(means, np.swapaxes(means, -1, -2))
+    diag = np.einsum('...cc->...c', kernel)
+    return (diag[..., rows] + diag[..., cols]
+            - 2 * kernel[..., rows, cols]) / means.shape[-1]
+
+
+def _calc_rdm_crossnobis_stacked(
+            dataset: DatasetBase,
+            descriptor: str,
+            noise: Optional[NDArray] = None,
+            cv_descriptor: Optional[str] = None,
+            remove_mean: bool = False
+        ) -> Optional[RDMs]:
+    """ crossnobis RDM for a single noise precision from stacked fold means
+
+    All fold means are computed at once and whitened once. The training
+    mean for each left out fold is the total sum minus the fold sum, such
+    that all train/test kernels come from one batched product. Returns None
+    if some condition is missing from some fold or there is only one fold,
+    which the fold by fold computation handles. A noise of None is treated
+    as the identity without multiplying by it.
+    """
+    if cv_descriptor is None:
+        cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
+        cv_descriptor = 'cv_desc'
+    else:
+        cv_desc = dataset.obs_descriptors[cv_descriptor]
+    folds = _crossnobis_folds(dataset.obs_descriptors[descriptor], cv_desc)
+    if folds is None:
+        return None
+    values, index, counts = folds
+    means = average_by_index(dataset.measurements, index, counts.size)
+    if remove_mean:
+        means -= means.mean(axis=1, keepdims=True)
+    means = means.reshape(counts.shape[:2] + (-1,))
+    rdm = _crossnobis_vectors(means, counts, noise)
+    if noise is None:
+        noise = np.eye(means.shape[-1])
+    return _build_rdms(
+        rdm,
+        dataset,
+        'crossnobis',
+        descriptor,
+        values,
+        noise=noise,
+        cv=cv_descriptor
+    )
+
+
+def _crossnobis_folds(desc, cv_desc):
+    """ indexes the fold x condition cells of a crossnobis computation
+
+    Returns:
+        (values, index, counts) with the sorted condition values,
+        the cell index fold * n_cond + condition of each observation and
+        the n_fold x n_cond x 1 number of observations per cell,
+        or None if some condition is missing from some fold or there is
+        only one fold
+    """
+    values, cond_idx = np.unique(np.asarray(desc), return_inverse=True)
+    folds, fold_idx = np.unique(np.asarray(cv_desc), return_inverse=True)
+    cond_idx = cond_idx.reshape(-1)
+    fold_idx = fold_idx.reshape(-1)
+    index = fold_idx * len(values) + cond_idx
+    counts = np.bincount(index, minlength=len(folds) * len(values))
+    if len(folds) < 2 or np.any(counts == 0):
+        return None
+    return values, index, counts.reshape(len(folds), len(values), 1)
+
+
+def _crossnobis_vectors(means, counts, noise=None,
+                        means_test=None) -> NDArray:
+    """ leave one fold out crossnobis RDM vectors from stacked fold means
+
+    Args:
+        means (numpy.ndarray): (... x n_fold x n_cond x n_channel) means
+        counts (numpy.ndarray): (n_fold x n_cond x 1) observation counts
+        noise (numpy.ndarray): precision matrix, None for the identity
+        means_test (numpy.ndarray): fold means the left out fold is taken
+            from, e.g. of another time point. Defaults to means.
+
+    Returns:
+        numpy.ndarray: (... x n_cond * (n_cond - 1) / 2) RDM vectors
+    """
+    if means_test is None:
+        means_test = means
+    sums = counts * means
+    total = sums.sum(axis=-3, keepdims=True)
+    if noise is None:
+        whitened = means_test
+    else:
+        whitened = means_test @ noise
+    whitened_t = np.swapaxes(whitened, -1, -2)
+    # kernel[f] = mean over all other folds @ noise @ mean of fold f
+    kernel = np.matmul(total, whitened_t) - np.matmul(sums, whitened_t)
+    kernel /= counts.sum(axis=0) - counts
+    rdms = _kernel_vectors(kernel)
+    return np.mean(rdms, axis=-2) / means.shape[-1]
+
+
+def _kernel_vectors(kernel) -> NDArray:
+    """ (x_i - x_j) @ (y_i - y_j) for all pairs i < j from the
+    (... x n_cond x n_cond) kernel x_i @ y_j
+    """
+    diag = np.einsum('...cc->...c', kernel)
+    rows, cols = np.triu_indices(kernel.shape[-1], 1)
+    return diag[..., rows] + diag[..., cols] \
+        - kernel[..., rows, cols] - kernel[..., cols, rows]
+
+
 def _calc_rdm_crossnobis_single(meas1, meas2, noise) -> NDArray:
     kernel = meas1 @ noise @ meas2.T
     rdm = np.expand_dims(np.diag(kernel), 0) + \
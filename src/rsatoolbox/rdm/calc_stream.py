@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculation of RDM movies from streams of time chunks, e.g. for long
+continuous recordings which do not fit into memory at once
+"""
+from __future__ import annotations
+from collections import deque
+from copy import deepcopy
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Iterator, Optional
+import numpy as np
+from rsatoolbox.rdm.rdms import RDMs
+from rsatoolbox.rdm.calc import _check_noise
+from rsatoolbox.rdm.calc import _crossnobis_folds, _crossnobis_vectors
+from rsatoolbox.rdm.calc import _gen_default_cv_descriptor
+from rsatoolbox.rdm.calc import _kernel_vectors, _movie_vectors
+from rsatoolbox.data import average_by_index
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+def calc_rdm_movie_stream(
+        data, obs_descriptors: dict, window: int,
+        stride: Optional[int] = None, method: str = 'euclidean',
+        descriptor: Optional[str] = None, noise: Optional[NDArray] = None,
+        cv_descriptor: Optional[str] = None, time=None,
+        time_descriptor: str = 'time', n_lag: int = 0,
+        descriptors: Optional[dict] = None,
+        chunk_size: int = 256) -> Iterator[RDMs]:
+    """
+    calculates an RDM movie from a stream of time chunks
+
+    Each chunk is reduced to per condition (for crossnobis per fold and
+    condition) means right away, such that only the means of the current
+    window are kept in memory. The RDM of each window is computed from the
+    means over the time points in the window, as calc_rdm_movie does with
+    bins. The frames are yielded as soon as their window is complete,
+    such that they can e.g. be written to disk one by one.
+
+    Args:
+        data: either an array-like (n_obs x n_channel x n_time), e.g. a
+            numpy.memmap or a h5py dataset, which is read in chunks of
+            chunk_size time points, or an iterable of
+            (n_obs x n_channel x n_chunk) arrays
+        obs_descriptors (dict): descriptors of the observations
+        window (int): number of time points per frame
+        stride (int): number of time points between the starts of
+            consecutive frames. Defaults to window, i.e. adjacent windows.
+        method (String): 'euclidean', 'correlation', 'mahalanobis' or
+            'crossnobis'
+        descriptor (String):
+            obs_descriptor used to define the rows/columns of the RDM
+        noise (numpy.ndarray):
+            n_channel x n_channel precision matrix used to calculate the RDM
+            used only for Mahalanobis and Crossnobis estimators
+        cv_descriptor (String): obs_descriptor which defines the folds
+            for crossnobis
+        time (array-like): time of each time point, defaults to the
+            index of the time point
+        time_descriptor (String): name of the rdm_descriptor for the time
+            of the frames
+        n_lag (int): number of previous frames each frame is also compared
+            to for temporal generalization. The dissimilarity of
+            two frames is (x_i - x_j) @ noise @ (y_i - y_j) / n_channel,
+            which is crossvalidated for crossnobis.
+        descriptors (dict): descriptors of the RDMs
+        chunk_size (int): number of time points read at once from an
+            array-like data
+
+    Yields:
+        rsatoolbox.rdm.rdms.RDMs: one RDMs object per frame, which
+            contains the RDM of the frame and with n_lag > 0 the
+            generalization RDMs to the previous frames, whose times are
+            saved as time_descriptor + '_ref'
+    """
+    if method not in ('euclidean', 'correlation', 'mahalanobis',
+                      'crossnobis'):
+        raise ValueError(f'method {method} is not supported for streaming')
+    if n_lag > 0 and method == 'correlation':
+        raise ValueError(
+            'temporal generalization is not defined for correlation')
+    if stride is None:
+        stride = window
+    if window < 1 or stride < 1:
+        raise ValueError('window and stride must be positive')
+    if method == 'euclidean':
+        noise = None
+    if time is not None:
+        time = np.asarray(time)
+    frame_descriptors = deepcopy(descriptors) if descriptors else {}
+    if method == 'crossnobis':
+        if descriptor is None:
+            raise ValueError('crossnobis requires a descriptor')
+        if cv_descriptor is None:
+            cv_desc = _gen_default_cv_descriptor(
+                SimpleNamespace(obs_descriptors=obs_descriptors), descriptor)
+            frame_descriptors['cv_descriptor'] = 'cv_desc'
+        else:
+            cv_desc = obs_descriptors[cv_descriptor]
+            frame_descriptors['cv_descriptor'] = cv_descriptor
+        folds = _crossnobis_folds(obs_descriptors[descriptor], cv_desc)
+        if folds is None:
+            raise ValueError(
+                'crossnobis requires at least two folds, which each'
+                + ' contain all conditions')
+        values, index, counts = folds
+        shape = counts.shape[:2]
+    elif descriptor is not None:
+        values, index = np.unique(
+            np.asarray(obs_descriptors[descriptor]), return_inverse=True)
+        index = index.reshape(-1)
+        shape = (len(values),)
+    else:
+        index = np.arange(len(next(iter(obs_descriptors.values()))))
+        shape = (len(index),)
+    if descriptor is None:
+        pattern_descriptors = obs_descriptors
+    else:
+        pattern_descriptors = {descriptor: list(values)}
+
+    def _vectors(means):
+        if method == 'crossnobis':
+            return _crossnobis_vectors(means, counts, noise)
+        return _movie_vectors(means, method, noise)
+
+    def _lag_vectors(means, means_ref):
+        if method == 'crossnobis':
+            return (_crossnobis_vectors(means, counts, noise, means_ref)
+                    + _crossnobis_vectors(means_ref, counts, noise, means)) / 2
+        if noise is None:
+            kernel = means @ means_ref.T
+        else:
+            kernel = means @ noise @ means_ref.T
+        return _kernel_vectors(kernel) / means.shape[-1]
+
+    buffer = None
+    start = 0
+    frame_start = 0
+    previous = deque(maxlen=n_lag)
+    for chunk in _time_chunks(data, chunk_size):
+        n_channel = chunk.shape[1]
+        if buffer is None:
+            buffer = np.zeros((0,) + shape + (n_channel,))
+            if noise is not None:
+                noise = _check_noise(noise, n_channel)
+                frame_descriptors['noise'] = noise
+            elif method == 'crossnobis':
+                frame_descriptors['noise'] = np.eye(n_channel)
+        means = average_by_index(chunk, index, int(np.prod(shape)))
+        means = np.moveaxis(means, -1, 0).reshape(
+            (chunk.shape[2],) + shape + (n_channel,))
+        buffer = np.concatenate((buffer, means), axis=0)
+        starts = np.arange(
+            frame_start, start + len(buffer) - window + 1, stride)
+        if len(starts) > 0:
+            cum = np.concatenate((
+                np.zeros((1,) + buffer.shape[1:]),
+                np.cumsum(buffer, axis=0)), axis=0)
+            frames = (cum[starts - start + window] - cum[starts - start]) \
+                / window
+            vectors = _vectors(frames)
+            for i_frame, frame_i in enumerate(starts):
+                if time is None:
+                    t = frame_i + (window - 1) / 2
+                else:
+                    t = np.mean(time[frame_i:frame_i + window])
+                dissimilarities = [vectors[i_frame]]
+                times_ref = [t]
+                for t_ref, means_ref in reversed(previous):
+                    dissimilarities.append(
+                        _lag_vectors(frames[i_frame], means_ref))
+                    times_ref.append(t_ref)
+                if n_lag > 0:
+                    previous.append((t, frames[i_frame]))
+                rdm_descriptors = {time_descriptor: [t] * len(times_ref)}
+                if n_lag > 0:
+                    rdm_descriptors[time_descriptor + '_ref'] = times_ref
+                yield RDMs(
+                    dissimilarities=np.array(dissimilarities),
+                    dissimilarity_measure=method,
+                    descriptors=deepcopy(frame_descriptors),
+                    rdm_descriptors=rdm_descriptors,
+                    pattern_descriptors=deepcopy(pattern_descriptors))
+            frame_start = starts[-1] + stride
+        n_drop = min(frame_start - start, len(buffer))
+        buffer = buffer[n_drop:]
+        start += n_drop
+
+
+def _time_chunks(data, chunk_size: int) -> Iterator[NDArray]:
+    """ (n_obs x n_channel x n_chunk) chunks of an array-like or an
+    iterable of chunks
+    """
+    if hasattr(data, 'shape') and len(data.shape) == 3:
+        for i_start in range(0, data.shape[2], chunk_size):
+            yield np.asarray(data[:, :, i_start:i_start + chunk_size])
+    else:
+        for chunk in data:
+            chunk = np.asarray(chunk)
+            if chunk.ndim == 2:
+                chunk = chunk[:, :, np.newaxis]
+            yield chunk
@@ -9,15 +9,18 @@ channels or numbers of measurements per dissimilarity
 from __future__ import annotations
 from typing import TYPE_CHECKING, Tuple, Union, List
 from collections.abc import Iterable
-from copy import deepcopy
+from functools import partial
+import os
 import warnings
 import numpy as np
+import scipy.sparse
+from scipy.linalg import cho_factor, LinAlgError
 from rsatoolbox.rdm.rdms import RDMs
 from rsatoolbox.rdm.rdms import concat
 from rsatoolbox.util.data_utils import get_unique_inverse
 from rsatoolbox.util.matrix import row_col_indicator_rdm
 from rsatoolbox.util.build_rdm import _build_rdms
-from rsatoolbox.cengine.similarity import calc_one, calc
+from rsatoolbox.cengine.similarity import calc_one, calc, calc_parallel
 if TYPE_CHECKING:
     from rsatoolbox.data.base import DatasetBase
     from numpy.typing import NDArray
@@ -27,7 +30,8 @@ if TYPE_CHECKING:
 def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
                         descriptor=None, noise=None, cv_descriptor=None,
                         prior_lambda=1, prior_weight=0.1,
-                        weighting='number', enforce_same=False) -> RDMs:
+                        weighting='number', enforce_same=False,
+                        engine='cython', n_threads=1) -> RDMs:
     """
     calculate a RDM from an input dataset for unbalanced datasets.
 
@@ -43,6 +47,13 @@ def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
             precision matrix used to calculate the RDM
             used only for Mahalanobis and Crossnobis estimators
             defaults to an identity matrix, i.e. euclidean distance
+        engine (String):
+            'cython' loops over all pairs of rows in compiled code,
+            'blas' computes blocks of similarities with matrix products,
+            which is much faster for many rows or channels
+        n_threads (int):
+            number of threads used by the 'cython' engine,
+            None uses all available cores
 
     Returns:
         rsatoolbox.rdm.rdms.RDMs: RDMs object with the one RDM
@@ -56,7 +67,8 @@ def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
                     dat, method=method, descriptor=descriptor,
                     cv_descriptor=cv_descriptor,
                     prior_lambda=prior_lambda, prior_weight=prior_weight,
-                    weighting=weighting, enforce_same=enforce_same))
+                    weighting=weighting, enforce_same=enforce_same,
+                    engine=engine, n_threads=n_threads))
             elif isinstance(noise, np.ndarray) and noise.ndim == 2:
                 rdms.append(calc_rdm_unbalanced(
                     dat, method=method,
@@ -64,7 +76,8 @@ def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
                     noise=noise,
                     cv_descriptor=cv_descriptor,
                     prior_lambda=prior_lambda, prior_weight=prior_weight,
-                    weighting=weighting, enforce_same=enforce_same))
+                    weighting=weighting, enforce_same=enforce_same,
+                    engine=engine, n_threads=n_threads))
             elif isinstance(noise, Iterable):
                 rdms.append(calc_rdm_unbalanced(
                     dat, method=method,
@@ -72,11 +85,12 @@ def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
                     noise=noise[i_dat],
                     cv_descriptor=cv_descriptor,
                     prior_lambda=prior_lambda, prior_weight=prior_weight,
-                    weighting=weighting, enforce_same=enforce_same))
+                    weighting=weighting, enforce_same=enforce_same,
+                    engine=engine, n_threads=n_threads))
         rdm = concat(rdms)
     else:
         if descriptor is None:
-            dataset = deepcopy(dataset)
+            dataset = dataset.copy(deep=False)
             dataset.obs_descriptors['index'] = np.arange(dataset.n_obs)
             descriptor = 'index'
         if method == 'crossnobis' or method == 'poisson_cv':
@@ -115,7 +129,17 @@ def calc_rdm_unbalanced(dataset: SingleOrMultiDataset, method='euclidean',
         else:
             weight_idx = 1
         cond_indices_int = cond_indices.astype(np.int64)
-        rdm = calc(
+        if n_threads is None:
+            n_threads = os.cpu_count() or 1
+        if engine == 'blas':
+            calc_engine = calc_blas
+        elif engine == 'cython' and n_threads == 1:
+            calc_engine = calc
+        elif engine == 'cython':
+            calc_engine = partial(calc_parallel, n_threads=n_threads)
+        else:
+            raise ValueError(f'Unknown engine: {engine}')
+        rdm = calc_engine(
             ensure_double(dataset.measurements),
             cond_indices_int,
             cv_desc_int, len(unique_cond),
@@ -187,6 +211,173 @@ def calc_one_similarity(data_i: DatasetBase, data_j: DatasetBase,
         weighting=weight_idx)
 
 
+def calc_blas(data: NDArray, desc: NDArray, cv_desc: NDArray, n: int,
+              method_idx: int, noise: NDArray | None = None,
+              prior_lambda=1, prior_weight=0.1,
+              weighting=1, crossval=0, chunk_size=1024) -> NDArray:
+    """
+    matrix product version of rsatoolbox.cengine.similarity.calc
+
+    Rows with the same pattern of valid (non-nan) channels are grouped.
+    For each pair of groups the similarities of all rows are computed as
+    one Gram block on the channels valid in both, whitened once by the
+    Cholesky factor of the noise precision for Mahalanobis distances.
+    The blocks are summed into condition pairs with sparse indicator
+    matrices. Only the symmetric part of noise is used.
+
+    Args:
+        data (numpy.ndarray): n_obs x n_channel measurements
+        desc (numpy.ndarray): condition index in [0, n-1] for each row
+        cv_desc (numpy.ndarray): rows with equal values are not compared
+            if crossval is set
+        n (int): number of conditions
+        method_idx (int): 1: euclidean, 2: correlation,
+            3: mahalanobis/crossnobis, 4: poisson/poisson_cv
+        noise (numpy.ndarray): precision for Mahalanobis/Crossnobis
+        prior_lambda (float): for poisson KL
+        prior_weight (float): for poisson KL
+        weighting (int): 0: each pair of rows has equal weight,
+            1: pairs weighted by number of valid measurements
+        crossval (int): whether rows with equal cv_desc are excluded
+        chunk_size (int): number of rows processed at once
+
+    Returns:
+        numpy.ndarray: the n self similarities followed by the
+            n * (n - 1) / 2 similarities between conditions
+
+    """
+    if (method_idx > 4) or (method_idx < 1):
+        raise ValueError('dissimilarity method not recognized!')
+    data = np.asarray(data, dtype=np.float64)
+    if noise is not None:
+        noise = np.asarray(noise)
+        noise = (noise + noise.T) / 2
+    desc = np.asarray(desc)
+    cv_desc = np.asarray(cv_desc)
+    n_obs, n_dim = data.shape
+    log_data = None
+    if method_idx == 4:
+        data = (data + prior_lambda * prior_weight) / (1 + prior_weight)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_data = np.log(data)
+    valid = ~np.isnan(data)
+    patterns, pattern_idx = np.unique(valid, axis=0, return_inverse=True)
+    pattern_idx = pattern_idx.reshape(-1)
+    groups = [np.flatnonzero(pattern_idx == i_pat)
+              for i_pat in range(len(patterns))]
+    indicator = scipy.sparse.csr_matrix(
+        (np.ones(n_obs), (desc, np.arange(n_obs))), shape=(n, n_obs))
+    values = np.zeros((n, n))
+    weights = np.zeros((n, n))
+    factors = {}
+    features = {}
+
+    def get_features(i_group, mask):
+        """ the rows of a group restricted to mask, whitened if possible """
+        key = (i_group, mask.tobytes())
+        if key not in features:
+            rows = groups[i_group]
+            feat = [data[rows][:, mask], None]
+            if method_idx == 4:
+                feat[1] = log_data[rows][:, mask]
+            elif (method_idx == 3) and (noise is not None):
+                factor, whiten = factors[mask.tobytes()]
+                if whiten:
+                    feat[0] = feat[0] @ factor
+            features[key] = feat
+        return features[key]
+
+    for i_group, rows_i in enumerate(groups):
+        for j_group in range(i_group, len(groups)):
+            rows_j = groups[j_group]
+            mask = patterns[i_group] & patterns[j_group]
+            if (method_idx == 3) and (noise is not None) \
+                    and mask.tobytes() not in factors:
+                factors[mask.tobytes()] = _noise_factor(
+                    noise[mask][:, mask])
+            data_i, log_i = get_features(i_group, mask)
+            data_j, log_j = get_features(j_group, mask)
+            if (method_idx == 3) and (noise is not None):
+                factor, whiten = factors[mask.tobytes()]
+                if not whiten:
+                    data_j = data_j @ factor
+                weight = float(n_dim)
+            else:
+                weight = float(np.sum(mask))
+            indicator_j = indicator[:, rows_j]
+            for start in range(0, len(rows_i), chunk_size):
+                chunk = slice(start, start + chunk_size)
+                rows = rows_i[chunk]
+                sim = _block_similarity(
+                    data_i[chunk], data_j,
+                    None if log_i is None else log_i[chunk], log_j,
+                    method_idx, n_dim)
+                if crossval:
+                    allowed = cv_desc[rows, None] != cv_desc[None, rows_j]
+                else:
+                    allowed = np.ones(sim.shape, dtype=bool)
+                if not weight > 0:
+                    # self similarities are counted irrespective of weight
+                    allowed &= rows[:, None] == rows_j[None, :]
+                if weighting == 1:
+                    block_values = sim * allowed
+                    block_weights = weight * allowed
+                else:
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        block_values = np.where(allowed, sim / weight, 0)
+                    block_weights = allowed.astype(np.float64)
+                block_values = indicator[:, rows] @ (
+                    indicator_j @ block_values.T).T
+                block_weights = indicator[:, rows] @ (
+                    indicator_j @ block_weights.T).T
+                values += block_values
+                weights += block_weights
+                if j_group != i_group:
+                    values += block_values.T
+                    weights += block_weights.T
+    rows, cols = np.triu_indices(n, 1)
+    values = np.concatenate([np.diag(values), values[rows, cols]])
+    weights = np.concatenate([np.diag(weights), weights[rows, cols]])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(weights > 0, values / weights, np.nan)
+
+
+def _noise_factor(noise: NDArray) -> Tuple[NDArray, bool]:
+    """ returns the lower Cholesky factor of a noise precision and True,
+    or the precision itself and False if it is not symmetric positive
+    definite
+    """
+    try:
+        factor, _ = cho_factor(noise, lower=True)
+        return np.tril(factor), True
+    except LinAlgError:
+        return noise, False
+
+
+def _block_similarity(data_i, data_j, log_i, log_j, method_idx,
+                      n_dim) -> NDArray:
+    """ similarities between two sets of rows without nans
+    as computed by the cython similarity functions
+    """
+    if method_idx == 1 or method_idx == 3:
+        sim = data_i @ data_j.T
+    elif method_idx == 2:
+        sum_i = data_i.sum(axis=1)[:, None]
+        sum_j = data_j.sum(axis=1)[None, :]
+        sq_i = np.einsum('ij,ij->i', data_i, data_i)[:, None]
+        sq_j = np.einsum('ij,ij->i', data_j, data_j)[None, :]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sim = (data_i @ data_j.T - sum_i * sum_j / n_dim) \
+                / np.sqrt(sq_i - sum_i ** 2 / n_dim) \
+                / np.sqrt(sq_j - sum_j ** 2 / n_dim)
+        sim = np.where((sq_i > 0) & (sq_j > 0), sim, 1) * n_dim / 2
+    else:
+        sim = (log_i @ data_j.T + data_i @ log_j.T
+               - np.einsum('ij,ij->i', data_i, log_i)[:, None]
+               - np.einsum('ij,ij->i', data_j, log_j)[None, :]) / 2
+    return sim
+
+
 def ensure_double(a: NDArray) -> NDArray[np.float64]:
     """If required, will convert the array datatype to Float64
 
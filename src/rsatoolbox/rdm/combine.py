@@ -25,40 +25,68 @@ def _merged_rdm_descriptors(list_of_rdms: List[RDMs]) -> Tuple[Dict, Dict]:
     Returns:
         Tuple[Dict, Dict]: descriptors, rdms_descriptors
     """
+    return _merged_descriptor_dicts(
+        [rdms.descriptors for rdms in list_of_rdms],
+        [rdms.rdm_descriptors for rdms in list_of_rdms],
+        [rdms.n_rdm for rdms in list_of_rdms])
 
-    n_rdms = sum([rdms.n_rdm for rdms in list_of_rdms])
+
+def _merged_descriptor_dicts(
+        list_of_descriptors: List[Dict],
+        list_of_rdm_descriptors: List[Dict],
+        n_rdms: List[int]) -> Tuple[Dict, Dict]:
+    """Merge descriptors and rdm_descriptors given as dicts
+
+    Same as _merged_rdm_descriptors for the descriptors of a set of RDMs
+    objects, which do not need to exist, e.g. for RDMs which are computed
+    together. Used by
+        rsatoolbox.rdm.combine._merged_rdm_descriptors
+        rsatoolbox.rdm.calc.calc_rdm
+
+    Args:
+        list_of_descriptors (List[Dict]): descriptors of each RDMs object
+        list_of_rdm_descriptors (List[Dict]): rdm_descriptors of each RDMs
+            object, which contain one value per RDM
+        n_rdms (List[int]): number of RDMs in each RDMs object
+
+    Returns:
+        Tuple[Dict, Dict]: descriptors, rdms_descriptors
+    """
     rdm_desc_names = []
-    descriptors = deepcopy(list_of_rdms[0].descriptors)
+    descriptors = deepcopy(list_of_descriptors[0])
     desc_diff_names = []
-    for rdms in list_of_rdms[1:]:
-        rdm_desc_names += list(rdms.rdm_descriptors.keys())
+    for rdms_desc, rdms_rdm_desc in zip(list_of_descriptors[1:],
+                                        list_of_rdm_descriptors[1:]):
+        rdm_desc_names += list(rdms_rdm_desc.keys())
         delete = []
         for k, v in descriptors.items():
-            if k not in rdms.descriptors.keys():
+            if k not in rdms_desc.keys():
                 desc_diff_names.append(k)
                 delete.append(k)
-            elif not np.all(rdms.descriptors[k] == v):
+            elif not np.all(rdms_desc[k] == v):
                 desc_diff_names.append(k)
                 delete.append(k)
         for k in delete:
             descriptors.pop(k)
-        for k, v in rdms.descriptors.items():
+        for k, v in rdms_desc.items():
             if k not in descriptors.keys() and k not in desc_diff_names:
                 desc_diff_names.append(k)
 
     rdm_desc_names = set(rdm_desc_names + list(desc_diff_names))
-    rdm_descriptors = dict([(n, [None]*n_rdms) for n in rdm_desc_names])
+    rdm_descriptors = dict(
+        [(n, [None]*sum(n_rdms)) for n in rdm_desc_names])
     rdm_id = 0
-    for rdms in list_of_rdms:
-        for rdm_local_id, _ in enumerate(rdms.dissimilarities):
+    for rdms_desc, rdms_rdm_desc, n_rdm in zip(
+            list_of_descriptors, list_of_rdm_descriptors, n_rdms):
+        for rdm_local_id in range(n_rdm):
             for name in rdm_descriptors.keys():
                 if name == 'index':
                     rdm_descriptors['index'][rdm_id] = rdm_id
-                elif name in rdms.rdm_descriptors:
-                    val = rdms.rdm_descriptors[name][rdm_local_id]
+                elif name in rdms_rdm_desc:
+                    val = rdms_rdm_desc[name][rdm_local_id]
                     rdm_descriptors[name][rdm_id] = val
-                elif name in rdms.descriptors:
-                    rdm_descriptors[name][rdm_id] = rdms.descriptors[name]
+                elif name in rdms_desc:
+                    rdm_descriptors[name][rdm_id] = rdms_desc[name]
                 else:
                     rdm_descriptors[name] = None
             rdm_id += 1
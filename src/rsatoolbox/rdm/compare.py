@@ -9,11 +9,10 @@ from scipy import linalg
 from scipy.optimize import minimize
 from scipy.stats._stats import _kendall_dis
 from scipy.spatial.distance import squareform
-from rsatoolbox.util.matrix import pairwise_contrast_sparse
 from rsatoolbox.util.matrix import pairwise_contrast
 from rsatoolbox.util.rdm_utils import _get_n_from_reduced_vectors
 from rsatoolbox.util.rdm_utils import _get_n_from_length
-from rsatoolbox.util.matrix import row_col_indicator_g
+from rsatoolbox.util.matrix import get_v, get_cov_operator
 from rsatoolbox.util.rdm_utils import batch_to_matrices
 
 
@@ -183,8 +182,8 @@ def compare_spearman(rdm1, rdm2):
 
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1 = scipy.stats.rankdata(vector1, axis=1)
+    vector2 = scipy.stats.rankdata(vector2, axis=1)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
     sim = _cosine(vector1, vector2)
@@ -206,8 +205,8 @@ def compare_rho_a(rdm1, rdm2):
 
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1 = scipy.stats.rankdata(vector1, axis=1)
+    vector2 = scipy.stats.rankdata(vector2, axis=1)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
     n = vector1.shape[1]
@@ -230,7 +229,7 @@ def compare_kendall_tau(rdm1, rdm2):
             kendall-tau correlation between the two RDMs
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    sim = _all_combinations(vector1, vector2, _kendall_tau)
+    sim = _kendall_tau_batched(vector1, vector2, variant='b')
     return sim
 
 
@@ -248,7 +247,7 @@ def compare_kendall_tau_a(rdm1, rdm2):
             kendall-tau a between the two RDMs
     """
     vector1, vector2, _ = _parse_input_rdms(rdm1, rdm2)
-    sim = _all_combinations(vector1, vector2, _tau_a)
+    sim = _kendall_tau_batched(vector1, vector2, variant='a')
     return sim
 
 
@@ -278,8 +277,15 @@ def compare_neg_riemannian_distance(rdm1, rdm2, sigma_k=None):
         [0.5 * pairs, np.diag(-0.5 * np.ones(vector1.shape[1] - n_cond + 1))]])
     vec_G1 = vector1@np.transpose(T)
     vec_G2 = vector2@np.transpose(T)
-
-    sim = _all_combinations(vec_G1, vec_G2, _riemannian_distance, sigma_k_hat)
+    G1 = _vec_G_to_matrices(vec_G1)
+    G2 = _vec_G_to_matrices(vec_G2)
+
+    # the optimization runs per pair, but the matrices are built only once
+    sim = np.empty((len(G1), len(G2)))
+    for k1, G1_k in enumerate(G1):
+        for k2, G2_k in enumerate(G2):
+            sim[k1, k2] = _neg_riemannian_distance_matrices(
+                G1_k, G2_k, sigma_k_hat)
     return sim
 
 
@@ -302,7 +308,7 @@ def compare_bures_similarity(rdm1, rdm2):
     G1 = G1 - s1 - np.transpose(s1, (0, 2, 1)) + np.mean(s1, 2, keepdims=True)
     s2 = np.mean(G2, 1, keepdims=True)
     G2 = G2 - s2 - np.transpose(s2, (0, 2, 1)) + np.mean(s2, 2, keepdims=True)
-    sim = _all_combinations(G1, G2, _bures_similarity_first_way)
+    sim = _bures_batched(G1, G2, metric=False)
     return sim
 
 
@@ -325,7 +331,7 @@ def compare_bures_metric(rdm1, rdm2):
     G1 = G1 - s1 - np.transpose(s1, (0, 2, 1)) + np.mean(s1, 2, keepdims=True)
     s2 = np.mean(G2, 1, keepdims=True)
     G2 = G2 - s2 - np.transpose(s2, (0, 2, 1)) + np.mean(s2, 2, keepdims=True)
-    sim = _all_combinations(G1, G2, _sq_bures_metric_first_way)
+    sim = _bures_batched(G1, G2, metric=True)
     return sim
 
 
@@ -373,16 +379,12 @@ def _cosine_cov_weighted_slow(vector1, vector2, sigma_k=None, nan_idx=None):
     """
     if nan_idx is not None:
         n_cond = _get_n_from_reduced_vectors(nan_idx.reshape(1, -1))
-        v = _get_v(n_cond, sigma_k)
-        v = v[nan_idx][:, nan_idx]
     else:
         n_cond = _get_n_from_reduced_vectors(vector1)
-        v = _get_v(n_cond, sigma_k)
+    cov_op = get_cov_operator(n_cond, sigma_k, nan_idx)
     # compute V^-1 vector1/2 for all vectors by solving Vx = vector1/2
-    vector1_m = np.array([scipy.sparse.linalg.cg(v, vector1[i], atol=0)[0]
-                          for i in range(vector1.shape[0])])
-    vector2_m = np.array([scipy.sparse.linalg.cg(v, vector2[i], atol=0)[0]
-                          for i in range(vector2.shape[0])])
+    vector1_m = cov_op.solve(vector1)
+    vector2_m = cov_op.solve(vector2)
     # compute the inner products v1^T (V^-1 v2) for all combinations
     cos = np.einsum('ij,kj->ik', vector1, vector2_m)
     # divide by sqrt(v1^T (V^-1 v1))
@@ -443,54 +445,8 @@ def _cov_weighting(vector, nan_idx, sigma_k=None):
             weighted vectors (M x n_dist + n_cond)
 
     """
-    N, n_dist = vector.shape
     n_cond = _get_n_from_length(nan_idx.shape[0])
-    vector_w = -0.5 * np.c_[vector, np.zeros((N, n_cond))]
-    rowI, colI = row_col_indicator_g(n_cond)
-    sumI = rowI + colI
-    if np.all(nan_idx):
-        # column and row means
-        m = vector_w @ sumI / n_cond
-        # Overall mean
-        mm = np.sum(vector_w * 2, axis=1, keepdims=True) / (n_cond * n_cond)
-        # subtract the column and row means and add overall mean
-        vector_w = vector_w - m @ sumI.T + mm
-        if sigma_k is not None:
-            if sigma_k.ndim == 1:
-                sigma_k_sqrt = np.sqrt(sigma_k)
-                vector_w /= rowI @ sigma_k_sqrt
-                vector_w /= colI @ sigma_k_sqrt
-            elif sigma_k.ndim == 2:
-                l_sigma_k = np.linalg.inv(np.linalg.cholesky(sigma_k))
-                Gs = np.empty((vector.shape[0], n_cond, n_cond))
-                for i_vec in range(vector.shape[0]):
-                    G = scipy.spatial.distance.squareform(
-                        vector_w[i_vec, :n_dist])
-                    np.fill_diagonal(G, vector_w[i_vec, n_dist:])
-                    Gs[i_vec] = G
-                # These two are the slow lines for this whitening
-                Gs = np.einsum('ij,mjk,lk->mil', l_sigma_k, Gs, l_sigma_k)
-                vector_w = np.einsum('ij,mjk,ik->mi', rowI, Gs, colI)
-    else:
-        nan_idx_ext = np.concatenate((nan_idx, np.ones(n_cond, bool)))
-        sumI = sumI[nan_idx_ext]
-        # get matrix for double centering with missing values:
-        sumI[n_dist:, :] /= 2
-        diag = np.concatenate((np.ones((n_dist, 1)) / 2, np.ones((n_cond, 1))))
-        # one line version much faster here!
-        vector_w = vector_w - (
-            vector_w
-            @ sumI @ np.linalg.inv(sumI.T @ (diag * sumI)) @ (diag * sumI).T)
-        if sigma_k is not None:
-            if sigma_k.ndim == 1:
-                sigma_k_sqrt = np.sqrt(sigma_k)
-                vector_w /= rowI[nan_idx_ext] @ sigma_k_sqrt
-                vector_w /= colI[nan_idx_ext] @ sigma_k_sqrt
-            elif sigma_k.ndim == 2:
-                raise ValueError('cannot handle sigma_k and nans')
-    # Weight the off-diagnoal terms double
-    vector_w[:, :n_dist] = vector_w[:, :n_dist] * np.sqrt(2)
-    return vector_w
+    return get_cov_operator(n_cond, sigma_k, nan_idx).weight(vector)
 
 
 def _cosine(vector1, vector2):
@@ -545,7 +501,22 @@ def _riemannian_distance(vec_G1, vec_G2, sigma_k):
     n_cond = _get_n_from_length(len(vec_G1))
     G1 = np.diag(vec_G1[0:(n_cond-1)])+squareform(vec_G1[(n_cond-1):len(vec_G1)])
     G2 = np.diag(vec_G2[0:(n_cond-1)])+squareform(vec_G2[(n_cond-1):len(vec_G2)])
+    return _neg_riemannian_distance_matrices(G1, G2, sigma_k)
+
+
+def _neg_riemannian_distance_matrices(G1, G2, sigma_k):
+    """computes the negative Riemannian distance between two second moments
 
+    Args:
+        G1 (numpy.ndarray):
+            first second-moment matrix
+        G2 (numpy.ndarray):
+            second second-moment matrix
+
+        Returns:
+            neg_riem (float):
+                negative riemannian distance
+    """
     def fun(theta):
         return np.sqrt((np.log(linalg.eigvalsh(
             np.exp(theta[0]) * G1 + np.exp(theta[1]) * sigma_k, G2))**2).sum())
@@ -554,6 +525,165 @@ def _riemannian_distance(vec_G1, vec_G2, sigma_k):
     return neg_riem
 
 
+def _vec_G_to_matrices(vec_G):
+    """converts vectorized second moments as computed in
+    compare_neg_riemannian_distance into a stack of matrices
+
+    Args:
+        vec_G (numpy.ndarray):
+            vectorized second-moments (2D), the diagonal first
+
+        Returns:
+            G (numpy.ndarray):
+                n x (n_cond - 1) x (n_cond - 1) second-moment matrices
+    """
+    n_cond = _get_n_from_length(vec_G.shape[1])
+    rows, cols = np.triu_indices(n_cond - 1, 1)
+    diag = np.arange(n_cond - 1)
+    G = np.zeros((vec_G.shape[0], n_cond - 1, n_cond - 1))
+    G[:, rows, cols] = vec_G[:, (n_cond - 1):]
+    G[:, cols, rows] = vec_G[:, (n_cond - 1):]
+    G[:, diag, diag] = vec_G[:, :(n_cond - 1)]
+    return G
+
+
+def _kendall_tau_batched(vectors1, vectors2, variant='b', max_elements=2 ** 22):
+    """computes kendall-tau b or a between all pairs of vectors from
+    vectors1 and vectors2. This follows the computation in scipy.stats.kendalltau
+    and _tau_a, but ranks, sorts and counts ties for many pairs of
+    vectors at once. Only the count of discordant pairs runs per pair.
+
+    Args:
+        vectors1 (numpy.ndarray):
+            first vectors (2D)
+        vectors2 (numpy.ndarray):
+            second vectors (2D)
+        variant (str):
+            'b' for kendall-tau b, 'a' for kendall-tau a
+        max_elements (int):
+            maximum number of entries of vector pairs processed together
+
+    Returns:
+        tau (numpy.ndarray):
+            len(vectors1) x len(vectors2) kendall-taus
+
+    """
+    if variant not in ('a', 'b'):
+        raise ValueError(f'Unknown kendall tau variant: {variant}')
+    size = vectors1.shape[1]
+    tot = (size * (size - 1)) // 2
+    perm1, x_sorted, xtie = _dense_rank_ties(vectors1)
+    perm2, y_sorted, ytie = _dense_rank_ties(vectors2)
+    ranks2 = np.empty_like(y_sorted)
+    np.put_along_axis(ranks2, perm2, y_sorted, axis=-1)
+    n_block = max(1, max_elements // max(1, len(vectors2) * size))
+    tau = np.empty((len(vectors1), len(vectors2)))
+    for start in range(0, len(vectors1), n_block):
+        x = x_sorted[start:start + n_block]
+        # ranks of vectors2 in the order which sorts each of vectors1
+        y = np.ascontiguousarray(np.transpose(
+            np.take(ranks2, perm1[start:start + n_block], axis=1), (1, 0, 2)))
+        dis = np.array([[_kendall_dis(x_i, y_ij) for y_ij in y_i]
+                        for x_i, y_i in zip(x, y)], dtype=np.int64)
+        # joint ties are only possible if both vectors contain ties
+        ntie = np.zeros_like(dis)
+        xtie_b = xtie[start:start + n_block, None]
+        both = np.nonzero((xtie_b > 0) & (ytie[None, :] > 0))
+        if len(both[0]) > 0:
+            key = np.sort(x[both[0]] * (size + 1) + y[both], axis=-1)
+            ntie[both] = _count_tied_pairs(key[:, 1:] != key[:, :-1])
+        con_minus_dis = tot - xtie_b - ytie[None, :] + ntie - 2 * dis
+        if variant == 'b':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tau_b = con_minus_dis / np.sqrt(tot - xtie_b) \
+                    / np.sqrt(tot - ytie[None, :])
+            tau_b[(xtie_b == tot) | (ytie[None, :] == tot)] = np.nan
+        else:
+            tau_b = con_minus_dis / tot
+        # Limit range to fix computational errors
+        tau[start:start + n_block] = np.clip(tau_b, -1., 1.)
+    return tau
+
+
+def _dense_rank_ties(vectors):
+    """sorts each vector and computes its dense ranks (starting at 1) and
+    the number of tied pairs in each vector
+
+    Args:
+        vectors (numpy.ndarray):
+            vectors (2D)
+
+    Returns:
+        perm (numpy.ndarray): permutations which sort each vector
+        ranks (numpy.ndarray): dense ranks of the sorted vectors
+        ties (numpy.ndarray): number of tied pairs per vector
+    """
+    perm = np.argsort(vectors, axis=-1, kind='stable')
+    sorted_v = np.take_along_axis(vectors, perm, axis=-1)
+    new_value = sorted_v[:, 1:] != sorted_v[:, :-1]
+    ranks = np.concatenate(
+        (np.ones((len(vectors), 1), dtype=np.intp),
+         1 + np.cumsum(new_value, axis=-1, dtype=np.intp)), axis=-1)
+    return perm, ranks, _count_tied_pairs(new_value)
+
+
+def _count_tied_pairs(new_value):
+    """counts pairs of entries within runs of equal entries
+
+    Args:
+        new_value (numpy.ndarray):
+            n x (size - 1) booleans, whether entry i + 1 starts a new run
+
+    Returns:
+        numpy.ndarray: number of tied pairs per row, i.e. the sum of
+        c * (c - 1) / 2 over all run lengths c
+    """
+    starts = np.concatenate(
+        (np.ones((len(new_value), 1), dtype=bool), new_value), axis=-1)
+    pos = np.arange(starts.shape[1])
+    run_start = np.maximum.accumulate(np.where(starts, pos, 0), axis=-1)
+    # the i-th entry of a run is tied with the i - 1 entries before it
+    return np.sum(pos - run_start, axis=-1, dtype=np.int64)
+
+
+def _bures_batched(G1, G2, metric=False, max_elements=2 ** 24):
+    """computes the Bures similarity or squared Bures metric between all
+    pairs of centered kernel matrices from G1 and G2
+
+    Args:
+        G1 (numpy.ndarray):
+            first kernel matrices (3D)
+        G2 (numpy.ndarray):
+            second kernel matrices (3D)
+        metric (bool):
+            whether to compute the squared metric instead of the similarity
+        max_elements (int):
+            maximum number of matrix entries processed together
+
+    Returns:
+        numpy.ndarray: len(G1) x len(G2) similarities or distances
+    """
+    va, ua = np.linalg.eigh(G1)
+    Asq = ua @ (np.sqrt(np.maximum(va[:, :, None], 0.0))
+                * np.transpose(ua, (0, 2, 1)))
+    trace1 = np.trace(G1, axis1=1, axis2=2)
+    trace2 = np.trace(G2, axis1=1, axis2=2)
+    n_block = max(1, max_elements // max(1, G2.size))
+    value = np.empty((len(G1), len(G2)))
+    for start in range(0, len(G1), n_block):
+        Asq_b = Asq[start:start + n_block, None]
+        ev = np.linalg.eigvalsh(Asq_b @ G2[None] @ Asq_b)
+        root_sum = np.sum(np.sqrt(np.maximum(ev, 0.0)), axis=-1)
+        trace1_b = trace1[start:start + n_block, None]
+        if metric:
+            value[start:start + n_block] = \
+                trace1_b + trace2[None] - 2 * root_sum
+        else:
+            value[start:start + n_block] = \
+                root_sum / np.sqrt(trace1_b * trace2[None])
+    return value
+
+
 def _kendall_tau(vector1, vector2):
     """computes the kendall-tau between two vectors
 
@@ -625,19 +755,7 @@ def _count_rank_tie(ranks):
 
 def _get_v(n_cond, sigma_k):
     """ get the rdm covariance from sigma_k """
-    # calculate Xi
-    c_mat = pairwise_contrast_sparse(np.arange(n_cond))
-    if sigma_k is None:
-        xi = c_mat @ c_mat.transpose()
-    elif sigma_k.ndim == 1:
-        sigma_k = scipy.sparse.diags(sigma_k)
-        xi = c_mat @ sigma_k @ c_mat.transpose()
-    else:
-        sigma_k = scipy.sparse.csr_matrix(sigma_k)
-        xi = c_mat @ sigma_k @ c_mat.transpose()
-    # calculate V
-    v = xi.multiply(xi).tocsc()
-    return v
+    return get_v(n_cond, sigma_k)
 
 
 def _parse_input_rdms(rdm1, rdm2):
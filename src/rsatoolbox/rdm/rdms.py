@@ -15,10 +15,12 @@ from rsatoolbox.io.pandas import rdms_to_df
 from rsatoolbox.rdm.combine import _mean
 from rsatoolbox.util.rdm_utils import batch_to_vectors
 from rsatoolbox.util.rdm_utils import batch_to_matrices
+from rsatoolbox.util.rdm_utils import _pair_index
 from rsatoolbox.util.descriptor_utils import format_descriptor
 from rsatoolbox.util.descriptor_utils import num_index
 from rsatoolbox.util.descriptor_utils import subset_descriptor
 from rsatoolbox.util.descriptor_utils import check_descriptor_length_error
+from rsatoolbox.util.descriptor_utils import wrap_descriptor
 from rsatoolbox.util.descriptor_utils import append_descriptor
 from rsatoolbox.util.descriptor_utils import dict_to_list
 from rsatoolbox.util.descriptor_utils import desc_eq
@@ -70,9 +72,7 @@ class RDMs:
         if rdm_descriptors is None:
             self.rdm_descriptors = {}
         else:
-            for k, v in rdm_descriptors.items():
-                if not isinstance(v, Iterable) or isinstance(v, str):
-                    rdm_descriptors[k] = [v]
+            wrap_descriptor(rdm_descriptors)
             check_descriptor_length_error(rdm_descriptors,
                                           'rdm_descriptors',
                                           self.n_rdm)
@@ -80,9 +80,7 @@ class RDMs:
         if pattern_descriptors is None:
             self.pattern_descriptors = {}
         else:
-            for k, v in pattern_descriptors.items():
-                if not isinstance(v, Iterable) or isinstance(v, str):
-                    pattern_descriptors[k] = [v]
+            wrap_descriptor(pattern_descriptors)
             check_descriptor_length_error(pattern_descriptors,
                                           'pattern_descriptors',
                                           self.n_cond)
@@ -155,9 +153,9 @@ class RDMs:
         rdm_descriptors = subset_descriptor(self.rdm_descriptors, idx)
         rdms = RDMs(dissimilarities,
                     dissimilarity_measure=self.dissimilarity_measure,
-                    descriptors=self.descriptors,
+                    descriptors=dict(self.descriptors),
                     rdm_descriptors=rdm_descriptors,
-                    pattern_descriptors=self.pattern_descriptors)
+                    pattern_descriptors=dict(self.pattern_descriptors))
         return rdms
 
     def __len__(self) -> int:
@@ -186,13 +184,32 @@ class RDMs:
         matrices, _, _ = batch_to_matrices(self.dissimilarities)
         return matrices
 
-    def copy(self) -> RDMs:
+    def copy(self, deep: bool = True) -> RDMs:
         """Return a copy of this object, with all properties
         equal to the original's
 
+        Args:
+            deep (bool): whether all arrays and descriptor values are
+                copied. Otherwise the copy is a view, which shares the
+                dissimilarities and the descriptor values with this object
+                and only has its own descriptor dictionaries. Adding,
+                replacing or removing descriptors or assigning new
+                dissimilarities then affects only the view, and writing
+                into the shared, read-only dissimilarities raises an error.
+
         Returns:
             RDMs: Value copy
         """
+        if not deep:
+            dissimilarities = self.dissimilarities.view()
+            dissimilarities.flags.writeable = False
+            return RDMs(
+                dissimilarities=dissimilarities,
+                dissimilarity_measure=self.dissimilarity_measure,
+                descriptors=dict(self.descriptors),
+                rdm_descriptors=dict(self.rdm_descriptors),
+                pattern_descriptors=dict(self.pattern_descriptors)
+            )
         return RDMs(
             dissimilarities=self.dissimilarities.copy(),
             dissimilarity_measure=self.dissimilarity_measure,
@@ -224,10 +241,10 @@ class RDMs:
             [p in value for p in self.pattern_descriptors[by]])
         selection_xy = pattern_in_value[ix] & pattern_in_value[iy]
         dissimilarities = self.dissimilarities[:, selection_xy]
-        descriptors = self.descriptors
+        descriptors = dict(self.descriptors)
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
-        rdm_descriptors = self.rdm_descriptors
+        rdm_descriptors = dict(self.rdm_descriptors)
         dissimilarity_measure = self.dissimilarity_measure
         rdms = RDMs(dissimilarities=dissimilarities,
                     descriptors=descriptors,
@@ -263,15 +280,20 @@ class RDMs:
         else:
             selection = np.where(desc == value)[0]
         selection = np.sort(selection)
-        dissimilarities = self.get_matrices()
-        for i_rdm in range(self.n_rdm):
-            np.fill_diagonal(dissimilarities[i_rdm], np.nan)
-        selection = np.sort(selection)
-        dissimilarities = dissimilarities[:, selection][:, :, selection]
-        descriptors = self.descriptors
+        # entries of the sampled pairs in the vectors, NaN for pairs of a
+        # pattern with its own copy
+        rows, cols = np.triu_indices(len(selection), 1)
+        rows = selection[rows]
+        cols = selection[cols]
+        repeated = rows == cols
+        pairs = _pair_index(rows, cols, self.n_cond)
+        pairs[repeated] = 0
+        dissimilarities = self.dissimilarities[:, pairs].astype(np.float64)
+        dissimilarities[:, repeated] = np.nan
+        descriptors = dict(self.descriptors)
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
-        rdm_descriptors = self.rdm_descriptors
+        rdm_descriptors = dict(self.rdm_descriptors)
         dissimilarity_measure = self.dissimilarity_measure
         rdms = RDMs(dissimilarities=dissimilarities,
                     descriptors=descriptors,
@@ -297,8 +319,8 @@ class RDMs:
             by = 'index'
         selection = num_index(self.rdm_descriptors[by], value)
         dissimilarities = self.dissimilarities[selection, :]
-        descriptors = self.descriptors
-        pattern_descriptors = self.pattern_descriptors
+        descriptors = dict(self.descriptors)
+        pattern_descriptors = dict(self.pattern_descriptors)
         rdm_descriptors = extract_dict(self.rdm_descriptors, selection)
         dissimilarity_measure = self.dissimilarity_measure
         rdms = RDMs(dissimilarities=dissimilarities,
@@ -323,20 +345,16 @@ class RDMs:
         """
         if by is None:
             by = 'index'
-        desc = self.rdm_descriptors[by]
-        selection = []
+        desc = np.asarray(self.rdm_descriptors[by])
         if isinstance(value, (list, tuple, np.ndarray)):
-            for i in value:
-                for j, d in enumerate(desc):
-                    if d == i:
-                        selection.append(j)
+            selection = np.concatenate(
+                [np.flatnonzero(desc == v) for v in value]
+                + [np.zeros(0, dtype=int)])
         else:
-            for j, d in enumerate(desc):
-                if d == value:
-                    selection.append(j)
+            selection = np.flatnonzero(desc == value)
         dissimilarities = self.dissimilarities[selection, :]
-        descriptors = self.descriptors
-        pattern_descriptors = self.pattern_descriptors
+        descriptors = dict(self.descriptors)
+        pattern_descriptors = dict(self.pattern_descriptors)
         rdm_descriptors = extract_dict(self.rdm_descriptors, selection)
         dissimilarity_measure = self.dissimilarity_measure
         rdms = RDMs(dissimilarities=dissimilarities,
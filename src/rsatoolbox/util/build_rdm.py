@@ -4,10 +4,9 @@
 
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
-from copy import deepcopy
 import numpy as np
 from rsatoolbox.rdm.rdms import RDMs
-from rsatoolbox.data import average_dataset_by
+from rsatoolbox.util.data_utils import get_unique_inverse
 
 if TYPE_CHECKING:
     from rsatoolbox.data.base import DatasetBase
@@ -26,11 +25,12 @@ def _build_rdms(
     rdms = RDMs(
         dissimilarities=np.array([utv]),
         dissimilarity_measure=method,
-        rdm_descriptors=deepcopy(ds.descriptors)
+        rdm_descriptors=dict(ds.descriptors)
     )
     if (obs_desc_vals is None) and (obs_desc_name is not None):
         # obtain the unique values in the target obs descriptor
-        _, obs_desc_vals, _ = average_dataset_by(ds, obs_desc_name)
+        obs_desc_vals, _ = get_unique_inverse(
+            ds.obs_descriptors[obs_desc_name])
 
     if _averaging_occurred(ds, obs_desc_name, obs_desc_vals):
         orig_obs_desc_vals = np.asarray(ds.obs_descriptors[obs_desc_name])
@@ -45,7 +45,7 @@ def _build_rdms(
             else:
                 rdms.pattern_descriptors[dname] = avg_dvals
     else:
-        rdms.pattern_descriptors = deepcopy(ds.obs_descriptors)
+        rdms.pattern_descriptors = dict(ds.obs_descriptors)
     # Additional rdm_descriptors
     if noise is not None:
         rdms.descriptors['noise'] = noise
@@ -14,11 +14,13 @@ def extract_dict(dictionary, indices):
     """extract key-value pairs with values given indexes.
     """
     extracted_dictionary = dictionary.copy()
+    if isinstance(indices, Iterable):
+        indices = np.asarray(indices, dtype=np.intp)
     for k, v in dictionary.items():
-        if isinstance(indices, Iterable):
-            extracted_dictionary[k] = [v[idx] for idx in indices]
-        else:
+        if isinstance(v, np.ndarray) or not isinstance(indices, np.ndarray):
             extracted_dictionary[k] = v[indices]
+        else:
+            extracted_dictionary[k] = [v[idx] for idx in indices]
     return extracted_dictionary
 
 
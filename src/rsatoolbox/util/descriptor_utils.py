@@ -115,6 +115,7 @@ def check_descriptor_length(descriptor, n_element):
 def subset_descriptor(descriptor, indices):
     """
     Retrieves a subset of a descriptor given by indices.
+    numpy array values are indexed at once and stay arrays.
 
     Args:
         descriptor(dict): the descriptor dictionary
@@ -126,8 +127,12 @@ def subset_descriptor(descriptor, indices):
     """
     extracted_descriptor = {}
     if isinstance(indices, Iterable):
+        indices = np.asarray(indices, dtype=np.intp)
         for k, v in descriptor.items():
-            extracted_descriptor[k] = [v[index] for index in indices]
+            if isinstance(v, np.ndarray):
+                extracted_descriptor[k] = v[indices]
+            else:
+                extracted_descriptor[k] = [v[index] for index in indices]
     else:
         for k, v in descriptor.items():
             extracted_descriptor[k] = [v[indices]]
@@ -153,6 +158,24 @@ def append_descriptor(descriptor, desc_new):
     return descriptor
 
 
+def wrap_descriptor(descriptor):
+    """
+    wraps single values of a descriptor, i.e. strings and non iterables,
+    into a list of 1 element. Modifies the descriptor in place.
+
+    Args:
+        descriptor(dict): the descriptor dictionary
+
+    Returns:
+        descriptor(dict): the descriptor with list-like values
+
+    """
+    for k, v in descriptor.items():
+        if not isinstance(v, Iterable) or isinstance(v, str):
+            descriptor[k] = [v]
+    return descriptor
+
+
 def check_descriptor_length_error(descriptor, name, n_element):
     """
     Raises an error if the given descriptor does not have the right length
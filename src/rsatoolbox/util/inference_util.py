@@ -88,50 +88,58 @@ def pool_rdm(rdms, method: str = 'cosine'):
             under the chosen method
 
     """
-    rdm_vec = rdms.get_vectors()
-    if method == 'euclid':
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'neg_riem_dist':
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'cosine':
-        rdm_vec = rdm_vec / np.sqrt(np.nanmean(rdm_vec ** 2, axis=1,
-                                               keepdims=True))
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'corr':
-        rdm_vec = rdm_vec - np.nanmean(rdm_vec, axis=1, keepdims=True)
-        rdm_vec = rdm_vec / np.nanstd(rdm_vec, axis=1, keepdims=True)
-        rdm_vec = _nan_mean(rdm_vec)
+    rdm_vec = _pool_rdm_vectors(rdms.get_vectors(), method)
+    return RDMs(rdm_vec,
+                dissimilarity_measure=rdms.dissimilarity_measure,
+                descriptors=rdms.descriptors,
+                rdm_descriptors=None,
+                pattern_descriptors=rdms.pattern_descriptors)
+
+
+def _pool_rdm_vectors(rdm_vec: NDArray, method: str = 'cosine') -> NDArray:
+    """pools RDM vectors as in pool_rdm, without constructing RDMs objects
+
+    Args:
+        rdm_vec (numpy.ndarray): RDM vectors (n_rdm x n_dist)
+        method (String): comparison method to optimize for
+
+    Returns:
+        numpy.ndarray: the pooled RDM vector (1 x n_dist)
+
+    """
+    rdm_vec = _nan_mean(_pool_transform(rdm_vec, method))
+    if method in ('corr', 'corr_cov'):
         rdm_vec = rdm_vec - np.nanmin(rdm_vec)
-    elif method == 'cosine_cov':
+    return rdm_vec
+
+
+def _pool_transform(rdm_vec: NDArray, method: str = 'cosine') -> NDArray:
+    """normalizes each RDM vector as done by pool_rdm before averaging
+
+    Args:
+        rdm_vec (numpy.ndarray): RDM vectors (n_rdm x n_dist)
+        method (String): comparison method to optimize for
+
+    Returns:
+        numpy.ndarray: the normalized RDM vectors (n_rdm x n_dist)
+
+    """
+    if method in ('euclid', 'neg_riem_dist'):
+        pass
+    elif method in ('cosine', 'cosine_cov'):
         rdm_vec = rdm_vec / np.sqrt(np.nanmean(rdm_vec ** 2, axis=1,
                                                keepdims=True))
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'corr_cov':
+    elif method in ('corr', 'corr_cov'):
         rdm_vec = rdm_vec - np.nanmean(rdm_vec, axis=1, keepdims=True)
         rdm_vec = rdm_vec / np.nanstd(rdm_vec, axis=1, keepdims=True)
-        rdm_vec = _nan_mean(rdm_vec)
-        rdm_vec = rdm_vec - np.nanmin(rdm_vec)
     elif method in ('spearman', 'rho-a'):
         rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'rho-a':
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method in ('kendall', 'tau-b'):
-        warnings.warn('Noise ceiling for tau based on averaged ranks!')
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
-    elif method == 'tau-a':
+    elif method in ('kendall', 'tau-b', 'tau-a'):
         warnings.warn('Noise ceiling for tau based on averaged ranks!')
         rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
-        rdm_vec = _nan_mean(rdm_vec)
     else:
         raise ValueError('Unknown RDM comparison method requested!')
-    return RDMs(rdm_vec,
-                dissimilarity_measure=rdms.dissimilarity_measure,
-                descriptors=rdms.descriptors,
-                rdm_descriptors=None,
-                pattern_descriptors=rdms.pattern_descriptors)
+    return rdm_vec
 
 
 def _nan_mean(rdm_vector: NDArray) -> NDArray:
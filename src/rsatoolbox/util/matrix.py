@@ -4,9 +4,23 @@
 Collection of different utility Matrices
 """
 
+import hashlib
+from collections import OrderedDict
 from typing import List, Optional
 import numpy as np
-from scipy.sparse import coo_matrix, csr_matrix, spmatrix
+import scipy.sparse.linalg
+from scipy import linalg
+from scipy.sparse import coo_matrix, csr_matrix, diags, spmatrix
+
+# largest number of missing RDM entries which are handled with the closed
+# form inverse of the complete V
+_MAX_MISSING = 500
+# largest V (in RDM entries) which is otherwise factorized densely instead
+# of solving with conjugate gradients
+_MAX_DENSE_V = 3000
+# cached covariance operators, keyed by (n_cond, sigma_k, valid entries)
+_COV_OPERATORS = OrderedDict()
+_COV_OPERATOR_CACHE_SIZE = 16
 
 
 def indicator(index_vector, positive=False):
@@ -174,6 +188,8 @@ def get_v(n_cond: int, sigma_k: Optional[spmatrix]) -> spmatrix:
     c_mat = pairwise_contrast_sparse(np.arange(n_cond))
     if sigma_k is None:
         xi = c_mat @ c_mat.transpose()
+    elif np.ndim(sigma_k) == 1:
+        xi = c_mat @ diags(sigma_k) @ c_mat.transpose()
     else:
         sigma_k = csr_matrix(sigma_k)
         xi = c_mat @ sigma_k @ c_mat.transpose()
@@ -182,6 +198,334 @@ def get_v(n_cond: int, sigma_k: Optional[spmatrix]) -> spmatrix:
     return v
 
 
+class RDMCovariance:
+    """ Covariance V of the entries of RDM vectors
+
+    V = (C sigma_k C^T) * (C sigma_k C^T) (elementwise) for the pairwise
+    contrasts C is the covariance of the distance estimates up to a
+    scalar. Applying V^-1 has a closed form for complete RDMs: with the
+    centering matrix P and sigma_c = pinv(P sigma_k P), the solution of
+    V x = d is x = sigma_c @ D @ sigma_c / 2 for the RDM matrix D of d,
+    evaluated at the pairs. This takes O(n_cond ** 3) operations per
+    vector instead of solving an (n_dist x n_dist) system.
+
+    If a few entries are missing, V restricted to the valid entries is
+    inverted with the Schur complement of the closed form inverse over
+    the missing entries. Otherwise V is factorized densely if it is small
+    and solved with conjugate gradients if it is large.
+
+    Args:
+        n_cond (int): number of conditions
+        sigma_k (numpy.ndarray): covariance between pattern estimates,
+            either the full matrix or its diagonal. Defaults to identity.
+        valid (numpy.ndarray): boolean vector of valid RDM entries.
+            Defaults to all entries.
+
+    """
+
+    def __init__(self, n_cond: int, sigma_k=None, valid=None):
+        self.n_cond = int(n_cond)
+        self.n_dist = self.n_cond * (self.n_cond - 1) // 2
+        if sigma_k is not None:
+            sigma_k = np.asarray(sigma_k, dtype=float)
+        self.sigma_k = sigma_k
+        if valid is None:
+            valid = np.ones(self.n_dist, bool)
+        self.valid = np.asarray(valid, bool).reshape(-1)
+        self._v = None
+        self._sigma_c = None
+        self._schur = None
+        self._factor = None
+
+    @property
+    def v(self) -> spmatrix:
+        """ V restricted to the valid entries as a sparse matrix """
+        if self._v is None:
+            v = get_v(self.n_cond, self.sigma_k)
+            if not np.all(self.valid):
+                v = v[self.valid][:, self.valid]
+            self._v = v
+        return self._v
+
+    def dot(self, vectors) -> np.ndarray:
+        """ computes V @ vector for each row of vectors
+
+        Args:
+            vectors (numpy.ndarray): RDM vectors (N x n_valid)
+
+        Returns:
+            numpy.ndarray: products (N x n_valid)
+        """
+        vectors = np.atleast_2d(vectors)
+        return np.asarray(self.v @ vectors.T).T
+
+    def solve(self, vectors) -> np.ndarray:
+        """ computes V^-1 @ vector for each row of vectors
+
+        Args:
+            vectors (numpy.ndarray): RDM vectors (N x n_valid)
+
+        Returns:
+            numpy.ndarray: solutions (N x n_valid)
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+        n_missing = self.n_dist - np.count_nonzero(self.valid)
+        if n_missing <= _MAX_MISSING and self._get_sigma_c() is not None:
+            if n_missing == 0:
+                return self._solve_complete(vectors)
+            schur = self._get_schur()
+            if schur:
+                w_missing, w_mm_factor = schur
+                full = np.zeros((len(vectors), self.n_dist))
+                full[:, self.valid] = vectors
+                full = self._solve_complete(full)
+                correction = linalg.cho_solve(
+                    w_mm_factor, full[:, ~self.valid].T).T @ w_missing
+                return full[:, self.valid] - correction
+        factor = self._get_factor()
+        if factor:
+            return linalg.cho_solve(factor, vectors.T).T
+        return np.array([scipy.sparse.linalg.cg(self.v, vec, atol=0)[0]
+                         for vec in vectors])
+
+    def _solve_complete(self, vectors, chunk_size: int = 256):
+        """ closed form solution for complete RDM vectors """
+        sigma_c = self._get_sigma_c()
+        rows, cols = np.triu_indices(self.n_cond, 1)
+        solution = np.empty_like(vectors)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            mats = np.zeros((len(chunk), self.n_cond, self.n_cond))
+            mats[:, rows, cols] = chunk
+            mats[:, cols, rows] = chunk
+            mats = sigma_c @ mats @ sigma_c
+            solution[start:start + chunk_size] = 0.5 * mats[:, rows, cols]
+        return solution
+
+    def _get_sigma_c(self):
+        """ pinv(P sigma_k P) for the centering matrix P or None if
+        sigma_k is singular
+        """
+        if self._sigma_c is None:
+            n_cond = self.n_cond
+            ones = np.ones((n_cond, n_cond)) / n_cond
+            if self.sigma_k is None:
+                self._sigma_c = np.eye(n_cond) - ones
+            else:
+                sigma_k = self.sigma_k
+                if sigma_k.ndim == 1:
+                    sigma_k = np.diag(sigma_k)
+                centering_mat = np.eye(n_cond) - ones
+                # the centered sigma_k must be invertible on the contrast
+                # space, which is orthogonal to the ones vector. A rank
+                # deficient sigma_k rarely makes inv raise, so the rank
+                # is checked explicitly.
+                mat = centering_mat @ sigma_k @ centering_mat + ones
+                self._sigma_c = False
+                if np.linalg.matrix_rank(mat, hermitian=True) == n_cond:
+                    try:
+                        self._sigma_c = np.linalg.inv(mat) - ones
+                    except np.linalg.LinAlgError:
+                        pass
+        if self._sigma_c is False:
+            return None
+        return self._sigma_c
+
+    def _get_schur(self):
+        """ rows of the complete V^-1 for the missing entries restricted
+        to the valid entries and the Cholesky factor of their block or
+        False if that block is not positive definite
+        """
+        if self._schur is None:
+            missing = np.nonzero(~self.valid)[0]
+            unit = np.zeros((len(missing), self.n_dist))
+            unit[np.arange(len(missing)), missing] = 1
+            w_rows = self._solve_complete(unit)
+            try:
+                self._schur = (w_rows[:, self.valid],
+                               linalg.cho_factor(w_rows[:, missing]))
+            except linalg.LinAlgError:
+                self._schur = False
+        return self._schur
+
+    def _get_factor(self):
+        """ Cholesky factor of V if it is small enough and positive
+        definite, else False
+        """
+        if self._factor is None:
+            self._factor = False
+            if self.v.shape[0] <= _MAX_DENSE_V:
+                try:
+                    self._factor = linalg.cho_factor(self.v.toarray())
+                except linalg.LinAlgError:
+                    pass
+        return self._factor
+
+
+class CovOperator:
+    """Precomputed whitening for the covariance weighted comparisons
+
+    Holds everything that depends only on the number of conditions,
+    sigma_k and the pattern of valid entries: the indicator and
+    double-centering matrices used by
+    `rsatoolbox.rdm.compare._cov_weighting` and the RDM covariance V
+    (`RDMCovariance`) used to solve V x = vector.
+    Instances are shared through `get_cov_operator` such that repeated
+    comparisons, e.g. in bootstrap loops, compute these only once.
+
+    Args:
+        n_cond (int):
+            number of conditions
+        sigma_k (numpy.ndarray):
+            optional, covariance between pattern estimates (1D or 2D)
+        nan_idx (numpy.ndarray):
+            optional, boolean vector of valid RDM entries
+
+    """
+
+    def __init__(self, n_cond, sigma_k=None, nan_idx=None):
+        self.n_cond = n_cond
+        self.n_dist = n_cond * (n_cond - 1) // 2
+        if nan_idx is None:
+            nan_idx = np.ones(self.n_dist, bool)
+        self.nan_idx = np.asarray(nan_idx, bool)
+        self.sigma_k = sigma_k
+        self._weighting = None
+        self._cov = RDMCovariance(n_cond, sigma_k, self.nan_idx)
+
+    def weight(self, vector):
+        """transforms RDM vectors into the isotropic second moment
+        representation computed by
+        `rsatoolbox.rdm.compare._cov_weighting`
+
+        Args:
+            vector (numpy.ndarray):
+                RDM vectors (2D) N x n_valid
+
+        Returns:
+            numpy.ndarray: weighted vectors (N x n_valid + n_cond)
+
+        """
+        if self._weighting is None:
+            self._weighting = self._prepare_weighting()
+        w = self._weighting
+        vector_w = -0.5 * np.c_[vector, np.zeros((vector.shape[0],
+                                                  self.n_cond))]
+        if 'proj' in w:
+            vector_w = vector_w - (vector_w @ w['sumI']) @ w['proj']
+        else:
+            # column and row means
+            m = vector_w @ w['sumI'] / self.n_cond
+            # Overall mean
+            mm = np.sum(vector_w * 2, axis=1, keepdims=True) \
+                / (self.n_cond * self.n_cond)
+            # subtract the column and row means and add overall mean
+            vector_w = vector_w - m @ w['sumI'].T + mm
+            if 'l_sigma_k' in w:
+                rows, cols = w['rows'], w['cols']
+                Gs = np.empty((vector.shape[0], self.n_cond, self.n_cond))
+                Gs[:, rows, cols] = vector_w
+                Gs[:, cols, rows] = vector_w
+                Gs = w['l_sigma_k'] @ Gs @ w['l_sigma_k'].T
+                vector_w = Gs[:, rows, cols]
+        vector_w *= w['scale']
+        return vector_w
+
+    def solve(self, vectors):
+        """computes V^-1 vector for each row of vectors, restricted
+        to the valid entries
+
+        Args:
+            vectors (numpy.ndarray):
+                RDM vectors (2D) N x n_valid
+
+        Returns:
+            numpy.ndarray: solutions (N x n_valid)
+
+        """
+        return self._cov.solve(vectors)
+
+    @property
+    def v(self):
+        """ the RDM covariance V restricted to the valid entries """
+        return self._cov.v
+
+    def _prepare_weighting(self):
+        n_cond = self.n_cond
+        n_dist = self.n_dist
+        sigma_k = self.sigma_k
+        rowI, colI = row_col_indicator_g(n_cond)
+        sumI = rowI + colI
+        nan_idx_ext = np.concatenate((self.nan_idx, np.ones(n_cond, bool)))
+        scale = np.ones(n_dist + n_cond)
+        # Weight the off-diagnoal terms double
+        scale[:n_dist] = np.sqrt(2)
+        w = {}
+        if np.all(self.nan_idx):
+            w['sumI'] = sumI
+            if sigma_k is not None and sigma_k.ndim == 2:
+                w['l_sigma_k'] = np.linalg.inv(np.linalg.cholesky(sigma_k))
+                rows, cols = np.triu_indices(n_cond, 1)
+                diag = np.arange(n_cond)
+                w['rows'] = np.concatenate((rows, diag))
+                w['cols'] = np.concatenate((cols, diag))
+        else:
+            if sigma_k is not None and sigma_k.ndim == 2:
+                raise ValueError('cannot handle sigma_k and nans')
+            sumI = sumI[nan_idx_ext]
+            # get matrix for double centering with missing values:
+            sumI[np.count_nonzero(self.nan_idx):, :] /= 2
+            diag = np.concatenate((
+                np.ones((np.count_nonzero(self.nan_idx), 1)) / 2,
+                np.ones((n_cond, 1))))
+            w['sumI'] = sumI
+            w['proj'] = np.linalg.inv(sumI.T @ (diag * sumI)) \
+                @ (diag * sumI).T
+        if sigma_k is not None and sigma_k.ndim == 1:
+            sigma_k_sqrt = np.sqrt(sigma_k)
+            scale = scale / (rowI @ sigma_k_sqrt) / (colI @ sigma_k_sqrt)
+        w['scale'] = scale[nan_idx_ext]
+        return w
+
+
+def get_cov_operator(n_cond, sigma_k=None, nan_idx=None):
+    """returns the cached `CovOperator` for n_cond, sigma_k and the
+    pattern of valid entries, creating it if necessary
+
+    Args:
+        n_cond (int):
+            number of conditions
+        sigma_k (numpy.ndarray):
+            optional, covariance between pattern estimates
+        nan_idx (numpy.ndarray):
+            optional, boolean vector of valid RDM entries
+
+    Returns:
+        CovOperator: the operator
+
+    """
+    if sigma_k is not None:
+        sigma_k = np.array(sigma_k, dtype=float)
+        sigma_key = (sigma_k.shape, hashlib.sha1(
+            np.ascontiguousarray(sigma_k).tobytes()).hexdigest())
+    else:
+        sigma_key = None
+    if nan_idx is None or np.all(nan_idx):
+        nan_idx = None
+        nan_key = None
+    else:
+        nan_idx = np.asarray(nan_idx, bool)
+        nan_key = (nan_idx.shape[0], np.packbits(nan_idx).tobytes())
+    key = (n_cond, sigma_key, nan_key)
+    cov_op = _COV_OPERATORS.pop(key, None)
+    if cov_op is None:
+        cov_op = CovOperator(n_cond, sigma_k, nan_idx)
+        if len(_COV_OPERATORS) >= _COV_OPERATOR_CACHE_SIZE:
+            _COV_OPERATORS.popitem(last=False)
+    _COV_OPERATORS[key] = cov_op
+    return cov_op
+
+
 def _row_col_indicator(row_i, col_i, n_cond):
     """ Helper function that writes the correct pattern for the
     row / column indicator matrix
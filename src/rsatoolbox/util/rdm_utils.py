@@ -160,6 +160,11 @@ def _parse_nan_vectors(vector1: NDArray, vector2: NDArray) -> Tuple[NDArray, NDA
     return vector1_no_nan, vector2_no_nan, not_nan_mask
 
 
+def _pair_index(rows: NDArray, cols: NDArray, n_cond: int) -> NDArray:
+    """ index of the pairs (rows < cols) in an RDM vector """
+    return n_cond * rows - rows * (rows + 1) // 2 + cols - rows - 1
+
+
 def _extract_triu_(X):
     """ extracts the upper triangular vector as a masked view
 
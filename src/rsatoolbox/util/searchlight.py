@@ -6,13 +6,23 @@ https://github.com/machow/pysearchlight
 
 @author: Daniel Lindh
 """
+import hashlib
+import os
 import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import cdist
 from tqdm import tqdm
 from joblib import Parallel, delayed
 from rsatoolbox.data.dataset import Dataset
 from rsatoolbox.rdm.calc import calc_rdm
 from rsatoolbox.rdm import RDMs
+from rsatoolbox.rdm import compare
+from rsatoolbox.rdm import concat
+from rsatoolbox.util.inference_util import input_check_model
+
+_BATCHED_METHODS = ('euclidean', 'correlation', 'mahalanobis')
 
 
 def _get_searchlight_neighbors(mask, center, radius=3):
@@ -47,11 +57,88 @@ def _get_searchlight_neighbors(mask, center, radius=3):
     return tuple(data[distance < radius].T.tolist())
 
 
-def get_volume_searchlight(mask, radius=2, threshold=1.0):
+class SearchlightNeighbors:
+    """Neighbors of a set of searchlights in compressed sparse row form
+
+    The neighbors of searchlight i are indices[indptr[i]:indptr[i + 1]].
+    Indexing with an integer returns this array, indexing with a slice
+    or an index array returns a new SearchlightNeighbors object, such that
+    this can be used in place of a list of neighbor lists.
+
+    Args:
+        indptr (numpy.ndarray): n_centers + 1 offsets into indices
+        indices (numpy.ndarray): concatenated neighbor voxel indices
+
+    """
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.intp)
+        self.indices = np.asarray(indices, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            return self.indices[self.indptr[key]:self.indptr[key + 1]]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                indptr = self.indptr[start:max(start, stop) + 1]
+                return SearchlightNeighbors(
+                    indptr - indptr[0],
+                    self.indices[indptr[0]:indptr[-1]])
+            key = np.arange(start, stop, step)
+        key = np.arange(len(self))[key]
+        lengths = self.indptr[key + 1] - self.indptr[key]
+        indptr = np.zeros(len(key) + 1, dtype=np.intp)
+        indptr[1:] = np.cumsum(lengths)
+        if len(key) > 0:
+            indices = np.concatenate([self[int(k)] for k in key])
+        else:
+            indices = np.zeros(0, dtype=np.intp)
+        return SearchlightNeighbors(indptr, indices)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _get_sphere_offsets(radius):
+    """Offsets of all voxels closer than radius to the center voxel
+
+    Args:
+        radius (float): searchlight radius in voxels
+
+    Returns:
+        numpy.ndarray: n_offsets x 3 integer offsets in C order
+    """
+    span = int(np.ceil(radius)) - 1
+    grid = np.arange(-span, span + 1)
+    offsets = np.stack(np.meshgrid(grid, grid, grid, indexing='ij'),
+                       axis=-1).reshape(-1, 3)
+    return offsets[np.sqrt(np.sum(offsets ** 2, axis=1)) < radius]
+
+
+def _mask_hash(mask):
+    """hash of the content, shape and dtype of a mask"""
+    mask = np.ascontiguousarray(mask)
+    sha = hashlib.sha1(mask.tobytes())
+    sha.update(str((mask.shape, mask.dtype.str)).encode())
+    return sha.hexdigest()
+
+
+def get_volume_searchlight(mask, radius=2, threshold=1.0, cache_dir=None,
+                           batch_size=10000):
     """
     Searches through the non-zero voxels of the mask, selects centers where
     proportion of sphere voxels >= self.threshold.
 
+    The sphere is computed once as a stencil of voxel offsets, which is
+    applied to batches of centers at once.
+
     Args:
 
         mask ([numpy array]): binary brain mask
@@ -67,42 +154,177 @@ def get_volume_searchlight(mask, radius=2, threshold=1.0):
         the brain mask.
         Defaults to 1.0.
 
+        cache_dir (str or Path, optional): directory to cache the searchlights in.
+        Results are stored keyed by a hash of the mask, the radius and the threshold
+        and are loaded from there if they were computed before.
+        Defaults to no caching.
+
+        batch_size (int, optional): number of centers processed together.
+        Defaults to 10000.
+
     Returns:
-        numpy array: array of centers of size n_centers x 3
+        numpy array: array of centers of size n_centers
 
-        list: list of lists with neighbors - the length of the list will correspond to:
-        n_centers x 3 x n_neighbors
+        SearchlightNeighbors: the flat volume indices of the neighbors of each center
     """
 
     mask = np.array(mask)
     assert mask.ndim == 3, "Mask needs to be a 3-dimensional numpy array"
 
-    centers = list(zip(*np.nonzero(mask)))
+    if cache_dir is not None:
+        cache_file = os.path.join(
+            cache_dir,
+            f'searchlight_{_mask_hash(mask)}_r{radius}_t{threshold}.npz')
+        if os.path.isfile(cache_file):
+            with np.load(cache_file) as cached:
+                return cached['centers'], SearchlightNeighbors(
+                    cached['indptr'], cached['indices'])
+
+    offsets = _get_sphere_offsets(radius)
+    shape = np.array(mask.shape)
+    mask_flat = mask.ravel()
+    centers = np.stack(np.nonzero(mask), axis=-1)
     good_centers = []
-    good_neighbors = []
+    lengths = []
+    indices = []
+    batches = range(0, len(centers), batch_size)
+    for start in tqdm(batches, desc='Finding searchlights...'):
+        batch = centers[start:start + batch_size]
+        coords = batch[:, None, :] + offsets
+        inside = np.all((coords >= 0) & (coords < shape), axis=2)
+        flat = np.ravel_multi_index(
+            tuple(np.moveaxis(np.clip(coords, 0, shape - 1), -1, 0)),
+            mask.shape)
+        n_inside = np.sum(inside, axis=1)
+        proportion = np.sum(mask_flat[flat] * inside, axis=1) / n_inside
+        good = proportion >= threshold
+        good_centers.append(np.ravel_multi_index(batch[good].T, mask.shape))
+        lengths.append(n_inside[good])
+        indices.append(flat[good][inside[good]])
+    if len(centers) > 0:
+        good_centers = np.concatenate(good_centers)
+        lengths = np.concatenate(lengths)
+        indices = np.concatenate(indices)
+    else:
+        good_centers = np.zeros(0, dtype=np.intp)
+        lengths = np.zeros(0, dtype=np.intp)
+        indices = np.zeros(0, dtype=np.intp)
+    indptr = np.zeros(len(lengths) + 1, dtype=np.intp)
+    indptr[1:] = np.cumsum(lengths)
+    print(f'Found {len(good_centers)} searchlights')
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.savez(cache_file, centers=good_centers, indptr=indptr,
+                 indices=indices)
+    return good_centers, SearchlightNeighbors(indptr, indices)
+
+
+def get_surface_searchlight(vertices, faces, radius=10.0, mask=None,
+                            metric='geodesic', batch_size=256):
+    """
+    Finds the searchlights on a triangulated surface, i.e. for each vertex
+    all vertices within radius along the mesh.
 
-    for center in tqdm(centers, desc='Finding searchlights...'):
-        neighbors = _get_searchlight_neighbors(mask, center, radius)
-        if mask[neighbors].mean() >= threshold:
-            good_centers.append(center)
-            good_neighbors.append(neighbors)
+    Distances are computed by a bounded Dijkstra search on the sparse
+    vertex adjacency of the mesh, run for batches of centers at once.
 
-    good_centers = np.array(good_centers)
-    assert good_centers.shape[0] == len(good_neighbors),\
-        "number of centers and sets of neighbors do not match"
-    print(f'Found {len(good_neighbors)} searchlights')
+    Args:
+
+        vertices ([numpy array]): n_vertices x 3 vertex coordinates
+
+        faces ([numpy array]): n_faces x 3 vertex indices of the triangles
+
+        radius (float, optional): the radius of each searchlight. In the units of
+        the vertex coordinates for metric='geodesic' and in edges for metric='ring'.
+        Vertices with a distance <= radius are included.
+        Defaults to 10.0.
+
+        mask ([numpy array], optional): boolean array of length n_vertices.
+        Only vertices in the mask are used as centers or neighbors and paths
+        cannot pass outside of the mask.
+        Defaults to all vertices.
 
-    # turn the 3-dim coordinates to array coordinates
-    centers = np.ravel_multi_index(good_centers.T, mask.shape)
-    neighbors = [np.ravel_multi_index(n, mask.shape) for n in good_neighbors]
+        metric (str, optional): 'geodesic' to measure distances along the edges of
+        the mesh or 'ring' to count edges, i.e. to get the k-ring around each vertex.
+        Defaults to 'geodesic'.
 
-    return centers, neighbors
+        batch_size (int, optional): number of centers processed together.
+        Defaults to 256.
+
+    Returns:
+        numpy array: array of centers (vertex indices) of size n_centers
+
+        SearchlightNeighbors: the vertex indices of the neighbors of each center
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    faces = np.asarray(faces, dtype=np.intp)
+    assert vertices.ndim == 2 and vertices.shape[1] == 3, \
+        "vertices need to be a n_vertices x 3 array"
+    assert faces.ndim == 2 and faces.shape[1] == 3, \
+        "faces need to be a n_faces x 3 array"
+    if metric not in ('geodesic', 'ring'):
+        raise ValueError(f'Unknown searchlight metric: {metric}')
+    n_vertices = vertices.shape[0]
+    if mask is None:
+        mask = np.ones(n_vertices, dtype=bool)
+    else:
+        mask = np.asarray(mask, dtype=bool)
+
+    # each edge once, restricted to the mask
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    edges = np.unique(np.sort(edges, axis=1), axis=0)
+    edges = edges[mask[edges[:, 0]] & mask[edges[:, 1]]]
+    edge_lengths = np.sqrt(np.sum(
+        (vertices[edges[:, 0]] - vertices[edges[:, 1]]) ** 2, axis=1))
+    graph = csr_matrix((edge_lengths, (edges[:, 0], edges[:, 1])),
+                       shape=(n_vertices, n_vertices))
+
+    # paths shorter than radius stay within this euclidean distance of the
+    # center, such that each batch only needs the subgraph around it
+    if metric == 'ring':
+        bound = radius * (np.max(edge_lengths) if len(edges) > 0 else 0)
+    else:
+        bound = radius
+    tree = cKDTree(vertices)
+    centers = np.flatnonzero(mask)
+    lengths = []
+    indices = []
+    batches = range(0, len(centers), batch_size)
+    for start in tqdm(batches, desc='Finding searchlights...'):
+        batch = centers[start:start + batch_size]
+        balls = tree.query_ball_point(vertices[batch], bound)
+        candidates = np.unique(np.concatenate(
+            [batch] + [np.asarray(b, dtype=np.intp) for b in balls]))
+        candidates = candidates[mask[candidates]]
+        dist = dijkstra(graph[candidates][:, candidates], directed=False,
+                        indices=np.searchsorted(candidates, batch),
+                        unweighted=(metric == 'ring'), limit=radius)
+        rows, cols = np.nonzero(dist <= radius)
+        lengths.append(np.bincount(rows, minlength=dist.shape[0]))
+        indices.append(candidates[cols])
+    if len(centers) > 0:
+        lengths = np.concatenate(lengths)
+        indices = np.concatenate(indices)
+    else:
+        indices = np.zeros(0, dtype=np.intp)
+    indptr = np.zeros(len(centers) + 1, dtype=np.intp)
+    indptr[1:] = np.cumsum(lengths)
+    print(f'Found {len(centers)} searchlights')
+    return centers, SearchlightNeighbors(indptr, indices)
 
 
 def get_searchlight_RDMs(data_2d, centers, neighbors, events,
-                         method='correlation', verbose=True):
+                         method='correlation', verbose=True, n_jobs=1,
+                         chunk_size=1000, out=None, backend=None):
     """Iterates over all the searchlight centers and calculates the RDM
 
+    The searchlights are processed in chunks of chunk_size centers, which
+    can be distributed over n_jobs workers. Each finished chunk is written
+    into out directly, such that only n_jobs chunks are held in memory
+    besides out. Passing a np.memmap or h5py dataset as out keeps the peak
+    memory independent of the number of searchlights.
+
     Args:
 
         data_2d (2D numpy array): brain data,
@@ -110,76 +332,190 @@ def get_searchlight_RDMs(data_2d, centers, neighbors, events,
 
         centers (1D numpy array): center indices for all searchlights as provided
         by rsatoolbox.util.searchlight.get_volume_searchlight
+        or rsatoolbox.util.searchlight.get_surface_searchlight
 
-        neighbors (list): list of lists with neighbor voxel indices for all searchlights
-        as provided by rsatoolbox.util.searchlight.get_volume_searchlight
+        neighbors (SearchlightNeighbors or list): neighbor voxel indices for all
+        searchlights as provided by rsatoolbox.util.searchlight.get_volume_searchlight
+        or a list of lists of them
 
         events (1D numpy array): 1D array of length n_observations
 
         method (str, optional): distance metric,
         see rsatoolbox.rdm.calc for options. Defaults to 'correlation'.
+        'euclidean', 'correlation' and 'mahalanobis' are computed for all
+        searchlights at once, other methods build one Dataset per center.
 
         verbose (bool, optional): Defaults to True.
 
+        n_jobs (int, optional): how many jobs to run. Defaults to 1.
+
+        chunk_size (int, optional): number of searchlights per chunk.
+        Defaults to 1000.
+
+        out (array-like, optional): preallocated n_centers x n_pairs array,
+        e.g. a np.memmap or h5py dataset, the dissimilarities are written to.
+        Defaults to a new in-memory array. An h5py dataset is stored in the
+        returned RDMs as it is, such that the RDMs are only valid while
+        the file is open and only support reading the dissimilarities in
+        chunks, as evaluate_models_searchlight_fixed does. Use
+        RDMs(np.asarray(out), ...) or a np.memmap for other operations.
+
+        backend (str, optional): joblib backend used for n_jobs > 1, e.g.
+        'loky' for processes or 'threading' for threads.
+        Defaults to the joblib default.
+
     Returns:
         RDM [rsatoolbox.rdm.RDMs]: RDMs object with the RDM for each searchlight
                               the RDM.rdm_descriptors['voxel_index']
                               describes the center voxel index each RDM is associated with
+                              its dissimilarities are out if it was passed
     """
 
     data_2d, centers = np.array(data_2d), np.array(centers)
     n_centers = centers.shape[0]
-
-    # For memory reasons, we chunk the data if we have more than 1000 RDMs
-    if n_centers > 1000:
-        # we can't run all centers at once, that will take too much memory
-        # so lets to some chunking
-        chunked_center = np.split(np.arange(n_centers),
-                                  np.linspace(0, n_centers,
-                                              101, dtype=int)[1:-1])
-
-        # loop over chunks
-        n_conds = len(np.unique(events))
-        RDM = np.zeros((n_centers, n_conds * (n_conds - 1) // 2))
-        for chunks in tqdm(chunked_center, desc='Calculating RDMs...'):
-            center_data = []
-            for c in chunks:
-                # grab this center and neighbors
-                center = centers[c]
-                center_neighbors = neighbors[c]
-                # create a database object with this data
-                ds = Dataset(data_2d[:, center_neighbors],
-                             descriptors={'center': center},
-                             obs_descriptors={'events': events},
-                             channel_descriptors={'voxels': center_neighbors})
-                center_data.append(ds)
-
-            RDM_corr = calc_rdm(center_data, method=method,
-                                descriptor='events')
-            RDM[chunks, :] = RDM_corr.dissimilarities
+    n_conds = len(np.unique(events))
+    n_pairs = n_conds * (n_conds - 1) // 2
+    if out is None:
+        out = np.zeros((n_centers, n_pairs))
+    elif tuple(out.shape) != (n_centers, n_pairs):
+        raise ValueError(
+            f'out must have shape {(n_centers, n_pairs)}, got {out.shape}')
+    starts = range(0, n_centers, chunk_size)
+
+    if method in _BATCHED_METHODS:
+        means = _average_conditions(data_2d, events, method)
+        incidence = _searchlight_incidence(neighbors, data_2d.shape[1])
+        jobs = (delayed(_calc_searchlight_chunk)(
+                    means, incidence[start:start + chunk_size], method)
+                for start in starts)
     else:
-        center_data = []
-        for c in range(n_centers):
-            # grab this center and neighbors
-            center = centers[c]
-            nb = neighbors[c]
-            # create a database object with this data
-            ds = Dataset(data_2d[:, nb],
-                         descriptors={'center': c},
-                         obs_descriptors={'events': events},
-                         channel_descriptors={'voxels': nb})
-            center_data.append(ds)
-        # calculate RDMs for each database object
-        RDM = calc_rdm(center_data, method=method,
-                       descriptor='events').dissimilarities
-
-    SL_rdms = RDMs(RDM,
+        jobs = (delayed(_calc_searchlight_chunk_datasets)(
+                    data_2d, centers[start:start + chunk_size],
+                    neighbors[start:start + chunk_size], events, method)
+                for start in starts)
+    results = Parallel(n_jobs=n_jobs, backend=backend,
+                       return_as='generator')(jobs)
+    for start, rdm_chunk in zip(starts, tqdm(
+            results, total=len(starts), desc='Calculating RDMs...',
+            disable=not verbose)):
+        out[start:start + chunk_size] = rdm_chunk
+
+    SL_rdms = RDMs(out,
                    rdm_descriptors={'voxel_index': centers},
                    dissimilarity_measure=method)
 
     return SL_rdms
 
 
+def _searchlight_incidence(neighbors, n_voxel):
+    """Sparse indicator matrix of searchlight membership
+
+    Args:
+        neighbors (SearchlightNeighbors or list): neighbor voxel indices
+            for each searchlight
+        n_voxel (int): total number of voxels / channels
+
+    Returns:
+        scipy.sparse.csr_matrix: n_centers x n_voxel matrix with a one for
+        each voxel that belongs to a searchlight
+    """
+    if isinstance(neighbors, SearchlightNeighbors):
+        return csr_matrix(
+            (np.ones(len(neighbors.indices)), neighbors.indices,
+             neighbors.indptr),
+            shape=(len(neighbors), n_voxel))
+    indices = [np.asarray(nb, dtype=np.intp).ravel() for nb in neighbors]
+    indptr = np.zeros(len(indices) + 1, dtype=np.intp)
+    indptr[1:] = np.cumsum([len(nb) for nb in indices])
+    if len(indices) > 0:
+        indices = np.concatenate(indices)
+    else:
+        indices = np.zeros(0, dtype=np.intp)
+    return csr_matrix(
+        (np.ones(len(indices)), indices, indptr),
+        shape=(len(neighbors), n_voxel))
+
+
+def _average_conditions(data_2d, events, method):
+    """Averages the observations of each condition for the whole brain
+
+    Conditions are sorted as calc_rdm sorts them. For correlation distances
+    the mean of each pattern is removed, which leaves the correlations
+    unchanged, but reduces cancellation in _calc_searchlight_chunk.
+
+    Returns:
+        numpy.ndarray: n_conds x n_voxel condition means
+    """
+    _, inverse = np.unique(np.asarray(events), return_inverse=True)
+    inverse = inverse.ravel()
+    n_cond = inverse.max() + 1
+    cond_indicator = csr_matrix(
+        (np.ones(len(inverse)), (inverse, np.arange(len(inverse)))),
+        shape=(n_cond, len(inverse)))
+    means = cond_indicator @ data_2d
+    means = means / np.bincount(inverse)[:, None]
+    if method == 'correlation':
+        means = means - means.mean(axis=1, keepdims=True)
+    return means
+
+
+def _calc_searchlight_chunk(means, incidence, method):
+    """Computes the RDMs of a chunk of searchlights without building Datasets
+
+    All dissimilarities are expressed through sums over the searchlight
+    voxels of per-voxel quantities, which are aggregated by multiplication
+    with the sparse center x voxel incidence matrix.
+
+    Args:
+        means (numpy.ndarray): n_conds x n_voxel condition means
+            as computed by _average_conditions
+        incidence (scipy.sparse.csr_matrix): n_centers x n_voxel
+            searchlight membership as computed by _searchlight_incidence
+        method (str): 'euclidean', 'correlation' or 'mahalanobis'
+            (without noise, i.e. equal to euclidean)
+
+    Returns:
+        numpy.ndarray: n_centers x n_pairs dissimilarities
+    """
+    if method not in _BATCHED_METHODS:
+        raise ValueError(
+            f'batched searchlight RDMs are not available for {method}')
+    rows, cols = np.triu_indices(means.shape[0], 1)
+    # restrict to the voxels touched by this chunk
+    used = np.unique(incidence.indices)
+    incidence = incidence[:, used]
+    m = means[:, used]
+    n_vox = np.asarray(incidence.sum(axis=1))
+    if method == 'correlation':
+        sums = incidence @ m.T
+        sq_sums = incidence @ (m.T ** 2)
+        cross = incidence @ (m[rows].T * m[cols].T)
+        mu = sums / n_vox
+        var = sq_sums - sums * mu
+        cov = cross - sums[:, rows] * mu[:, cols]
+        return 1 - cov / np.sqrt(var[:, rows] * var[:, cols])
+    return (incidence @ ((m[rows] - m[cols]).T ** 2)) / n_vox
+
+
+def _calc_searchlight_chunk_datasets(data_2d, centers, neighbors, events,
+                                     method):
+    """Computes the RDMs of a chunk of searchlights through calc_rdm
+
+    Returns:
+        numpy.ndarray: n_centers x n_pairs dissimilarities
+    """
+    center_data = []
+    for center, nb in zip(centers, neighbors):
+        # create a database object with this data
+        ds = Dataset(data_2d[:, nb],
+                     descriptors={'center': center},
+                     obs_descriptors={'events': events},
+                     channel_descriptors={'voxels': nb})
+        center_data.append(ds)
+    return calc_rdm(center_data, method=method,
+                    descriptor='events').dissimilarities
+
+
 def evaluate_models_searchlight(sl_RDM, models, eval_function, method='corr', theta=None, n_jobs=1):
     """evaluates each searchlighth with the given model/models
 
@@ -199,6 +535,10 @@ def evaluate_models_searchlight(sl_RDM, models, eval_function, method='corr', th
     Returns:
 
         list: list of with the model evaluation for each searchlight center
+
+    For models with fixed parameters evaluated by eval_fixed,
+    evaluate_models_searchlight_fixed computes the same evaluations
+    for all searchlights at once.
     """
 
     results = Parallel(n_jobs=n_jobs)(
@@ -207,3 +547,45 @@ def evaluate_models_searchlight(sl_RDM, models, eval_function, method='corr', th
             sl_RDM, desc='Evaluating models for each searchlight'))
 
     return results
+
+
+def evaluate_models_searchlight_fixed(sl_RDM, models, method='corr', theta=None,
+                                      sigma_k=None, chunk_size=10000):
+    """evaluates all searchlights with the given model/models at once
+
+    This computes the evaluations of
+    rsatoolbox.inference.eval_fixed for each searchlight, but predicts
+    the model RDMs only once and compares them to the dissimilarities of
+    chunk_size searchlights at a time.
+
+    Args:
+
+        sl_RDM ([rsatoolbox.rdm.RDMs]): RDMs object
+        as computed by rsatoolbox.util.searchlight.get_searchlight_RDMs
+
+        models ([rsatoolbox.model]: models to evaluate - can also be list of models
+
+        method (str, optional): see rsatoolbox.rdm.compare for specifics. Defaults to 'corr'.
+
+        theta (list, optional): parameters for each model. Defaults to the model defaults.
+
+        sigma_k (numpy.ndarray, optional): pattern covariance for the 'cosine_cov'
+        and 'corr_cov' methods. Defaults to None.
+
+        chunk_size (int, optional): number of searchlights compared at once.
+        Defaults to 10000.
+
+    Returns:
+
+        numpy.ndarray: n_searchlight x n_model evaluations
+    """
+    models, _, theta, _ = input_check_model(models, theta, None, 1)
+    predictions = concat([model.predict_rdm(theta=theta[k])
+                          for k, model in enumerate(models)])
+    dissimilarities = sl_RDM.dissimilarities
+    evaluations = np.empty((dissimilarities.shape[0], len(models)))
+    for start in range(0, dissimilarities.shape[0], chunk_size):
+        evaluations[start:start + chunk_size] = compare(
+            np.asarray(dissimilarities[start:start + chunk_size]),
+            predictions, method=method, sigma_k=sigma_k)
+    return evaluations
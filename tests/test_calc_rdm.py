@@ -170,6 +170,34 @@ class TestCalcRDM(unittest.TestCase):
         )
         assert rdm.n_cond == 6
 
+    @parameterized.expand([
+        [False, False],
+        [True, False],
+        [False, True],
+        [True, True],
+    ])
+    def test_calc_crossnobis_stacked(self, use_noise, remove_mean):
+        """the stacked computation must match the fold by fold one
+        """
+        if use_noise:
+            noise = self.rng.standard_normal((10, 5))
+            noise = np.matmul(noise.T, noise)
+        else:
+            noise = None
+        rdm1 = rsr.calc_rdm_crossnobis(
+            self.test_data, descriptor='conds', cv_descriptor='fold',
+            noise=noise, remove_mean=remove_mean)
+        with patch('rsatoolbox.rdm.calc._calc_rdm_crossnobis_stacked',
+                   return_value=None):
+            rdm2 = rsr.calc_rdm_crossnobis(
+                self.test_data, descriptor='conds', cv_descriptor='fold',
+                noise=noise, remove_mean=remove_mean)
+        assert_array_almost_equal(
+            rdm1.dissimilarities, rdm2.dissimilarities)
+        assert_array_equal(
+            rdm1.pattern_descriptors['conds'],
+            rdm2.pattern_descriptors['conds'])
+
     def test_calc_crossnobis_order(self):
         measurements = np.zeros((20, 5))
         measurements[3, 1] = 1
@@ -371,6 +399,36 @@ class TestCalcRDM(unittest.TestCase):
             self.test_data.obs_descriptors['conds']
         )
 
+    @parameterized.expand([
+        ['euclidean', None, False],
+        ['euclidean', 'conds', True],
+        ['correlation', 'conds', False],
+        ['mahalanobis', 'conds', True],
+    ])
+    def test_calc_multi_ds_batched(self, method, descriptor, remove_mean):
+        """The batched computation for datasets with equal observations
+        must match computing the RDMs one dataset at a time.
+        """
+        datasets = self.test_data.split_channel(by='rois')
+        for i_ds, dataset in enumerate(datasets):
+            dataset.descriptors['run'] = [i_ds]
+        rdms = rsr.calc_rdm(
+            datasets, method=method, descriptor=descriptor,
+            remove_mean=remove_mean)
+        with patch('rsatoolbox.rdm.calc._calc_rdm_batched',
+                   return_value=None):
+            rdms_loop = rsr.calc_rdm(
+                datasets, method=method, descriptor=descriptor,
+                remove_mean=remove_mean)
+        assert_array_almost_equal(
+            rdms.dissimilarities, rdms_loop.dissimilarities)
+        self.assertEqual(
+            rdms.dissimilarity_measure, rdms_loop.dissimilarity_measure)
+        for name, value in rdms_loop.rdm_descriptors.items():
+            assert_array_equal(rdms.rdm_descriptors[name], value)
+        for name, value in rdms_loop.pattern_descriptors.items():
+            assert_array_equal(rdms.pattern_descriptors[name], value)
+
     def test_calc_with_descriptors_as_list(self):
         """Can the calc methods deal with descriptors
         that are defined as List.
@@ -526,6 +584,168 @@ class TestCalcRDMMovie(unittest.TestCase):
         assert len([r for r in rdm]) == 5
         assert rdm.rdm_descriptors['time'][0] == np.mean(time[:3])
 
+    @parameterized.expand([
+        ['euclidean', None],
+        ['correlation', None],
+        ['mahalanobis', 'noise'],
+        ['crossnobis', None],
+        ['crossnobis', 'noise'],
+    ])
+    def test_calc_rdm_movie_batched(self, method, use_noise):
+        """the batched movie must match the time point by time point one
+        """
+        noise = None
+        if use_noise:
+            noise = self.rng.standard_normal((10, 5))
+            noise = np.matmul(noise.T, noise)
+        rdm1 = rsr.calc_rdm_movie(
+            self.test_data_time, method=method, descriptor='conds',
+            noise=noise, cv_descriptor='fold')
+        with patch('rsatoolbox.rdm.calc._calc_rdm_movie_batched',
+                   return_value=None):
+            rdm2 = rsr.calc_rdm_movie(
+                self.test_data_time, method=method, descriptor='conds',
+                noise=noise, cv_descriptor='fold')
+        assert_array_almost_equal(
+            rdm1.dissimilarities, rdm2.dissimilarities)
+        assert_array_equal(
+            rdm1.pattern_descriptors['conds'],
+            rdm2.pattern_descriptors['conds'])
+        assert_array_equal(
+            rdm1.rdm_descriptors['time'], rdm2.rdm_descriptors['time'])
+        assert rdm1.dissimilarity_measure == rdm2.dissimilarity_measure
+
+    @parameterized.expand([[None], ['noise']])
+    def test_calc_rdm_generalization(self, use_noise):
+        """matched time points must give the crossnobis RDM movie
+        """
+        noise = None
+        if use_noise:
+            noise = self.rng.standard_normal((10, 5))
+            noise = np.matmul(noise.T, noise)
+        rdm = rsr.calc_rdm_generalization(
+            self.test_data_time_balanced, 'conds', noise=noise,
+            cv_descriptor='fold', chunk_size=4)
+        movie = rsr.calc_rdm_movie(
+            self.test_data_time_balanced, method='crossnobis',
+            descriptor='conds', noise=noise, cv_descriptor='fold')
+        assert rdm.n_rdm == 15 * 15
+        matched = rdm.subset('index', np.arange(15) * 16)
+        assert_array_almost_equal(
+            matched.dissimilarities, movie.dissimilarities)
+        assert_array_equal(
+            matched.rdm_descriptors['time'],
+            matched.rdm_descriptors['time_test'])
+        assert_array_equal(
+            rdm.pattern_descriptors['conds'],
+            movie.pattern_descriptors['conds'])
+
+    def test_calc_rdm_generalization_hdf5(self):
+        import io
+        f = io.BytesIO()  # Essentially a Mock file
+        rdm = rsr.calc_rdm_generalization(
+            self.test_data_time_balanced, 'conds', cv_descriptor='fold')
+        out = rsr.calc_rdm_generalization(
+            self.test_data_time_balanced, 'conds', cv_descriptor='fold',
+            filename=f, chunk_size=4)
+        assert out is None
+        rdm_loaded = rsr.load_rdm(f, file_type='hdf5')
+        assert_array_almost_equal(
+            rdm.dissimilarities, rdm_loaded.dissimilarities)
+        assert_array_almost_equal(
+            rdm.rdm_descriptors['time_test'],
+            rdm_loaded.rdm_descriptors['time_test'])
+
+    def test_calc_rdm_generalization_h5py(self):
+        import os
+        import tempfile
+        from h5py import File
+        rdm = rsr.calc_rdm_generalization(
+            self.test_data_time_balanced, 'conds', cv_descriptor='fold')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'generalization.hdf5')
+            with File(filename, 'w') as file:
+                rsr.calc_rdm_generalization(
+                    self.test_data_time_balanced, 'conds',
+                    cv_descriptor='fold', filename=file, chunk_size=4)
+                self.assertTrue(bool(file))
+            rdm_loaded = rsr.load_rdm(filename)
+            assert_array_almost_equal(
+                rdm.dissimilarities, rdm_loaded.dissimilarities)
+            with self.assertRaises(ValueError):
+                rsr.calc_rdm_generalization(
+                    self.test_data_time_balanced, 'conds',
+                    cv_descriptor='fold', filename=filename)
+
+
+class TestCalcRDMMovieStream(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.measurements = self.rng.random((20, 5, 30))
+        self.time = np.linspace(0, 200, 30)
+        self.obs_des = {
+            'conds': np.array(
+                [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+            ),
+            'fold': np.array(
+                [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+            ),
+        }
+
+    @parameterized.expand([
+        ['euclidean', 4, 4],
+        ['correlation', 5, 3],
+        ['mahalanobis', 3, 7],
+        ['crossnobis', 4, 2],
+    ])
+    def test_stream_matches_binned_movie(self, method, window, stride):
+        """the streamed frames must match calc_rdm_movie with bins
+        """
+        noise = self.rng.standard_normal((10, 5))
+        noise = np.matmul(noise.T, noise)
+        dataset = rsa.data.TemporalDataset(
+            self.measurements,
+            obs_descriptors=self.obs_des,
+            time_descriptors={'time': self.time})
+        bins = [self.time[i:i + window]
+                for i in range(0, len(self.time) - window + 1, stride)]
+        rdm1 = rsr.calc_rdm_movie(
+            dataset, method=method, descriptor='conds', noise=noise,
+            cv_descriptor='fold', bins=bins)
+        frames = rsr.calc_rdm_movie_stream(
+            self.measurements, self.obs_des, window, stride,
+            method=method, descriptor='conds', noise=noise,
+            cv_descriptor='fold', time=self.time, chunk_size=4)
+        rdm2 = rsr.concat(list(frames))
+        assert_array_almost_equal(
+            rdm1.dissimilarities, rdm2.dissimilarities)
+        assert_array_almost_equal(
+            rdm1.rdm_descriptors['time'], rdm2.rdm_descriptors['time'])
+
+    def test_stream_generalization(self):
+        """lagged frames contain the cross time dissimilarities
+        """
+        chunks = (self.measurements[:, :, i] for i in range(30))
+        frames = list(rsr.calc_rdm_movie_stream(
+            chunks, self.obs_des, 5, descriptor='conds', n_lag=2))
+        assert len(frames) == 6
+        assert frames[0].n_rdm == 1
+        assert frames[4].n_rdm == 3
+        assert_array_equal(frames[4].rdm_descriptors['time_ref'],
+                           [22, 17, 12])
+        means = self.measurements.reshape(20, 5, 6, 5).mean(axis=3)
+        means = np.stack([means[self.obs_des['conds'] == c]
+                          for c in range(5)]).mean(axis=1)
+        rows, cols = np.triu_indices(5, 1)
+        diff = means[rows] - means[cols]
+        assert_array_almost_equal(
+            frames[4].dissimilarities[2],
+            np.sum(diff[:, :, 4] * diff[:, :, 2], axis=1) / 5)
+        assert_array_almost_equal(
+            frames[4].dissimilarities[0],
+            np.sum(diff[:, :, 4] ** 2, axis=1) / 5)
+
 
 class CvDescriptorTests(unittest.TestCase):
 
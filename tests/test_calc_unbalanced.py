@@ -3,6 +3,7 @@
 """ tests for calculation of unbalanced RDMs
 """
 import unittest
+from copy import deepcopy
 from unittest.mock import patch
 import numpy as np
 from parameterized import parameterized
@@ -307,3 +308,43 @@ class TestCalcUnbalancedRDM(unittest.TestCase):
             rdms.pattern_descriptors['conds'],
             self.test_data.obs_descriptors['conds']
         )
+
+    @parameterized.expand([
+        [method, weighting]
+        for method in ALL_METHODS for weighting in ['number', 'equal']
+    ])
+    def test_calc_blas_engine(self, method, weighting):
+        """the blas engine must match the cython engine,
+        including rows with missing channels
+        """
+        data = deepcopy(self.test_data)
+        if method not in ('mahalanobis', 'crossnobis'):
+            data.measurements[[1, 4, 5], [0, 2, 2]] = np.nan
+        noise = None
+        if method == 'crossnobis':
+            noise = self.rng.random((10, 5))
+            noise = np.matmul(noise.T, noise)
+        cv_descriptor = 'fold' if method in ('crossnobis', 'poisson_cv') \
+            else None
+        rdm_c = rsr.calc_rdm_unbalanced(
+            data, descriptor='conds', cv_descriptor=cv_descriptor,
+            method=method, noise=noise, weighting=weighting)
+        rdm_blas = rsr.calc_rdm_unbalanced(
+            data, descriptor='conds', cv_descriptor=cv_descriptor,
+            method=method, noise=noise, weighting=weighting, engine='blas')
+        assert_array_almost_equal(
+            rdm_c.dissimilarities, rdm_blas.dissimilarities)
+
+    @parameterized.expand(ALL_METHODS)
+    def test_calc_n_threads(self, method):
+        """the parallel cython kernel must match the serial one"""
+        cv_descriptor = 'fold' if method in ('crossnobis', 'poisson_cv') \
+            else None
+        rdm_1 = rsr.calc_rdm_unbalanced(
+            self.test_data, descriptor='conds', cv_descriptor=cv_descriptor,
+            method=method)
+        rdm_2 = rsr.calc_rdm_unbalanced(
+            self.test_data, descriptor='conds', cv_descriptor=cv_descriptor,
+            method=method, n_threads=2)
+        assert_array_almost_equal(
+            rdm_1.dissimilarities, rdm_2.dissimilarities)
@@ -216,6 +216,20 @@ class TestCompareRDM(unittest.TestCase):
         result = compare_kendall_tau_a(self.test_rdm1, self.test_rdm2)
         assert np.all(result < 1)
 
+    def test_kendall_tau_batched(self):
+        from rsatoolbox.rdm.compare import _all_combinations
+        from rsatoolbox.rdm.compare import _kendall_tau, _tau_a
+        from rsatoolbox.rdm.compare import _kendall_tau_batched
+        vectors1 = self.rng.integers(0, 4, (5, 15)).astype(float)
+        vectors1[0] = self.rng.random(15)
+        vectors2 = np.round(self.rng.random((4, 15)), 1)
+        vectors2[1] = 1
+        for variant, func in [('b', _kendall_tau), ('a', _tau_a)]:
+            expected = _all_combinations(vectors1, vectors2, func)
+            result = _kendall_tau_batched(
+                vectors1, vectors2, variant=variant, max_elements=40)
+            np.testing.assert_array_equal(result, expected)
+
     def test_compare_bures_similarity(self):
         from rsatoolbox.rdm.compare import compare_bures_similarity
         result = compare_bures_similarity(self.test_rdm1, self.test_rdm1)
@@ -230,6 +244,10 @@ class TestCompareRDM(unittest.TestCase):
         assert_almost_equal(d_right1, d_right2)
         assert_almost_equal(d_right1, result[0, 0])
         assert_almost_equal(d_right2, result[0, 0])
+        for i in range(3):
+            assert_almost_equal(
+                _bures_similarity_first_way(self.k1, self.k2[i]),
+                result[0, i])
 
     def test_compare_bures_metric(self):
         from rsatoolbox.rdm.compare import compare_bures_metric
@@ -332,6 +350,20 @@ class TestCompareRDMNaN(unittest.TestCase):
         res = _cosine_cov_weighted(vector1, vector2, nan_idx=nan_idx)
         assert_array_almost_equal(res, res_slow)
 
+    def test_cov_operator(self):
+        from rsatoolbox.util.matrix import get_cov_operator
+        from rsatoolbox.rdm.compare import _get_v
+        sigma_k = np.eye(6) + 0.5
+        nan_idx = np.ones(15, bool)
+        nan_idx[3] = False
+        cov_op = get_cov_operator(6, sigma_k, nan_idx)
+        self.assertIs(cov_op, get_cov_operator(6, sigma_k.copy(), nan_idx))
+        self.assertIsNot(cov_op, get_cov_operator(6, sigma_k, None))
+        vectors = np.random.default_rng(0).random((3, 14))
+        v = _get_v(6, sigma_k)[nan_idx][:, nan_idx].toarray()
+        assert_array_almost_equal(
+            cov_op.solve(vectors), np.linalg.solve(v, vectors.T).T)
+
     def test_compare_correlation(self):
         from rsatoolbox.rdm.compare import compare_correlation
         result = compare_correlation(self.test_rdm1, self.test_rdm1)
@@ -57,6 +57,37 @@ class TestCrossval(unittest.TestCase):
                            pattern_descriptor='type',
                            rdm_descriptor='session')
 
+    def test_k_fold_orders(self):
+        """ sets_k_fold must draw all its random numbers through
+        _k_fold_orders, which the dual bootstrap uses to reproduce them """
+        from rsatoolbox.inference import sets_k_fold
+        from rsatoolbox.inference.crossvalsets import _k_fold_orders
+        for k_rdm, k_pattern in [(1, 1), (2, 3)]:
+            np.random.seed(4)
+            sets_k_fold(
+                self.rdms, k_rdm=k_rdm, k_pattern=k_pattern,
+                pattern_descriptor='type', rdm_descriptor='session')
+            state = np.random.get_state()
+            np.random.seed(4)
+            _k_fold_orders(
+                np.unique(self.rdms.rdm_descriptors['session']),
+                np.unique(self.rdms.pattern_descriptors['type']), k_rdm)
+            np.testing.assert_array_equal(
+                np.random.get_state()[1], state[1])
+            self.assertEqual(np.random.get_state()[2], state[2])
+
+    def test_bootstrap_crossval_random_state(self):
+        from rsatoolbox.inference import bootstrap_crossval
+        res_1 = bootstrap_crossval(
+            self.m, self.rdms, N=4, k_rdm=2, k_pattern=2,
+            pattern_descriptor='type', rdm_descriptor='session',
+            random_state=2)
+        res_2 = bootstrap_crossval(
+            self.m, self.rdms, N=4, k_rdm=2, k_pattern=2,
+            pattern_descriptor='type', rdm_descriptor='session',
+            random_state=2, n_jobs=2)
+        np.testing.assert_array_equal(res_1.evaluations, res_2.evaluations)
+
     def test_dual_bootstrap_random(self):
         from rsatoolbox.inference import eval_dual_bootstrap_random
         res = eval_dual_bootstrap_random(
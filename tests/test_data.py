@@ -524,6 +524,40 @@ class TestDataComputations(unittest.TestCase):
         self.assertEqual(len(descriptor), 6)
         self.assertEqual(descriptor[-1], 5)
         assert (np.all(self.test_data.measurements[-1] == avg[-1]))
+        np.testing.assert_allclose(
+            avg[2], self.test_data.measurements[4:7].mean(axis=0))
+        np.testing.assert_array_equal(n_obs, [2, 2, 3, 1, 1, 1])
+
+    def test_average_by_nan(self):
+        self.test_data.measurements[0, 1] = np.nan
+        avg, _, _ = rsd.average_dataset_by(self.test_data, 'conds')
+        self.assertTrue(np.isnan(avg[0, 1]))
+        avg, _, _ = rsd.average_dataset_by(
+            self.test_data, 'conds', nan_mean=True)
+        self.assertEqual(avg[0, 1], self.test_data.measurements[1, 1])
+
+    def test_average_by_float32(self):
+        self.test_data.measurements = \
+            self.test_data.measurements.astype(np.float32)
+        avg, _, _ = rsd.average_dataset_by(self.test_data, 'conds')
+        self.assertEqual(avg.dtype, np.float32)
+
+    def test_average_by_int(self):
+        measurements = (self.test_data.measurements * 1000).astype(np.int16)
+        self.test_data.measurements = measurements
+        avg, _, _ = rsd.average_dataset_by(self.test_data, 'conds')
+        self.assertEqual(avg.dtype, np.float64)
+        np.testing.assert_allclose(
+            avg[2], measurements[4:7].mean(axis=0))
+
+    def test_average_by_temporal(self):
+        measurements = self.rng.random((10, 5, 4))
+        data = rsd.TemporalDataset(
+            measurements=measurements,
+            obs_descriptors={'conds': self.test_data.obs_descriptors['conds']})
+        avg, _, _ = rsd.average_dataset_by(data, 'conds')
+        self.assertEqual(avg.shape, (6, 5, 4))
+        np.testing.assert_allclose(avg[1], measurements[2:4].mean(axis=0))
 
 
 class TestNoiseComputations(unittest.TestCase):
@@ -623,6 +657,96 @@ class TestSave(unittest.TestCase):
                       == chn_des['rois'])
         assert data_loaded.descriptors['subj'] == 0
 
+    def test_load_lazy(self):
+        import io
+        f = io.BytesIO()  # Essentially a Mock file
+        measurements = np.random.rand(10, 5)
+        obs_des = {'conds': np.array([0, 0, 1, 1, 2, 2, 2, 3, 4, 5])}
+        chn_des = {'rois': np.array(['V1', 'V1', 'IT', 'IT', 'V4'])}
+        data = rsd.Dataset(measurements=measurements,
+                           obs_descriptors=obs_des,
+                           channel_descriptors=chn_des
+                           )
+        data.save(f, file_type='hdf5')
+        data_loaded = rsd.load_dataset(f, file_type='hdf5', lazy=True)
+        assert data_loaded.is_lazy
+        assert data_loaded.n_obs == 10
+        subset = data_loaded.subset_obs('conds', [2, 0]) \
+            .subset_channel('rois', ['V1', 'V4'])
+        assert subset.is_lazy
+        assert subset.n_channel == 3
+        np.testing.assert_array_equal(
+            subset.measurements,
+            data.subset_obs('conds', [2, 0])
+            .subset_channel('rois', ['V1', 'V4']).measurements)
+        for split_lazy, split in zip(data_loaded.split_channel('rois'),
+                                     data.split_channel('rois')):
+            assert split_lazy.is_lazy
+            np.testing.assert_array_equal(
+                split_lazy.measurements, split.measurements)
+        assert data_loaded == data
+        with self.assertRaises(ValueError):
+            data_loaded.measurements[0, 0] = 1
+
+
+class TestDatasetView(unittest.TestCase):
+
+    def test_copy_view(self):
+        measurements = np.random.rand(6, 4)
+        data = rsd.Dataset(measurements,
+                           descriptors={'subj': 0},
+                           obs_descriptors={'conds': np.arange(6)})
+        view = data.copy(deep=False)
+        assert view == data
+        assert np.shares_memory(view.measurements, data.measurements)
+        with self.assertRaises(ValueError):
+            view.measurements[0, 0] = 1
+        data.measurements[0, 0] = 2
+        self.assertEqual(view.measurements[0, 0], 2)
+        view.obs_descriptors['run'] = np.zeros(6)
+        view.sort_by('conds')
+        self.assertNotIn('run', data.obs_descriptors)
+
+class TestLazyMeasurements(unittest.TestCase):
+
+    def test_memmap_temporal(self):
+        from tempfile import TemporaryDirectory
+        import os
+        measurements = np.random.rand(6, 4, 5)
+        with TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'measurements.dat')
+            memmap = np.memmap(filename, dtype=float, mode='w+',
+                               shape=measurements.shape)
+            memmap[:] = measurements
+            memmap.flush()
+            data = rsd.TemporalDataset(
+                np.memmap(filename, dtype=float, mode='r',
+                          shape=measurements.shape),
+                channel_descriptors={'rois': [0, 1, 0, 1]})
+            assert data.is_lazy
+            subset = data.subset_channel('rois', 1) \
+                .subset_time('time', 1, 3)
+            assert subset.is_lazy
+            loaded = subset.measurements
+            del data, subset, memmap
+        assert type(loaded) is np.ndarray
+        np.testing.assert_array_equal(loaded, measurements[:, [1, 3], 1:4])
+
+    def test_indexing(self):
+        import io
+        from h5py import File
+        from rsatoolbox.data import LazyMeasurements
+        measurements = np.random.rand(7, 6)
+        file = File(io.BytesIO(), 'w')
+        file['measurements'] = measurements
+        lazy = LazyMeasurements(file['measurements'])
+        view = lazy[[5, 1, 1, 3], 2:5][::-1]
+        assert isinstance(view, LazyMeasurements)
+        assert view.shape == (4, 3)
+        np.testing.assert_array_equal(
+            np.asarray(view), measurements[[5, 1, 1, 3], 2:5][::-1])
+        np.testing.assert_array_equal(lazy[2], measurements[2])
+
 
 class TestOESplit(unittest.TestCase):
 
@@ -58,6 +58,24 @@ class TestBootstrap(unittest.TestCase):
         assert rdm_sample[0].n_cond == 5
         assert rdm_sample[0].n_rdm == 11
 
+    def test_bootstrap_sample_indices(self):
+        from rsatoolbox.inference import bootstrap_sample
+        from rsatoolbox.inference import bootstrap_sample_indices
+        from rsatoolbox.inference import BootstrapIndexer
+        np.random.seed(1)
+        rdm_idx, pattern_idx = bootstrap_sample_indices(
+            self.rdms, 5, 'session', 'type')
+        indexer = BootstrapIndexer(self.rdms, 'session', 'type')
+        np.random.seed(1)
+        for i in range(5):
+            sample, rdm_i, pattern_i = bootstrap_sample(
+                self.rdms, 'session', 'type')
+            np.testing.assert_array_equal(rdm_idx[i], rdm_i)
+            np.testing.assert_array_equal(pattern_idx[i], pattern_i)
+            np.testing.assert_array_equal(
+                indexer.gather(rdm_idx[i], pattern_idx[i]),
+                sample.get_vectors())
+
     def test_bootstrap_sample_pattern_descriptors(self):
         from rsatoolbox.inference import bootstrap_sample_pattern
         rdm_sample = bootstrap_sample_pattern(self.rdms, 'type')
@@ -93,6 +111,58 @@ class TestEvaluation(unittest.TestCase):
         eval_bootstrap_rdm(self.m, self.rdms, N=10)
         eval_bootstrap_rdm(self.m, self.rdms, N=10, boot_noise_ceil=True)
 
+    def test_eval_bootstrap_random_state(self):
+        from rsatoolbox.inference import eval_bootstrap
+        res_1 = eval_bootstrap(self.m, self.rdms, N=10, random_state=1)
+        res_2 = eval_bootstrap(self.m, self.rdms, N=10, random_state=1,
+                               n_jobs=2)
+        np.testing.assert_array_equal(res_1.evaluations, res_2.evaluations)
+        np.testing.assert_array_equal(
+            res_1.noise_ceiling, res_2.noise_ceiling)
+
+    def test_eval_dual_bootstrap_indexed(self):
+        """ the shared computation for unfitted models must equal the
+        evaluation of the three bootstrap samples one by one """
+        from rsatoolbox.inference import eval_dual_bootstrap
+        from rsatoolbox.model.fitter import fit_mock
+
+        def fitter(*args, **kwargs):
+            return fit_mock(*args, **kwargs)
+        for method in ['cosine', 'corr', 'spearman']:
+            res_1 = eval_dual_bootstrap(
+                self.m, self.rdms, method=method, N=10, random_state=1)
+            res_2 = eval_dual_bootstrap(
+                self.m, self.rdms, method=method, N=10, random_state=1,
+                fitter=fitter)
+            np.testing.assert_allclose(
+                res_1.evaluations, res_2.evaluations)
+            np.testing.assert_allclose(
+                res_1.noise_ceiling, res_2.noise_ceiling)
+            np.testing.assert_allclose(res_1.variances, res_2.variances)
+
+    def test_eval_dual_bootstrap_indexed_global_state(self):
+        """ the shared computation must draw the same samples from the
+        global random state as the evaluation sample by sample """
+        from rsatoolbox.inference import eval_dual_bootstrap
+        from rsatoolbox.model.fitter import fit_mock
+
+        def fitter(*args, **kwargs):
+            return fit_mock(*args, **kwargs)
+        self.rdms.rdm_descriptors['subj'] = np.arange(11) // 2
+        for rdm_descriptor in ['index', 'subj']:
+            np.random.seed(3)
+            res_1 = eval_dual_bootstrap(
+                self.m, self.rdms, method='corr', N=10,
+                rdm_descriptor=rdm_descriptor)
+            np.random.seed(3)
+            res_2 = eval_dual_bootstrap(
+                self.m, self.rdms, method='corr', N=10,
+                rdm_descriptor=rdm_descriptor, fitter=fitter)
+            np.testing.assert_allclose(
+                res_1.evaluations, res_2.evaluations)
+            np.testing.assert_allclose(
+                res_1.noise_ceiling, res_2.noise_ceiling)
+
     def test_bootstrap_testset(self):
         from rsatoolbox.inference import bootstrap_testset
         bootstrap_testset(self.m, self.rdms, method='cosine', fitter=None, N=100,
@@ -47,3 +47,30 @@ class TestNoiseCeiling(unittest.TestCase):
     def test_boot_noise_ceiling_runs_for_method(self, method):
         from rsatoolbox.inference import boot_noise_ceiling
         _, _ = boot_noise_ceiling(self.rdms, method=method)
+
+    @parameterized.expand([
+        ['cosine', 'index'],
+        ['cosine', 'session'],
+        ['corr', 'session'],
+        ['cosine_cov', 'session'],
+        ['spearman', 'index'],
+    ])
+    def test_boot_noise_ceiling_matches_pooling(self, method, descriptor):
+        from rsatoolbox.inference import boot_noise_ceiling
+        from rsatoolbox.util.inference_util import pool_rdm
+        from rsatoolbox.rdm import compare
+        noise_min = []
+        noise_max = []
+        pred_test = pool_rdm(self.rdms, method=method)
+        for value in np.unique(self.rdms.rdm_descriptors[descriptor]):
+            train = self.rdms.subset(
+                descriptor,
+                np.setdiff1d(self.rdms.rdm_descriptors[descriptor], value))
+            test = self.rdms.subset(descriptor, value)
+            pred_train = pool_rdm(train, method=method)
+            noise_min.append(np.mean(compare(pred_train, test, method)))
+            noise_max.append(np.mean(compare(pred_test, test, method)))
+        nc = boot_noise_ceiling(
+            self.rdms, method=method, rdm_descriptor=descriptor)
+        np.testing.assert_allclose(
+            nc, [np.mean(noise_min), np.mean(noise_max)])
@@ -147,6 +147,39 @@ class TestRDM(unittest.TestCase):
         assert_array_equal(rdms_sample.pattern_descriptors['type'],
                            [0, 1, 2, 2, 2, 2])
 
+    def test_rdm_subsample_pattern_values(self):
+        """sampled pairs match the matrices, NaN for repeated patterns
+        """
+        dis = np.random.rand(3, 10)
+        pattern_des = {'type': np.array([0, 1, 2, 2, 4])}
+        rdms = rsr.RDMs(dissimilarities=dis,
+                        pattern_descriptors=pattern_des)
+        rdms_sample = rdms.subsample_pattern('type', [4, 0, 2, 0])
+        selection = np.array([0, 0, 2, 3, 4])
+        rows, cols = np.triu_indices(5, 1)
+        expected = rdms.get_matrices()[
+            :, selection[rows], selection[cols]]
+        expected[:, selection[rows] == selection[cols]] = np.nan
+        assert_array_equal(rdms_sample.dissimilarities, expected)
+
+    def test_rdm_copy_view(self):
+        dis = np.random.rand(3, 10)
+        rdms = rsr.RDMs(dissimilarities=dis,
+                        descriptors={'subj': 0},
+                        pattern_descriptors={'type': np.arange(5)})
+        view = rdms.copy(deep=False)
+        assert view == rdms
+        assert np.shares_memory(view.dissimilarities, rdms.dissimilarities)
+        with self.assertRaises(ValueError):
+            view.dissimilarities[0, 0] = 1
+        view.descriptors['subj'] = 1
+        view.pattern_descriptors['new'] = np.zeros(5)
+        self.assertEqual(rdms.descriptors['subj'], 0)
+        self.assertNotIn('new', rdms.pattern_descriptors)
+        rdms_sub = rdms.subset('index', [0, 2])
+        rdms_sub.descriptors['subj'] = 2
+        self.assertEqual(rdms.descriptors['subj'], 0)
+
     def test_rdm_idx(self):
         dis = np.zeros((8, 10))
         mes = "Euclidean"
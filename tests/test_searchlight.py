@@ -56,3 +56,131 @@ class TestSearchlight(unittest.TestCase):
         sl_RDMs = get_searchlight_RDMs(data_2d, centers, neighbors, events)
 
         assert sl_RDMs.dissimilarities.shape == (2, 10)
+
+    def test_searchlight_RDMs_match_calc_rdm(self):
+        from rsatoolbox.util.searchlight import get_searchlight_RDMs
+        from rsatoolbox.data.dataset import Dataset
+        from rsatoolbox.rdm.calc import calc_rdm
+
+        rng = np.random.default_rng(1)
+        data_2d = rng.random((12, 20))
+        events = np.array([3, 1, 2, 0] * 3)
+        centers = np.array([0, 5, 9])
+        neighbors = [[0, 1, 2, 3], [4, 5, 6, 10, 11], [7, 8, 9, 12, 15, 19]]
+        for method in ['euclidean', 'correlation', 'mahalanobis']:
+            sl_RDMs = get_searchlight_RDMs(
+                data_2d, centers, neighbors, events, method=method,
+                verbose=False)
+            datasets = [Dataset(data_2d[:, nb],
+                                obs_descriptors={'events': events})
+                        for nb in neighbors]
+            expected = calc_rdm(datasets, method=method, descriptor='events')
+            np.testing.assert_allclose(
+                sl_RDMs.dissimilarities, expected.dissimilarities)
+            np.testing.assert_array_equal(
+                sl_RDMs.rdm_descriptors['voxel_index'], centers)
+
+    def test_searchlight_RDMs_parallel_out(self):
+        from rsatoolbox.util.searchlight import get_searchlight_RDMs
+
+        rng = np.random.default_rng(2)
+        data_2d = rng.random((8, 30))
+        events = np.arange(8) % 4
+        centers = np.arange(25)
+        neighbors = [np.arange(c, c + 5) for c in centers]
+        for method in ['correlation', 'poisson']:
+            expected = get_searchlight_RDMs(
+                data_2d, centers, neighbors, events, method=method,
+                verbose=False)
+            out = np.zeros((25, 6))
+            sl_RDMs = get_searchlight_RDMs(
+                data_2d, centers, neighbors, events, method=method,
+                verbose=False, n_jobs=2, chunk_size=7, out=out,
+                backend='threading')
+            assert sl_RDMs.dissimilarities is out
+            np.testing.assert_allclose(out, expected.dissimilarities)
+        with self.assertRaises(ValueError):
+            get_searchlight_RDMs(data_2d, centers, neighbors, events,
+                                 verbose=False, out=np.zeros((3, 6)))
+
+    def test_get_volume_searchlight_matches_neighbors(self):
+        from rsatoolbox.util.searchlight import get_volume_searchlight
+        from rsatoolbox.util.searchlight import _get_searchlight_neighbors
+
+        rng = np.random.default_rng(3)
+        mask = (rng.random((6, 7, 8)) > 0.3).astype(int)
+        centers, neighbors = get_volume_searchlight(
+            mask, radius=2.5, threshold=0.6)
+        expected_centers = []
+        for center in zip(*np.nonzero(mask)):
+            nb = _get_searchlight_neighbors(mask, center, 2.5)
+            if mask[nb].mean() >= 0.6:
+                expected_centers.append(np.ravel_multi_index(center, mask.shape))
+                np.testing.assert_array_equal(
+                    neighbors[len(expected_centers) - 1],
+                    np.sort(np.ravel_multi_index(nb, mask.shape)))
+        np.testing.assert_array_equal(centers, expected_centers)
+        assert len(neighbors) == len(centers)
+
+    def test_get_volume_searchlight_cache(self):
+        from tempfile import TemporaryDirectory
+        from rsatoolbox.util.searchlight import get_volume_searchlight
+
+        mask = np.ones((4, 4, 4))
+        mask[0] = 0
+        with TemporaryDirectory() as cache_dir:
+            centers, neighbors = get_volume_searchlight(
+                mask, radius=2, threshold=0.5, cache_dir=cache_dir)
+            centers_c, neighbors_c = get_volume_searchlight(
+                mask, radius=2, threshold=0.5, cache_dir=cache_dir)
+        np.testing.assert_array_equal(centers, centers_c)
+        np.testing.assert_array_equal(neighbors.indptr, neighbors_c.indptr)
+        np.testing.assert_array_equal(neighbors.indices, neighbors_c.indices)
+
+    def test_get_surface_searchlight(self):
+        from rsatoolbox.util.searchlight import get_surface_searchlight
+
+        # 4 x 4 grid of unit squares, each split into two triangles
+        xx, yy = np.meshgrid(np.arange(5), np.arange(5), indexing='ij')
+        vertices = np.stack([xx.ravel(), yy.ravel(), np.zeros(25)], axis=1)
+        idx = np.arange(25).reshape(5, 5)
+        faces = np.concatenate([
+            np.stack([idx[:-1, :-1].ravel(), idx[1:, :-1].ravel(),
+                      idx[1:, 1:].ravel()], axis=1),
+            np.stack([idx[:-1, :-1].ravel(), idx[1:, 1:].ravel(),
+                      idx[:-1, 1:].ravel()], axis=1)])
+        centers, neighbors = get_surface_searchlight(
+            vertices, faces, radius=1.0)
+        assert len(centers) == 25
+        np.testing.assert_array_equal(neighbors[12], [7, 11, 12, 13, 17])
+        centers, neighbors = get_surface_searchlight(
+            vertices, faces, radius=1, metric='ring')
+        np.testing.assert_array_equal(
+            neighbors[12], [6, 7, 11, 12, 13, 17, 18])
+        mask = np.ones(25, dtype=bool)
+        mask[7] = False
+        centers, neighbors = get_surface_searchlight(
+            vertices, faces, radius=1.0, mask=mask)
+        assert len(centers) == 24
+        np.testing.assert_array_equal(neighbors[11], [11, 12, 13, 17])
+
+    def test_evaluate_models_searchlight_fixed(self):
+        from rsatoolbox.util.searchlight import evaluate_models_searchlight
+        from rsatoolbox.util.searchlight import evaluate_models_searchlight_fixed
+        from rsatoolbox.rdm import RDMs
+        from rsatoolbox.model import ModelFixed, ModelWeighted
+        from rsatoolbox.inference import eval_fixed
+
+        rng = np.random.default_rng(4)
+        sl_RDM = RDMs(rng.random((6, 10)), rdm_descriptors={
+            'voxel_index': np.arange(6)})
+        models = [ModelFixed('fixed', rng.random(10)),
+                  ModelWeighted('weighted', rng.random((3, 10)))]
+        theta = [None, np.array([1, 0.5, 2])]
+        for method in ['cosine', 'corr', 'spearman', 'cosine_cov', 'corr_cov']:
+            evaluations = evaluate_models_searchlight_fixed(
+                sl_RDM, models, method=method, theta=theta, chunk_size=4)
+            results = evaluate_models_searchlight(
+                sl_RDM, models, eval_fixed, method=method, theta=theta)
+            expected = np.array([r.evaluations[0, :, 0] for r in results])
+            np.testing.assert_allclose(evaluations, expected)
@@ -46,5 +46,64 @@ class TestIndicator(unittest.TestCase):
         self.assertEqual(n_col, 10)
 
 
+
+class TestRDMCovariance(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.n_cond = 7
+        self.n_dist = 21
+        a = self.rng.random((self.n_cond, self.n_cond))
+        self.sigma_ks = [
+            None,
+            self.rng.random(self.n_cond) + 0.5,
+            a @ a.T + np.eye(self.n_cond)]
+
+    def test_solve(self):
+        from numpy.testing import assert_allclose
+        from rsatoolbox.util.matrix import RDMCovariance
+        vectors = self.rng.standard_normal((4, self.n_dist))
+        for sigma_k in self.sigma_ks:
+            cov = RDMCovariance(self.n_cond, sigma_k)
+            solution = cov.solve(vectors)
+            assert_allclose(cov.dot(solution), vectors, atol=1e-10)
+            assert_allclose(
+                solution,
+                np.linalg.solve(cov.v.toarray(), vectors.T).T,
+                atol=1e-10)
+
+    def test_solve_missing(self):
+        from numpy.testing import assert_allclose
+        from rsatoolbox.util.matrix import RDMCovariance
+        valid = np.ones(self.n_dist, bool)
+        valid[[2, 11]] = False
+        vectors = self.rng.standard_normal((4, self.n_dist - 2))
+        for sigma_k in self.sigma_ks:
+            cov = RDMCovariance(self.n_cond, sigma_k, valid)
+            v_full = rsu.matrix.get_v(self.n_cond, sigma_k).toarray()
+            assert_allclose(
+                cov.solve(vectors),
+                np.linalg.solve(v_full[valid][:, valid], vectors.T).T,
+                atol=1e-10)
+
+    def test_solve_low_rank(self):
+        """ a rank deficient sigma_k has no closed form solution and must
+        fall back to conjugate gradients """
+        from numpy.testing import assert_allclose
+        from scipy.sparse.linalg import cg
+        from rsatoolbox.util.matrix import RDMCovariance
+        low_rank = self.rng.standard_normal((self.n_cond, 3))
+        sigma_k = low_rank @ low_rank.T
+        valid = np.ones(self.n_dist, bool)
+        valid[[2, 11]] = False
+        for val in [None, valid]:
+            cov = RDMCovariance(self.n_cond, sigma_k, val)
+            self.assertIsNone(cov._get_sigma_c())
+            vectors = self.rng.standard_normal((2, cov.v.shape[0]))
+            assert_allclose(
+                cov.solve(vectors),
+                [cg(cov.v, vec, atol=0)[0] for vec in vectors])
+
+
 if __name__ == '__main__':
     unittest.main()